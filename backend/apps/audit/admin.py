@@ -0,0 +1,21 @@
+from django.contrib import admin
+from apps.audit.models import AuditEvent
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    """Read-only view of the audit log"""
+
+    list_display = ('occurred_at', 'entity_type', 'entity_id', 'merchant_id', 'action', 'actor_type', 'actor_id', 'source')
+    list_filter = ('entity_type', 'source', 'actor_type')
+    search_fields = ('=entity_id', '=merchant_id')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,39 @@
+"""
+Create upcoming monthly audit_event partitions and drop expired ones.
+
+    python manage.py audit_partitions                  # run daily (cron) or on deploy
+    python manage.py audit_partitions --ahead 6 --retain-months 0
+
+Partitions are created for this month and AUDIT_PARTITION_MONTHS_AHEAD more;
+partitions that ended more than AUDIT_RETENTION_MONTHS ago are dropped
+(0 keeps everything).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.audit.services.audit_service import AuditService, month_start
+
+
+class Command(BaseCommand):
+    help = 'Maintain monthly audit_event partitions (create ahead, apply retention).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.AUDIT_PARTITION_MONTHS_AHEAD)
+        parser.add_argument('--retain-months', type=int, default=settings.AUDIT_RETENTION_MONTHS)
+
+    def handle(self, *args, **options):
+        created = AuditService.ensure_partitions(months_ahead=options['ahead'])
+        dropped = []
+        if options['retain_months'] > 0:
+            cutoff = month_start(timezone.now().date(), -options['retain_months'])
+            dropped = AuditService.drop_partitions_before(cutoff)
+
+        for name in created:
+            self.stdout.write(f'  created {name}')
+        for name in dropped:
+            self.stdout.write(f'  dropped {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(AuditService.partitions())} monthly partition(s); {len(created)} created, {len(dropped)} dropped.'
+        ))
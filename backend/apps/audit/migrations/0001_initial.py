@@ -0,0 +1,66 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:19
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# Django cannot declare partitioned tables, so the table is created in SQL
+# and CreateModel only records the model state.  Monthly partitions are
+# added by AuditService.ensure_partitions(); the DEFAULT partition catches
+# anything outside them.
+CREATE_SQL = """
+CREATE TABLE audit_event (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    occurred_at timestamp with time zone NOT NULL,
+    entity_type varchar(16) NOT NULL,
+    entity_id bigint NOT NULL,
+    merchant_id bigint NOT NULL,
+    action varchar(32) NOT NULL,
+    changes jsonb NOT NULL,
+    actor_type varchar(16) NOT NULL,
+    actor_id bigint NULL,
+    source varchar(16) NOT NULL,
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+CREATE INDEX audit_entity_time ON audit_event (entity_type, entity_id, occurred_at DESC);
+CREATE INDEX audit_merchant_time ON audit_event (merchant_id, occurred_at DESC);
+CREATE TABLE audit_event_default PARTITION OF audit_event DEFAULT;
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            CREATE_SQL,
+            reverse_sql='DROP TABLE audit_event;',
+            state_operations=[
+                migrations.CreateModel(
+                    name='AuditEvent',
+                    fields=[
+                        ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('entity_type', models.CharField(choices=[('product', 'Product'), ('merchant', 'Merchant')], max_length=16)),
+                        ('entity_id', models.BigIntegerField()),
+                        ('merchant_id', models.BigIntegerField()),
+                        ('action', models.CharField(max_length=32)),
+                        ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                        ('actor_type', models.CharField(choices=[('merchant', 'Merchant'), ('user', 'Staff user'), ('system', 'System')], max_length=16)),
+                        ('actor_id', models.BigIntegerField(blank=True, null=True)),
+                        ('source', models.CharField(max_length=16)),
+                    ],
+                    options={
+                        'db_table': 'audit_event',
+                        'ordering': ['-occurred_at', '-id'],
+                        'indexes': [models.Index(fields=['entity_type', 'entity_id', '-occurred_at'], name='audit_entity_time'), models.Index(fields=['merchant_id', '-occurred_at'], name='audit_merchant_time')],
+                    },
+                ),
+            ],
+        ),
+    ]
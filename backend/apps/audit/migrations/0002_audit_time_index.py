@@ -0,0 +1,26 @@
+# Generated by Django 4.2.10 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        # Staff history without an entity or merchant filter: newest first
+        # across every partition.  Created on the partitioned table in SQL so
+        # Postgres builds it on each partition, like the indexes in 0001.
+        migrations.RunSQL(
+            'CREATE INDEX audit_time ON audit_event (occurred_at DESC, id DESC);',
+            reverse_sql='DROP INDEX audit_time;',
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='auditevent',
+                    index=models.Index(fields=['-occurred_at', '-id'], name='audit_time'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class AuditEvent(models.Model):
+    """
+    One recorded change to a product or merchant: who changed which fields,
+    from what to what.  Append-only.
+
+    The table is range-partitioned by month on occurred_at (migration 0001,
+    AuditService.ensure_partitions), so its real primary key is
+    (id, occurred_at); rows are only ever inserted and read.
+    """
+
+    PRODUCT = 'product'
+    MERCHANT = 'merchant'
+    ENTITY_CHOICES = [
+        (PRODUCT, 'Product'),
+        (MERCHANT, 'Merchant'),
+    ]
+
+    ACTOR_MERCHANT = 'merchant'
+    ACTOR_USER = 'user'
+    ACTOR_SYSTEM = 'system'
+    ACTOR_CHOICES = [
+        (ACTOR_MERCHANT, 'Merchant'),
+        (ACTOR_USER, 'Staff user'),
+        (ACTOR_SYSTEM, 'System'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    entity_type = models.CharField(max_length=16, choices=ENTITY_CHOICES)
+    entity_id = models.BigIntegerField()
+    # Owning merchant of the entity; scopes what a merchant may read.
+    merchant_id = models.BigIntegerField()
+    action = models.CharField(max_length=32)
+    # {field: [old, new]}
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    actor_type = models.CharField(max_length=16, choices=ACTOR_CHOICES)
+    actor_id = models.BigIntegerField(null=True, blank=True)
+    source = models.CharField(max_length=16)  # api | admin | system
+
+    class Meta:
+        db_table = 'audit_event'
+        ordering = ['-occurred_at', '-id']
+        indexes = [
+            models.Index(fields=['entity_type', 'entity_id', '-occurred_at'], name='audit_entity_time'),
+            models.Index(fields=['merchant_id', '-occurred_at'], name='audit_merchant_time'),
+            models.Index(fields=['-occurred_at', '-id'], name='audit_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type} {self.entity_id} {self.action} at {self.occurred_at:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+from apps.audit.models import AuditEvent
+
+
+class AuditQuerySerializer(serializers.Serializer):
+    """Query parameters of GET /api/audit/events/."""
+    entity_type = serializers.ChoiceField(choices=AuditEvent.ENTITY_CHOICES, required=False)
+    entity_id = serializers.IntegerField(min_value=1, required=False)
+    merchant = serializers.IntegerField(min_value=1, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    cursor = serializers.CharField(required=False, default='')
+    page_size = serializers.IntegerField(min_value=1, max_value=200, default=50)
+
+    def validate(self, attrs):
+        if attrs.get('entity_id') is not None and not attrs.get('entity_type'):
+            raise serializers.ValidationError({'entity_type': 'Required with entity_id.'})
+        if attrs.get('since') and attrs.get('until') and attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError({'until': 'Must be after since.'})
+        return attrs
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = [
+            'id', 'occurred_at', 'entity_type', 'entity_id', 'merchant_id',
+            'action', 'changes', 'actor_type', 'actor_id', 'source',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,298 @@
+"""
+Audit Service
+=============
+Records who changed stock, price, status flags and verification of products
+and merchants, without putting an INSERT on the write path.
+
+    record(...)        builds an AuditEvent and queues it once the caller's
+                       transaction commits (never blocks on the database)
+    AuditBuffer        per-process queue; a daemon thread writes it out as
+                       multi-row INSERTs every AUDIT_FLUSH_SECONDS or when
+                       AUDIT_BATCH_SIZE events are waiting
+    flush()            write everything queued now (shutdown, tests)
+
+Memory is bounded by AUDIT_BUFFER_MAX_EVENTS: a producer that finds the
+buffer full writes a batch itself (backpressure instead of growth).  Events
+only leave memory once written; if the database is down they stay queued
+up to the bound and are dropped (and logged) beyond it.  The buffer is
+flushed at interpreter exit and from gunicorn's worker_exit hook
+(shutdown()).
+
+record() uses the ORM's rules: call it from sync code (async views go
+through sync_to_async together with their other post-write work).
+
+Partitions: audit_event is partitioned by month.  ensure_partitions()
+creates the current and upcoming months (the flusher runs it once per
+process; `manage.py audit_partitions` in cron/deploys), moving any rows
+the DEFAULT partition caught for those months, and drop_partitions_before()
+implements retention.
+"""
+
+import atexit
+import collections
+import logging
+import os
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from apps.audit.models import AuditEvent
+from apps.merchants.models import Merchant
+from config.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'audit_event_p'
+
+PRODUCT_FIELDS = ('price', 'stock', 'is_active', 'is_archived', 'is_verified')
+MERCHANT_FIELDS = ('status', 'is_verified', 'is_active')
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AuditBuffer:
+    """Bounded in-process queue of AuditEvents with a background writer."""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._events = collections.deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._pid = os.getpid()
+        self.dropped = 0
+
+    # ── Producers ─────────────────────────────────────────────────────────
+
+    def add(self, events: list) -> None:
+        if self._pid != os.getpid():
+            # Forked (gunicorn preload): the parent's thread and locks are not ours.
+            self._reset()
+        if settings.AUDIT_BACKGROUND_FLUSH:
+            self._start()
+        with self._cond:
+            self._events.extend(events)
+            size = len(self._events)
+            if size >= settings.AUDIT_BATCH_SIZE:
+                self._cond.notify()
+        if size > settings.AUDIT_BUFFER_MAX_EVENTS:
+            self.flush()
+
+    def __len__(self):
+        return len(self._events)
+
+    # ── Writer ────────────────────────────────────────────────────────────
+
+    def flush(self) -> int:
+        """Write queued events in AUDIT_BATCH_SIZE batches; returns how many were written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    count = min(settings.AUDIT_BATCH_SIZE, len(self._events))
+                    batch = [self._events.popleft() for _ in range(count)]
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                except DatabaseError:
+                    logger.exception('Audit flush failed; %d event(s) requeued', len(batch))
+                    self._requeue(batch)
+                    return written
+                written += len(batch)
+
+    @staticmethod
+    @span('audit.flush')
+    def _write(batch: list) -> None:
+        AuditEvent.objects.bulk_create(batch)
+
+    def _requeue(self, batch: list) -> None:
+        with self._cond:
+            room = max(0, settings.AUDIT_BUFFER_MAX_EVENTS - len(self._events))
+            kept = batch[:room]
+            self._events.extendleft(reversed(kept))
+        if len(kept) < len(batch):
+            self.dropped += len(batch) - len(kept)
+            logger.error('Audit buffer full; dropped %d event(s) (%d total)', len(batch) - len(kept), self.dropped)
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            AuditService.ensure_partitions()
+        except DatabaseError:
+            logger.exception('Could not create audit partitions; rows go to the default partition')
+        try:
+            while not self._stopping:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: self._stopping or len(self._events) >= settings.AUDIT_BATCH_SIZE,
+                        timeout=settings.AUDIT_FLUSH_SECONDS,
+                    )
+                self.flush()
+                close_old_connections()
+        finally:
+            connection.close()
+
+    def close(self) -> int:
+        """Stop the writer thread and flush what is left (shutdown)."""
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            with self._cond:
+                self._stopping = True
+                self._cond.notify()
+            thread.join(timeout=settings.AUDIT_FLUSH_SECONDS + 5)
+            self._thread, self._stopping = None, False
+        return self.flush()
+
+
+_buffer = AuditBuffer()
+atexit.register(_buffer.close)
+
+
+class AuditService:
+    """Audit event recording and partition maintenance. All methods are classmethods."""
+
+    # ── Recording ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def actor_of(principal) -> tuple:
+        """(actor_type, actor_id) of a request principal."""
+        if isinstance(principal, Merchant):
+            return AuditEvent.ACTOR_MERCHANT, principal.pk
+        if principal is not None and getattr(principal, 'is_authenticated', False):
+            return AuditEvent.ACTOR_USER, principal.pk
+        return AuditEvent.ACTOR_SYSTEM, None
+
+    @staticmethod
+    def diff(before: dict, after, fields) -> dict:
+        """{field: [old, new]} for `fields` whose value on `after` differs from `before`."""
+        changes = {}
+        for field in fields:
+            if field in before and before[field] != getattr(after, field):
+                changes[field] = [before[field], getattr(after, field)]
+        return changes
+
+    @classmethod
+    def record(cls, entity_type: str, entity_id: int, merchant_id: int, action: str, changes: dict,
+               actor=None, source: str = 'api') -> None:
+        cls.record_many([(entity_type, entity_id, merchant_id, action, changes)], actor=actor, source=source)
+
+    @classmethod
+    def record_many(cls, entries, actor=None, source: str = 'api') -> None:
+        """
+        Queue (entity_type, entity_id, merchant_id, action, changes) entries
+        for the same actor.  Entries without changes are skipped.
+        """
+        actor_type, actor_id = cls.actor_of(actor)
+        occurred_at = timezone.now()
+        events = [
+            AuditEvent(
+                occurred_at=occurred_at, entity_type=entity_type, entity_id=entity_id, merchant_id=merchant_id,
+                action=action, changes=changes, actor_type=actor_type, actor_id=actor_id, source=source,
+            )
+            for entity_type, entity_id, merchant_id, action, changes in entries
+            if changes
+        ]
+        if events:
+            transaction.on_commit(lambda: _buffer.add(events))
+
+    @staticmethod
+    def flush() -> int:
+        return _buffer.flush()
+
+    @staticmethod
+    def shutdown() -> int:
+        return _buffer.close()
+
+    @staticmethod
+    def pending() -> int:
+        return len(_buffer)
+
+    # ── Partitions ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f'{PARTITION_PREFIX}{month:%Y%m}'
+
+    @classmethod
+    def partitions(cls) -> list:
+        """Monthly partitions, oldest first, as (name, first day) pairs."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'audit_event'::regclass AND c.relname LIKE %s ORDER BY c.relname",
+                [PARTITION_PREFIX + '%'],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        return [(name, date(int(name[-6:-2]), int(name[-2:]), 1)) for name in names]
+
+    @classmethod
+    def ensure_partitions(cls, months_ahead: int = None, today: date = None) -> list:
+        """Create missing partitions for this month and `months_ahead` more; returns the new names."""
+        if months_ahead is None:
+            months_ahead = settings.AUDIT_PARTITION_MONTHS_AHEAD
+        today = today or timezone.now().date()
+        existing = {name for name, _ in cls.partitions()}
+        created = []
+        for offset in range(months_ahead + 1):
+            start = month_start(today, offset)
+            name = cls.partition_name(start)
+            if name not in existing:
+                cls._create_partition(name, start, month_start(start, 1))
+                created.append(name)
+        return created
+
+    @staticmethod
+    @transaction.atomic
+    def _create_partition(name: str, start: date, end: date) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT EXISTS (SELECT 1 FROM audit_event_default WHERE occurred_at >= %s AND occurred_at < %s)',
+                [start, end],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_event FOR VALUES FROM (%s) TO (%s)',
+                    [start, end],
+                )
+                return
+            # The default partition already holds rows for this month: move
+            # them, or Postgres refuses the new partition.
+            cursor.execute('ALTER TABLE audit_event DETACH PARTITION audit_event_default')
+            cursor.execute(
+                f'CREATE TABLE {name} PARTITION OF audit_event FOR VALUES FROM (%s) TO (%s)', [start, end],
+            )
+            cursor.execute(
+                'WITH moved AS (DELETE FROM audit_event_default WHERE occurred_at >= %s AND occurred_at < %s '
+                'RETURNING *) INSERT INTO audit_event SELECT * FROM moved',
+                [start, end],
+            )
+            cursor.execute('ALTER TABLE audit_event ATTACH PARTITION audit_event_default DEFAULT')
+
+    @classmethod
+    def drop_partitions_before(cls, month: date) -> list:
+        """Drop monthly partitions that end on or before `month`; returns their names."""
+        dropped = []
+        with connection.cursor() as cursor:
+            for name, start in cls.partitions():
+                if month_start(start, 1) <= month:
+                    cursor.execute(f'DROP TABLE {name}')
+                    dropped.append(name)
+        return dropped
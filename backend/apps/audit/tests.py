@@ -0,0 +1,215 @@
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib import admin
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from apps.audit.models import AuditEvent
+from apps.audit.services.audit_service import AuditBuffer, AuditService
+from apps.merchants.admin import MerchantAdmin
+from apps.merchants.models import Merchant
+from apps.products.models import MerchandiseProduct
+from apps.users.models import User
+from config.factories import auth_header, seed_merchant, seed_products
+
+
+@override_settings(AUDIT_BACKGROUND_FLUSH=False)
+class AuditRecordingTests(TestCase):
+    """Product writes are buffered in memory and written in batches"""
+
+    def setUp(self):
+        self.merchant = seed_merchant('1')
+        self.products = seed_products(self.merchant, 3, images_per_product=0)
+        self.addCleanup(AuditService.flush)
+
+    def test_patch_is_buffered_until_flush(self):
+        """Test PATCH queues an event after commit and flush writes it"""
+        product = self.products[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/products/merchant/{product.pk}/', {'stock': 9, 'is_active': True},
+                content_type='application/json', **auth_header(self.merchant),
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AuditService.pending(), 1)
+        self.assertFalse(AuditEvent.objects.exists())
+
+        self.assertEqual(AuditService.flush(), 1)
+        event = AuditEvent.objects.get()
+        self.assertEqual((event.entity_type, event.entity_id, event.action), ('product', product.pk, 'update'))
+        self.assertEqual(event.changes, {'stock': [0, 9]})  # unchanged is_active is left out
+        self.assertEqual((event.actor_type, event.actor_id, event.merchant_id), ('merchant', self.merchant.pk,
+                                                                                 self.merchant.pk))
+
+    def test_bulk_action_records_one_event_per_changed_product(self):
+        """Test bulk actions log each product that actually changed, in one INSERT"""
+        MerchandiseProduct.objects.filter(pk=self.products[0].pk).update(is_active=False)
+        ids = [product.pk for product in self.products]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/products/merchant/bulk-action/', {'action': 'deactivate', 'ids': ids},
+                             content_type='application/json', **auth_header(self.merchant))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(AuditService.flush(), 2)
+        self.assertEqual(
+            sorted(AuditEvent.objects.values_list('entity_id', 'action', 'changes')),
+            [(pk, 'bulk_deactivate', {'is_active': [True, False]}) for pk in ids[1:]],
+        )
+
+    def test_admin_approval_is_recorded(self):
+        """Test an admin status change logs the approval and the staff user"""
+        staff = User.objects.create_user(username='approver@rapex.com', email='approver@rapex.com',
+                                          password='Passw0rd123', is_staff=True)
+        request = RequestFactory().post('/admin/')
+        request.user = staff
+        form = SimpleNamespace(initial={'status': Merchant.PENDING, 'is_verified': False, 'is_active': True})
+        self.merchant.status = Merchant.APPROVED
+        with self.captureOnCommitCallbacks(execute=True):
+            MerchantAdmin(Merchant, admin.site).save_model(request, self.merchant, form, change=True)
+        AuditService.flush()
+
+        event = AuditEvent.objects.get(entity_type='merchant')
+        self.assertEqual(event.action, 'status_approved')
+        self.assertEqual(event.changes, {'status': ['PENDING', 'APPROVED'], 'is_verified': [False, True]})
+        self.assertEqual((event.actor_type, event.actor_id, event.source), ('user', staff.pk, 'admin'))
+
+    def test_uncommitted_changes_are_not_recorded(self):
+        """Test events are queued only when the transaction commits"""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            AuditService.record('product', 1, 1, 'update', {'stock': [1, 2]})
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(AuditService.pending(), 0)
+
+
+@override_settings(AUDIT_BACKGROUND_FLUSH=False, AUDIT_BATCH_SIZE=2, AUDIT_BUFFER_MAX_EVENTS=4)
+class AuditBufferTests(TestCase):
+    """The buffer is bounded and survives database errors"""
+
+    def _events(self, count):
+        return [
+            AuditEvent(entity_type='product', entity_id=n, merchant_id=1, action='update',
+                       changes={'stock': [0, n]}, actor_type='system', source='system')
+            for n in range(count)
+        ]
+
+    def test_full_buffer_flushes_in_producer(self):
+        """Test exceeding the bound writes batches instead of growing"""
+        buffer = AuditBuffer()
+        buffer.add(self._events(3))
+        self.assertEqual(len(buffer), 3)
+        with self.assertNumQueries(3):  # 5 events in batches of 2
+            buffer.add(self._events(2))
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(AuditEvent.objects.count(), 5)
+
+    def test_failed_flush_requeues_up_to_the_bound(self):
+        """Test events stay queued on errors and the overflow is counted"""
+        buffer = AuditBuffer()
+        buffer.add(self._events(4))
+        with mock.patch.object(AuditBuffer, '_write', side_effect=DatabaseError('down')), \
+                self.assertLogs('apps.audit.services.audit_service', 'ERROR') as logs:
+            self.assertEqual(buffer.flush(), 0)
+            self.assertEqual(len(buffer), 4)
+            buffer.add(self._events(2))  # over the bound: producer flush fails too
+        self.assertEqual(len(buffer), 4)
+        self.assertIn('dropped 2 event(s)', logs.output[-1])
+        self.assertEqual(buffer.dropped, 2)
+        self.assertEqual(buffer.close(), 4)
+
+
+class AuditPartitionTests(TestCase):
+    """Monthly partitions are created ahead, adopt default-partition rows and expire"""
+
+    def _partition_rows(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {name}')
+            return cursor.fetchone()[0]
+
+    def test_create_move_and_drop(self):
+        """Test partitions cover upcoming months and retention drops old ones"""
+        stray = datetime(2031, 2, 10, tzinfo=dt_timezone.utc)
+        AuditEvent.objects.create(occurred_at=stray, entity_type='merchant', entity_id=1, merchant_id=1,
+                                  action='update', changes={}, actor_type='system', source='system')
+        self.assertEqual(self._partition_rows('audit_event_default'), 1)
+
+        created = AuditService.ensure_partitions(months_ahead=1, today=date(2031, 1, 15))
+        self.assertEqual(created, ['audit_event_p203101', 'audit_event_p203102'])
+        self.assertEqual(self._partition_rows('audit_event_p203102'), 1)
+        self.assertEqual(self._partition_rows('audit_event_default'), 0)
+        self.assertEqual(AuditService.ensure_partitions(months_ahead=1, today=date(2031, 1, 15)), [])
+
+        self.assertEqual(AuditService.drop_partitions_before(date(2031, 2, 1)), ['audit_event_p203101'])
+        self.assertEqual(AuditEvent.objects.filter(occurred_at=stray).count(), 1)
+
+
+class AuditEventEndpointTests(TestCase):
+    """History endpoint: scoped per principal, filtered by entity and time"""
+
+    URL = '/api/audit/events/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.merchant, cls.other = seed_merchant('1'), seed_merchant('2')
+        base = datetime(2026, 5, 1, tzinfo=dt_timezone.utc)
+        AuditEvent.objects.bulk_create([
+            AuditEvent(occurred_at=base.replace(day=day), entity_type='product', entity_id=day % 3 + 1,
+                       merchant_id=cls.merchant.pk if day % 2 else cls.other.pk, action='update',
+                       changes={'stock': [day, day + 1]}, actor_type='merchant', actor_id=cls.merchant.pk,
+                       source='api')
+            for day in range(1, 21)
+        ])
+
+    def test_merchant_sees_only_own_events(self):
+        """Test merchants are scoped to their own entities"""
+        response = self.client.get(self.URL, {'merchant': self.other.pk}, **auth_header(self.merchant))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(len(data), 10)
+        self.assertEqual({event['merchant_id'] for event in data}, {self.merchant.pk})
+
+    def test_staff_filters_and_pages(self):
+        """Test entity and time filters and keyset paging for staff"""
+        staff = User.objects.create_user(
+            username='auditor@rapex.com', email='auditor@rapex.com', password='Passw0rd123', is_staff=True,
+        )
+        self.client.force_login(staff)
+
+        seen, cursor = [], None
+        while True:
+            params = {'entity_type': 'product', 'entity_id': 2, 'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            page = self.client.get(self.URL, params).json()
+            seen.extend(event['occurred_at'] for event in page['data'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 7)  # days 1, 4, ..., 19
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+        response = self.client.get(self.URL, {'since': '2026-05-10T00:00:00Z', 'until': '2026-05-12T00:00:00Z'})
+        self.assertEqual(len(response.json()['data']), 2)
+
+    def test_rejects_anonymous_and_bad_queries(self):
+        """Test anonymous access, entity_id without type and bad cursors"""
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+        auth = auth_header(self.merchant)
+        self.assertEqual(self.client.get(self.URL, {'entity_id': 1}, **auth).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'cursor': 'nope'}, **auth).status_code, 400)
+
+
+class AuditBackgroundFlushTests(TransactionTestCase):
+    """The writer thread flushes on its interval and on shutdown"""
+
+    @override_settings(AUDIT_BACKGROUND_FLUSH=True, AUDIT_FLUSH_SECONDS=0.05)
+    def test_background_thread_writes_events(self):
+        """Test events reach the table without an explicit flush"""
+        AuditService.record('merchant', 7, 7, 'update', {'status': ['PENDING', 'APPROVED']})
+        deadline = time.monotonic() + 5
+        while not AuditEvent.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        AuditService.record('merchant', 7, 7, 'update', {'status': ['APPROVED', 'SUSPENDED']})
+        AuditService.shutdown()
+        self.assertEqual(AuditEvent.objects.count(), 2)
+        self.assertEqual(AuditService.pending(), 0)
@@ -0,0 +1,70 @@
+"""
+Audit log views.
+
+  GET /api/audit/events/   – change history, newest first (cursor paged)
+
+Staff/admin users signed in to the admin (session) can read every event;
+a merchant (JWT) only reads events of its own account and products.
+"""
+
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from apps.audit.selectors.audit_selectors import AuditSelector, InvalidCursor
+from apps.audit.serializers.audit_serializers import AuditEventSerializer, AuditQuerySerializer
+from apps.merchants.models import Merchant
+from apps.products.authentication import MerchantJWTAuthentication
+from apps.users.models import User
+from config.async_views import AsyncAPIView
+from config.instrumentation import span
+
+
+class AuditEventListView(AsyncAPIView):
+    """
+    GET /api/audit/events/
+
+    Query params:
+      entity_type, entity_id – one product or merchant (entity_id needs entity_type)
+      merchant               – everything owned by a merchant (staff only)
+      since, until           – ISO datetimes, [since, until)
+      cursor                 – `next_cursor` of the previous page
+      page_size              – default 50, max 200
+    """
+    authentication_classes = [MerchantJWTAuthentication, SessionAuthentication]
+    permission_classes = [AllowAny]  # checked per principal below
+
+    async def get(self, request):
+        principal = request.user
+        is_staff = isinstance(principal, User) and principal.is_active and (principal.is_staff or principal.is_admin())
+        if not is_staff and not isinstance(principal, Merchant):
+            return Response(
+                {'success': False, 'message': 'Authentication required.'}, status=status.HTTP_403_FORBIDDEN,
+            )
+
+        query = AuditQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response({'success': False, 'errors': query.errors}, status=status.HTTP_400_BAD_REQUEST)
+        filters = query.validated_data
+        if not is_staff:
+            filters['merchant'] = principal.pk
+
+        qs = AuditSelector.events(filters)
+        if filters['cursor']:
+            try:
+                qs = AuditSelector.after_cursor(qs, filters['cursor'])
+            except InvalidCursor as exc:
+                return Response({'success': False, 'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page_size = filters['page_size']
+        events = [event async for event in qs[:page_size + 1]]
+        has_next = len(events) > page_size
+        events = events[:page_size]
+        with span('serialize'):
+            data = AuditEventSerializer(events, many=True).data
+        return Response({
+            'success': True,
+            'data': data,
+            'next_cursor': AuditSelector.encode_cursor(events[-1]) if has_next else None,
+        })
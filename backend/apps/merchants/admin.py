@@ -1,4 +1,6 @@
 from django.contrib import admin
+from apps.audit.models import AuditEvent
+from apps.audit.services.audit_service import MERCHANT_FIELDS, AuditService
 from apps.merchants.models import Merchant
 
 
@@ -44,7 +46,12 @@ class MerchantAdmin(admin.ModelAdmin):
         'last_login',
         'full_address',
         'is_registration_complete',
-        'required_documents_uploaded'
+        'required_documents_uploaded',
+        # Maintained from the metric ledger (MerchantMetricsService).
+        'rating',
+        'rating_count',
+        'total_orders',
+        'total_sales',
     ]
     
     fieldsets = (
@@ -98,6 +105,7 @@ class MerchantAdmin(admin.ModelAdmin):
         ('Business Metrics', {
             'fields': (
                 'rating',
+                'rating_count',
                 'total_orders',
                 'total_sales'
             )
@@ -106,13 +114,14 @@ class MerchantAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at', 'last_login')
         }),
         ('Registration Data', {
-            'fields': ('temp_registration_data', 'is_registration_complete'),
+            'fields': ('is_registration_complete',),
             'classes': ('collapse',)
         })
     )
     
     def save_model(self, request, obj, form, change):
         """Save model with custom logic"""
+        before = {field: form.initial.get(field) for field in MERCHANT_FIELDS} if change else {}
         if change and obj.status == Merchant.APPROVED and not obj.is_verified:
             obj.is_verified = True
             obj.verified_by = request.user
@@ -120,3 +129,14 @@ class MerchantAdmin(admin.ModelAdmin):
             obj.verified_at = timezone.now()
         
         super().save_model(request, obj, form, change)
+
+        if change:
+            # Status, activity, name and city all show in the public catalog.
+            from apps.products.services.catalog_service import CatalogService
+            CatalogService.refresh_merchant(obj.pk)
+
+            changes = AuditService.diff(before, obj, MERCHANT_FIELDS)
+            action = f'status_{obj.status.lower()}' if 'status' in changes else 'update'
+            AuditService.record(
+                AuditEvent.MERCHANT, obj.pk, obj.pk, action, changes, actor=request.user, source='admin',
+            )
@@ -0,0 +1,79 @@
+"""
+Benchmark password verification cost under each hasher policy.
+
+    python manage.py bench_password_hashers
+    python manage.py bench_password_hashers --policies argon2 scrypt --seconds 5
+
+Runs check_password() in a single thread, so the reported rate is merchant
+logins per second per CPU core at the configured cost settings.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from config.hashers import POLICY_HASHERS
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput per core for each password hasher policy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--policies',
+            nargs='+',
+            choices=sorted(POLICY_HASHERS),
+            default=list(POLICY_HASHERS),
+        )
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=2.0,
+            help='Minimum wall time spent verifying per policy.',
+        )
+
+    def handle(self, *args, **options):
+        password = 'Bench-Passw0rd!'
+        self.stdout.write(f"{'policy':<8} {'ms/login':>10} {'logins/s/core':>14}  params")
+
+        for policy in options['policies']:
+            hasher_path = POLICY_HASHERS[policy]
+            with override_settings(PASSWORD_HASHERS=[hasher_path]):
+                try:
+                    encoded = make_password(password)
+                except ValueError as exc:  # e.g. argon2-cffi not installed
+                    raise CommandError(f'{policy}: {exc}')
+
+                rounds = 0
+                started = time.perf_counter()
+                deadline = started + options['seconds']
+                while time.perf_counter() < deadline or rounds == 0:
+                    if not check_password(password, encoded):
+                        raise CommandError(f'{policy}: verification failed')
+                    rounds += 1
+                elapsed = time.perf_counter() - started
+
+            per_login_ms = elapsed / rounds * 1000
+            self.stdout.write(
+                f'{policy:<8} {per_login_ms:>10.2f} {rounds / elapsed:>14.1f}  '
+                f'{self._describe(policy)}'
+            )
+
+    @staticmethod
+    def _describe(policy: str) -> str:
+        if policy == 'pbkdf2':
+            return f'iterations={settings.PASSWORD_PBKDF2_ITERATIONS}'
+        if policy == 'argon2':
+            return (
+                f'time_cost={settings.PASSWORD_ARGON2_TIME_COST} '
+                f'memory_cost={settings.PASSWORD_ARGON2_MEMORY_COST} '
+                f'parallelism={settings.PASSWORD_ARGON2_PARALLELISM}'
+            )
+        return (
+            f'n={settings.PASSWORD_SCRYPT_WORK_FACTOR} '
+            f'r={settings.PASSWORD_SCRYPT_BLOCK_SIZE} '
+            f'p={settings.PASSWORD_SCRYPT_PARALLELISM}'
+        )
@@ -0,0 +1,67 @@
+"""
+Worker that applies MerchantMetricDelta rows to the merchant metric columns.
+
+    python manage.py drain_merchant_metrics            # run until stopped
+    python manage.py drain_merchant_metrics --once     # drain the backlog and exit
+
+Drains batches back to back while there is a backlog and polls every
+MERCHANT_METRICS_POLL_SECONDS when idle.  Every
+MERCHANT_METRICS_RECONCILE_SECONDS it also reconciles all merchants against
+the ledger and logs any drift it corrected.  Several workers may run at once.
+"""
+
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.merchants.services.metrics_service import MerchantMetricsService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Apply pending merchant metric deltas in batches (and reconcile periodically).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.MERCHANT_METRICS_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help='Exit when no deltas are pending.')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        previous = {signum: signal.signal(signum, self._stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            self._run(options)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+    def _run(self, options):
+        applied_total = 0
+        next_reconcile = time.monotonic() + settings.MERCHANT_METRICS_RECONCILE_SECONDS
+        while not self.stopping:
+            applied = MerchantMetricsService.drain(options['batch_size'])
+            applied_total += applied
+            if applied < options['batch_size']:
+                if options['once']:
+                    break
+                if time.monotonic() >= next_reconcile:
+                    self._reconcile()
+                    next_reconcile = time.monotonic() + settings.MERCHANT_METRICS_RECONCILE_SECONDS
+                # Honour CONN_MAX_AGE and drop broken connections while idle.
+                close_old_connections()
+                time.sleep(settings.MERCHANT_METRICS_POLL_SECONDS)
+
+        self.stdout.write(f'Applied {applied_total} merchant metric delta(s).')
+
+    def _reconcile(self):
+        drifted = MerchantMetricsService.reconcile_all()
+        if drifted:
+            logger.warning('Corrected metric drift on %d merchant(s): %s', len(drifted), drifted[:20])
+
+    def _stop(self, signum, frame):
+        # Finish the current batch; it commits or rolls back as a whole.
+        self.stopping = True
@@ -0,0 +1,66 @@
+"""
+Check or repair merchant metric columns against the MerchantMetricDelta ledger.
+
+    python manage.py reconcile_merchant_metrics --dry-run     # report drift only
+    python manage.py reconcile_merchant_metrics               # fix drifted merchants
+    python manage.py reconcile_merchant_metrics --rebuild --workers 8
+
+Merchants are split into id ranges of --chunk-size; each range is one
+transaction, and ranges run on --workers processes.  Safe to run while the
+drain worker is active (see apps/merchants/services/metrics_service.py).
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.merchants.services.metrics_service import MerchantMetricsService
+
+
+def reconcile_range(first_id: int, last_id: int, rebuild: bool, dry_run: bool) -> list:
+    """Worker entry point."""
+    return MerchantMetricsService.reconcile(first_id, last_id, rebuild=rebuild, dry_run=dry_run)
+
+
+def _init_worker() -> None:
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Reconcile merchant rating/total_orders/total_sales with the metric ledger, in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Rewrite every merchant, not only drifted ones.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Merchants per transaction.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        ranges = MerchantMetricsService.id_ranges(options['chunk_size'])
+        started = time.perf_counter()
+        drifted = []
+        if options['workers'] <= 1 or len(ranges) <= 1:
+            for first_id, last_id in ranges:
+                drifted.extend(reconcile_range(first_id, last_id, options['rebuild'], options['dry_run']))
+        else:
+            # Children must open their own connections, never share the parent's.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = [
+                    pool.submit(reconcile_range, first_id, last_id, options['rebuild'], options['dry_run'])
+                    for first_id, last_id in ranges
+                ]
+                for future in futures:
+                    drifted.extend(future.result())
+
+        verb = 'found' if options['dry_run'] else 'corrected'
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(ranges)} range(s) in {time.perf_counter() - started:.1f}s; "
+            f"{verb} drift on {len(drifted)} merchant(s)."
+        ))
+        for merchant_id in drifted[:50]:
+            self.stdout.write(f'  merchant {merchant_id}')
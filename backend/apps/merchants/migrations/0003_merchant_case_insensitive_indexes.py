@@ -0,0 +1,65 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:13
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+import django.db.models.functions.text
+
+
+def check_case_duplicates(apps, schema_editor):
+    # Fail with the offending rows rather than a bare IntegrityError from
+    # CREATE UNIQUE INDEX; merge or rename them, then migrate again.
+    Merchant = apps.get_model('merchants', 'Merchant')
+    conflicts = []
+    for field in ('email', 'username'):
+        groups = (
+            Merchant.objects.annotate(folded=Lower(field)).values('folded')
+            .annotate(total=Count('pk'), ids=ArrayAgg('pk', ordering='pk'))
+            .filter(total__gt=1).order_by('folded')
+        )
+        conflicts += [f"  {field} {group['folded']!r}: merchant ids {group['ids']}" for group in groups]
+    if conflicts:
+        raise RuntimeError(
+            'Cannot add the case-insensitive email/username constraints; '
+            'these merchants differ only by case:\n' + '\n'.join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0002_alter_merchant_barangay_permit_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='merchant',
+            name='merchants_email_fc58cd_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='merchant',
+            name='merchants_usernam_4e9188_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='merchant',
+            name='merchants_phone_n_8ca20a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='merchant',
+            name='merchants_busines_c6cdd8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='merchant',
+            name='merchants_created_f43d1d_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='merchant',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='merchants_email_lower_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='merchant',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='merchants_username_lower_uniq'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0003_merchant_case_insensitive_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='merchant',
+            name='temp_registration_data',
+        ),
+    ]
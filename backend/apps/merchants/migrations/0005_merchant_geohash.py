@@ -0,0 +1,41 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:03
+
+from django.db import migrations, models
+
+from config import geohash
+
+BATCH_SIZE = 2000
+
+
+def backfill_geohash(apps, schema_editor):
+    # Historical models do not run Merchant.save(); compute it here.
+    Merchant = apps.get_model('merchants', 'Merchant')
+    pending = Merchant.objects.filter(latitude__isnull=False, longitude__isnull=False).only('latitude', 'longitude')
+    batch = []
+    for merchant in pending.iterator(chunk_size=BATCH_SIZE):
+        merchant.geohash = geohash.encode(float(merchant.latitude), float(merchant.longitude), 9)
+        batch.append(merchant)
+        if len(batch) == BATCH_SIZE:
+            Merchant.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    Merchant.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0004_remove_merchant_temp_registration_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchant',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['geohash'], name='merchants_approved_geohash', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
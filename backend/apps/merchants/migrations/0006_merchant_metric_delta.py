@@ -0,0 +1,89 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:15
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+CENT = Decimal('0.01')
+
+
+def rating_pair(rating: Decimal) -> tuple:
+    """
+    The smallest (rating_count, rating_total) whose average rounds to
+    `rating`, so existing ratings carry the weight of as few reviews as can
+    explain them.
+    """
+    rating = Decimal(rating).quantize(CENT)
+    for count in range(1, 100):
+        total = (rating * count).to_integral_value(ROUND_HALF_UP)
+        if (total / count).quantize(CENT, ROUND_HALF_UP) == rating:
+            return count, int(total)
+    return 100, int(rating * 100)  # always exact: rating has two decimals
+
+
+def opening_balances(apps, schema_editor):
+    # The ledger starts empty but reconcile() rebuilds the columns from it:
+    # record what each merchant already has as one applied delta.
+    Merchant = apps.get_model('merchants', 'Merchant')
+    MerchantMetricDelta = apps.get_model('merchants', 'MerchantMetricDelta')
+    now = timezone.now()
+    existing = (
+        Merchant.objects.filter(~Q(total_orders=0) | ~Q(total_sales=0) | ~Q(rating=0))
+        .only('total_orders', 'total_sales', 'rating')
+    )
+    merchants, deltas = [], []
+    for merchant in existing.iterator(chunk_size=BATCH_SIZE):
+        merchant.rating_count, merchant.rating_total = rating_pair(merchant.rating) if merchant.rating else (0, 0)
+        merchants.append(merchant)
+        deltas.append(MerchantMetricDelta(
+            merchant_id=merchant.pk, orders=merchant.total_orders, sales=merchant.total_sales,
+            rating_count=merchant.rating_count, rating_total=merchant.rating_total, applied_at=now,
+        ))
+        if len(merchants) == BATCH_SIZE:
+            Merchant.objects.bulk_update(merchants, ['rating_count', 'rating_total'])
+            MerchantMetricDelta.objects.bulk_create(deltas)
+            merchants, deltas = [], []
+    Merchant.objects.bulk_update(merchants, ['rating_count', 'rating_total'])
+    MerchantMetricDelta.objects.bulk_create(deltas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0005_merchant_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchant',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='merchant',
+            name='rating_total',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='MerchantMetricDelta',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('orders', models.IntegerField(default=0)),
+                ('sales', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('rating_total', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_deltas', to='merchants.merchant')),
+            ],
+            options={
+                'db_table': 'merchant_metric_delta',
+                'indexes': [models.Index(condition=models.Q(('applied_at__isnull', True)), fields=['id'], name='metric_delta_pending')],
+            },
+        ),
+        migrations.RunPython(opening_balances, migrations.RunPython.noop),
+    ]
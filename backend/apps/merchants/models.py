@@ -1,9 +1,13 @@
 from django.db import models
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.validators import RegexValidator
 from django.contrib.postgres.fields import ArrayField
 from pathlib import Path
 
+from config import geohash
+
 
 def _merchant_document_upload_path(instance, document_name: str, filename: str) -> str:
     extension = Path(filename or '').suffix.lower()
@@ -61,6 +65,18 @@ class MerchantManager(BaseUserManager):
         
         return self.create_merchant(email, username, password, **extra_fields)
 
+    def filter_by_email(self, email):
+        """
+        Case-insensitive email lookup.
+        Matches LOWER(email) so Postgres can use merchants_email_lower_uniq
+        (``email__iexact`` compiles to UPPER() and cannot use it).
+        """
+        return self.alias(email_lower=Lower('email')).filter(email_lower=Lower(Value(email)))
+
+    def filter_by_username(self, username):
+        """Case-insensitive username lookup served by merchants_username_lower_uniq."""
+        return self.alias(username_lower=Lower('username')).filter(username_lower=Lower(Value(username)))
+
 
 class Merchant(AbstractBaseUser, PermissionsMixin):
     """
@@ -167,6 +183,9 @@ class Merchant(AbstractBaseUser, PermissionsMixin):
     # Coordinates
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # Derived from latitude/longitude in save(); '' without coordinates.
+    # Indexed for prefix scans by the nearby-merchant search.
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
     
     # ============ STEP 3: DOCUMENTS ============
     # Required for all
@@ -199,8 +218,8 @@ class Merchant(AbstractBaseUser, PermissionsMixin):
         related_name='verified_merchants'
     )
     
-    # ============ TEMPORARY REGISTRATION DATA ============
-    temp_registration_data = models.JSONField(default=dict, blank=True)  # For multi-step form
+    # ============ REGISTRATION PROGRESS ============
+    # In-progress step data lives in RegistrationDraftService, not on this row.
     registration_step = models.IntegerField(default=0)  # Current step (0, 1, 2, 3)
     
     # ============ TIMESTAMPS ============
@@ -209,7 +228,11 @@ class Merchant(AbstractBaseUser, PermissionsMixin):
     last_login = models.DateTimeField(null=True, blank=True)
     
     # ============ BUSINESS METRICS ============
+    # Maintained incrementally from MerchantMetricDelta (see
+    # apps/merchants/services/metrics_service.py); never write them directly.
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    rating_count = models.IntegerField(default=0)
+    rating_total = models.BigIntegerField(default=0)  # sum of stars, rating = total / count
     total_orders = models.IntegerField(default=0)
     total_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     
@@ -221,17 +244,44 @@ class Merchant(AbstractBaseUser, PermissionsMixin):
     class Meta:
         db_table = 'merchants'
         ordering = ['-created_at']
+        # email, username, phone_number, business_name and created_at are
+        # already indexed through unique=True / db_index=True on the field.
         indexes = [
-            models.Index(fields=['email']),
-            models.Index(fields=['username']),
-            models.Index(fields=['phone_number']),
-            models.Index(fields=['business_name']),
             models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            # Nearby search: LIKE 'prefix%' scans over approved merchants.
+            models.Index(
+                fields=['geohash'],
+                name='merchants_approved_geohash',
+                opclasses=['varchar_pattern_ops'],
+                condition=Q(status='APPROVED'),
+            ),
+        ]
+        constraints = [
+            # Functional unique indexes backing case-insensitive login and
+            # uniqueness lookups (see MerchantManager.filter_by_email/username).
+            models.UniqueConstraint(Lower('email'), name='merchants_email_lower_uniq'),
+            models.UniqueConstraint(Lower('username'), name='merchants_username_lower_uniq'),
         ]
     
+    GEOHASH_PRECISION = 9  # ~5 m cells
+
     def __str__(self):
         return f"{self.business_name} (@{self.username})"
+
+    def save(self, *args, **kwargs):
+        # Keep the geohash in step with the coordinates.  Bulk writes that
+        # bypass save() (QuerySet.update, COPY) must set it themselves.
+        self.geohash = self.compute_geohash(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def compute_geohash(cls, latitude, longitude) -> str:
+        if latitude is None or longitude is None:
+            return ''
+        return geohash.encode(float(latitude), float(longitude), cls.GEOHASH_PRECISION)
     
     @property
     def full_address(self):
@@ -268,3 +318,32 @@ class Merchant(AbstractBaseUser, PermissionsMixin):
             )
         
         return False
+
+
+class MerchantMetricDelta(models.Model):
+    """
+    Append-only ledger of changes to a merchant's business metrics.
+
+    Producers insert rows (MerchantMetricsService.record_*); the drain worker
+    adds unapplied rows to the Merchant columns in batches and stamps
+    applied_at.  Rows are never updated otherwise or deleted, so the ledger
+    is also the source for reconciliation and rebuilds.
+    """
+    id = models.BigAutoField(primary_key=True)
+    merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, related_name='metric_deltas')
+    orders = models.IntegerField(default=0)
+    sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_total = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'merchant_metric_delta'
+        indexes = [
+            # The drain queue: only unapplied rows, in arrival order.
+            models.Index(fields=['id'], name='metric_delta_pending', condition=Q(applied_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"Δ merchant {self.merchant_id}: {self.orders} orders, {self.sales} sales, {self.rating_count} ratings"
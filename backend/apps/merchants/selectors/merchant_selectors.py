@@ -0,0 +1,85 @@
+"""
+Merchant Selectors
+==================
+Read-side queries for merchants that are not part of registration or auth.
+
+Follows RAPEX blueprint:
+  Selectors = database access logic (no business logic)
+"""
+
+from typing import Iterable
+
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+from apps.merchants.models import Merchant
+from config import geohash
+from config.db_router import replica_manager
+
+NEARBY_FIELDS = (
+    'id', 'business_name', 'business_categories', 'city', 'province',
+    'latitude', 'longitude', 'rating',
+)
+
+
+def _haversine_km(latitude: float, longitude: float):
+    """SQL expression for the great-circle distance from the point to each row (see geohash.haversine_km)."""
+    row_lat = Radians(Cast(F('latitude'), FloatField()))
+    row_lng = Radians(Cast(F('longitude'), FloatField()))
+    lat, lng = Radians(Value(latitude)), Radians(Value(longitude))
+    a = (
+        Power(Sin((row_lat - lat) / 2), 2)
+        + Cos(lat) * Cos(row_lat) * Power(Sin((row_lng - lng) / 2), 2)
+    )
+    return Value(2 * geohash.EARTH_RADIUS_KM) * ASin(Sqrt(Least(Value(1.0), a)))
+
+
+class MerchantSelector:
+
+    @staticmethod
+    def nearby_candidates(latitude: float, longitude: float, radius_km: float,
+                          categories: Iterable[str] = ()) -> QuerySet:
+        """
+        Approved merchants that may lie within `radius_km` of the point: those
+        in the geohash cells covering the circle (prefix scans on the partial
+        merchants_approved_geohash index) and inside its bounding box.  A
+        superset of the true result.
+        """
+        qs = replica_manager(Merchant).filter(
+            status=Merchant.APPROVED, latitude__isnull=False, longitude__isnull=False,
+        )
+
+        cells = geohash.covering_cells(latitude, longitude, radius_km)
+        if cells:
+            in_cells = Q()
+            for cell in cells:
+                in_cells |= Q(geohash__startswith=cell)
+            qs = qs.filter(in_cells)
+
+        box = geohash.bounding_box(latitude, longitude, radius_km)
+        if box is not None:
+            min_lat, min_lng, max_lat, max_lng = box
+            qs = qs.filter(latitude__range=(min_lat, max_lat))
+            if min_lng >= -180.0 and max_lng <= 180.0:  # not across the antimeridian
+                qs = qs.filter(longitude__range=(min_lng, max_lng))
+
+        categories = list(categories)
+        if categories:
+            qs = qs.filter(business_categories__overlap=categories)
+        return qs
+
+    @classmethod
+    def nearby(cls, latitude: float, longitude: float, radius_km: float,
+               categories: Iterable[str] = (), limit: int = 20) -> QuerySet:
+        """
+        Approved merchants within `radius_km`, nearest first, annotated with
+        `distance_km`.  The exact distance is computed for the candidates
+        only, and just `limit` rows are returned.
+        """
+        return (
+            cls.nearby_candidates(latitude, longitude, radius_km, categories)
+            .annotate(distance_km=_haversine_km(latitude, longitude))
+            .filter(distance_km__lte=radius_km)
+            .order_by('distance_km', 'id')
+            .only(*NEARBY_FIELDS)[:limit]
+        )
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from apps.merchants.models import Merchant
 from django.core.validators import RegexValidator
@@ -168,10 +169,54 @@ class MerchantSerializer(serializers.ModelSerializer):
 
 
 class RegistrationProgressSerializer(serializers.Serializer):
-    """Serializer for registration progress"""
+    """Serializer for registration progress (backed by the draft store)"""
     
-    merchant_id = serializers.IntegerField()
+    draft_id = serializers.CharField()
     current_step = serializers.IntegerField()
     is_complete = serializers.BooleanField()
     temp_data = serializers.JSONField()
-    business_registration = serializers.CharField()
+    business_registration = serializers.CharField(allow_null=True)
+
+
+class NearbyMerchantQuerySerializer(serializers.Serializer):
+    """Query parameters of the nearby-merchant search."""
+
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(required=False, default=5.0, min_value=0.01)
+    categories = serializers.CharField(required=False, allow_blank=True, default='')
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+    def validate_radius_km(self, value):
+        if value > settings.MERCHANT_NEARBY_MAX_RADIUS_KM:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {settings.MERCHANT_NEARBY_MAX_RADIUS_KM}."
+            )
+        return value
+
+    def validate_categories(self, value):
+        """Comma-separated business categories; a merchant matches any of them."""
+        return [category.strip() for category in value.split(',') if category.strip()]
+
+
+class NearbyMerchantSerializer(serializers.ModelSerializer):
+    """Public listing of an approved merchant with its distance from the search point."""
+
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Merchant
+        fields = [
+            'id',
+            'business_name',
+            'business_categories',
+            'city',
+            'province',
+            'latitude',
+            'longitude',
+            'rating',
+            'distance_km',
+        ]
+
+    def get_distance_km(self, obj) -> float:
+        return round(obj.distance_km, 3)
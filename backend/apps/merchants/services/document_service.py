@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core import signing
+
+from apps.merchants.models import Merchant
+from apps.users.models import User
+
+SIGNED_URL_SALT = 'merchants.document'
+
+
+class MerchantDocumentService:
+    """
+    Access rules and signed links for merchant verification documents
+    (ID, selfie and permit files under merchant/<id>/documents/).
+
+    Documents are addressed by file field name (``valid_id``,
+    ``mayors_permit``, ...) or ``other-<n>`` for the n-th optional document.
+    """
+
+    FILE_FIELDS = (
+        'selfie_with_id',
+        'valid_id',
+        'barangay_permit',
+        'dti_sec_certificate',
+        'bir_certificate',
+        'mayors_permit',
+    )
+    OTHER_PREFIX = 'other-'
+
+    @staticmethod
+    def can_access(principal, merchant_id: int) -> bool:
+        """The merchant itself, or a staff/admin user."""
+        if isinstance(principal, Merchant):
+            return principal.is_active and principal.pk == merchant_id
+        if isinstance(principal, User):
+            return principal.is_active and (principal.is_staff or principal.is_admin())
+        return False
+
+    @classmethod
+    def document_path(cls, merchant: Merchant, document: str) -> str:
+        """
+        Storage name of `document` for `merchant`.
+        Raises LookupError if the document is unknown or was not uploaded.
+        """
+        if document in cls.FILE_FIELDS:
+            name = getattr(merchant, document).name
+        elif document.startswith(cls.OTHER_PREFIX) and document[len(cls.OTHER_PREFIX):].isdigit():
+            index = int(document[len(cls.OTHER_PREFIX):])
+            others = merchant.other_documents or []
+            name = others[index] if index < len(others) else ''
+        else:
+            raise LookupError(f"Unknown document: {document}")
+        if not name:
+            raise LookupError(f"Document not uploaded: {document}")
+        return name
+
+    @classmethod
+    def get_document_path(cls, merchant_id: int, document: str) -> str:
+        """Like document_path, loading only the document columns."""
+        try:
+            merchant = Merchant.objects.only(*cls.FILE_FIELDS, 'other_documents').get(pk=merchant_id)
+        except Merchant.DoesNotExist:
+            raise LookupError(f"Merchant not found: {merchant_id}")
+        return cls.document_path(merchant, document)
+
+    # ---------- signed URLs ----------
+
+    @staticmethod
+    def sign(merchant_id: int, document: str, path: str) -> str:
+        """
+        Token for a short-lived download link.  It names the stored file, so
+        it stops working once the document is replaced.
+        """
+        return signing.dumps({'m': merchant_id, 'd': document, 'p': path}, salt=SIGNED_URL_SALT, compress=True)
+
+    @classmethod
+    def resolve_signed(cls, token: str) -> str:
+        """
+        Storage name for a signed-link token.
+        Raises signing.BadSignature (incl. SignatureExpired) or LookupError.
+        """
+        payload = signing.loads(token, salt=SIGNED_URL_SALT, max_age=settings.MERCHANT_DOCUMENT_URL_MAX_AGE)
+        path = cls.get_document_path(payload['m'], payload['d'])
+        if path != payload['p']:
+            raise LookupError('Document has been replaced.')
+        return path
@@ -0,0 +1,181 @@
+"""
+Merchant Metrics Service
+========================
+Keeps Merchant.rating, total_orders and total_sales current without
+aggregating order history on every change.
+
+    producers   record_order / record_rating / record  -> MerchantMetricDelta rows
+    worker      drain()      one batched UPDATE: total = total + Σ delta, per merchant
+    periodic    reconcile()  recompute drifted merchants from the applied ledger
+    repair      reconcile(rebuild=True) over id_ranges(), in parallel
+
+Writers only INSERT, so recording a metric never contends on the merchant
+row; the worker folds many deltas into one UPDATE per merchant per batch.
+
+Concurrency: drain() claims deltas with FOR UPDATE SKIP LOCKED (several
+workers may run), and both drain() and reconcile() lock merchant rows in id
+order before writing.  reconcile() reads the ledger after taking those
+locks, so a batch is either fully visible to it (applied_at set, totals
+updated) or not at all.
+"""
+
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from apps.merchants.models import Merchant, MerchantMetricDelta
+from config.instrumentation import span
+
+RATING_SQL = "CASE WHEN {count} > 0 THEN round(({total})::numeric / ({count}), 2) ELSE 0 END"
+
+DRAIN_SQL = f"""
+WITH batch AS (
+    UPDATE merchant_metric_delta SET applied_at = now()
+    WHERE id IN (
+        SELECT id FROM merchant_metric_delta
+        WHERE applied_at IS NULL
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING merchant_id, orders, sales, rating_count, rating_total
+), delta AS (
+    SELECT merchant_id, sum(orders) AS orders, sum(sales) AS sales,
+           sum(rating_count) AS rating_count, sum(rating_total) AS rating_total
+    FROM batch GROUP BY merchant_id
+), locked AS (
+    SELECT id FROM merchants WHERE id IN (SELECT merchant_id FROM delta) ORDER BY id FOR UPDATE
+)
+UPDATE merchants AS m SET
+    total_orders = m.total_orders + d.orders,
+    total_sales = m.total_sales + d.sales,
+    rating_count = m.rating_count + d.rating_count,
+    rating_total = m.rating_total + d.rating_total,
+    rating = {RATING_SQL.format(count='m.rating_count + d.rating_count', total='m.rating_total + d.rating_total')}
+FROM delta AS d
+WHERE m.id = d.merchant_id AND m.id IN (SELECT id FROM locked)
+RETURNING (SELECT count(*) FROM batch)
+"""
+
+# Expected metrics of merchants [%s, %s] from the applied part of the ledger.
+EXPECTED_CTE = f"""
+WITH ledger AS (
+    SELECT m.id,
+           coalesce(sum(d.orders), 0) AS total_orders,
+           coalesce(sum(d.sales), 0) AS total_sales,
+           coalesce(sum(d.rating_count), 0) AS rating_count,
+           coalesce(sum(d.rating_total), 0) AS rating_total
+    FROM merchants AS m
+    LEFT JOIN merchant_metric_delta AS d ON d.merchant_id = m.id AND d.applied_at IS NOT NULL
+    WHERE m.id BETWEEN %s AND %s
+    GROUP BY m.id
+), expected AS (
+    SELECT *, {RATING_SQL.format(count='rating_count', total='rating_total')} AS rating FROM ledger
+)
+"""
+
+DRIFTED = """
+(m.total_orders, m.total_sales, m.rating_count, m.rating_total, m.rating)
+IS DISTINCT FROM (e.total_orders, e.total_sales, e.rating_count, e.rating_total, e.rating)
+"""
+
+RECONCILE_SQL = EXPECTED_CTE + f"""
+UPDATE merchants AS m SET
+    total_orders = e.total_orders,
+    total_sales = e.total_sales,
+    rating_count = e.rating_count,
+    rating_total = e.rating_total,
+    rating = e.rating
+FROM expected AS e
+WHERE m.id = e.id AND (%s OR {DRIFTED})
+RETURNING m.id
+"""
+
+CHECK_SQL = EXPECTED_CTE + f"""
+SELECT m.id FROM merchants AS m JOIN expected AS e ON e.id = m.id WHERE {DRIFTED} ORDER BY m.id
+"""
+
+
+class MerchantMetricsService:
+    """Incremental merchant metrics. All methods are classmethods."""
+
+    # ── Producers ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def record_order(cls, merchant_id: int, amount: Decimal) -> None:
+        cls.record([MerchantMetricDelta(merchant_id=merchant_id, orders=1, sales=amount)])
+
+    @classmethod
+    def record_rating(cls, merchant_id: int, stars: int) -> None:
+        if not 1 <= stars <= 5:
+            raise ValueError('stars must be between 1 and 5')
+        cls.record([MerchantMetricDelta(merchant_id=merchant_id, rating_count=1, rating_total=stars)])
+
+    @staticmethod
+    def record(deltas: Iterable[MerchantMetricDelta]) -> None:
+        """
+        Append deltas in the caller's transaction; they count once drained.
+        Reversals (cancelled orders, removed ratings) are negative deltas.
+        """
+        MerchantMetricDelta.objects.bulk_create(deltas)
+
+    # ── Worker ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    @span('merchant_metrics.drain')
+    @transaction.atomic
+    def drain(batch_size: int = 1000) -> int:
+        """Apply up to `batch_size` pending deltas; returns how many were applied."""
+        with connection.cursor() as cursor:
+            cursor.execute(DRAIN_SQL, [batch_size])
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def pending() -> int:
+        return MerchantMetricDelta.objects.filter(applied_at__isnull=True).count()
+
+    # ── Reconciliation ────────────────────────────────────────────────────
+
+    @staticmethod
+    def id_ranges(chunk_size: int) -> list:
+        """Inclusive (first, last) merchant id ranges covering every merchant."""
+        bounds = Merchant.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        first, last = bounds['first'], bounds['last']
+        if first is None:
+            return []
+        return [(start, min(start + chunk_size - 1, last)) for start in range(first, last + 1, chunk_size)]
+
+    @staticmethod
+    @span('merchant_metrics.reconcile')
+    def reconcile(first_id: int, last_id: int, rebuild: bool = False, dry_run: bool = False) -> list:
+        """
+        Compare merchants [first_id, last_id] with the applied ledger and
+        return the ids that had drifted.  Drifted rows are corrected unless
+        `dry_run`; `rebuild` rewrites every row in the range.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            if dry_run:
+                cursor.execute(CHECK_SQL, [first_id, last_id])
+                return [row[0] for row in cursor.fetchall()]
+
+            cursor.execute(
+                'SELECT id FROM merchants WHERE id BETWEEN %s AND %s ORDER BY id FOR UPDATE', [first_id, last_id],
+            )
+            if rebuild:
+                cursor.execute(CHECK_SQL, [first_id, last_id])
+                drifted = [row[0] for row in cursor.fetchall()]
+            cursor.execute(RECONCILE_SQL, [first_id, last_id, rebuild])
+            if not rebuild:
+                drifted = sorted(row[0] for row in cursor.fetchall())
+        return drifted
+
+    @classmethod
+    def reconcile_all(cls, chunk_size: int = 5000, rebuild: bool = False, dry_run: bool = False) -> list:
+        """reconcile() every range in turn (the command runs ranges in parallel)."""
+        drifted = []
+        for first_id, last_id in cls.id_ranges(chunk_size):
+            drifted.extend(cls.reconcile(first_id, last_id, rebuild=rebuild, dry_run=dry_run))
+        return drifted
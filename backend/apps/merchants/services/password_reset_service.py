@@ -16,7 +16,9 @@ PASSWORD_MIN_LENGTH = 8
 class PasswordResetService:
     """
     Service for merchant password reset via OTP.
-    Uses Redis (Django cache) to store OTPs with TTL.
+    Stores OTPs with TTL in the shared Django cache (Redis, or the database
+    cache fallback — see CACHES in settings), so any worker can verify an OTP
+    issued by another.
     """
 
     # ---------- helpers ----------
@@ -35,7 +37,15 @@ class PasswordResetService:
     def get_active_merchant(cls, email: str) -> 'Merchant | None':
         """Return the active Merchant for this email, or None."""
         try:
-            return Merchant.objects.get(email__iexact=email, is_active=True)
+            return Merchant.objects.filter_by_email(email).get(is_active=True)
+        except Merchant.DoesNotExist:
+            return None
+
+    @classmethod
+    async def aget_active_merchant(cls, email: str) -> 'Merchant | None':
+        """Async variant of get_active_merchant."""
+        try:
+            return await Merchant.objects.filter_by_email(email).aget(is_active=True)
         except Merchant.DoesNotExist:
             return None
 
@@ -57,17 +67,45 @@ class PasswordResetService:
         logger.info(f"OTP generated for merchant: {email}")
         return otp, merchant
 
+    @classmethod
+    async def agenerate_and_store_otp(cls, email: str) -> 'tuple[str, Merchant] | tuple[None, None]':
+        """Async variant of generate_and_store_otp (async ORM and cache)."""
+        merchant = await cls.aget_active_merchant(email)
+        if merchant is None:
+            logger.warning(f"Password reset attempted for unknown email: {email}")
+            return None, None
+
+        otp = "".join(random.choices(string.digits, k=6))
+        await cache.aset(cls._otp_cache_key(email.lower()), otp, timeout=OTP_EXPIRY_SECONDS)
+        await cache.adelete(cls._verified_cache_key(email.lower()))
+        logger.info(f"OTP generated for merchant: {email}")
+        return otp, merchant
+
     @classmethod
     def verify_otp(cls, email: str, otp: str) -> bool:
         """
         Verify the 6-digit OTP for the given email.
         On success, marks the session as verified and removes the OTP.
+        The OTP is single-use: when several workers verify it concurrently,
+        only the one whose delete actually removes the key succeeds.
         """
-        stored_otp = cache.get(cls._otp_cache_key(email.lower()))
-        if stored_otp and stored_otp == otp.strip():
+        otp_key = cls._otp_cache_key(email.lower())
+        stored_otp = cache.get(otp_key)
+        if stored_otp and stored_otp == otp.strip() and cache.delete(otp_key):
             # Mark as verified
             cache.set(cls._verified_cache_key(email.lower()), True, timeout=OTP_VERIFIED_EXPIRY_SECONDS)
-            cache.delete(cls._otp_cache_key(email.lower()))
+            logger.info(f"OTP verified for merchant: {email}")
+            return True
+        logger.warning(f"OTP verification failed for merchant: {email}")
+        return False
+
+    @classmethod
+    async def averify_otp(cls, email: str, otp: str) -> bool:
+        """Async variant of verify_otp; same single-use guarantee."""
+        otp_key = cls._otp_cache_key(email.lower())
+        stored_otp = await cache.aget(otp_key)
+        if stored_otp and stored_otp == otp.strip() and await cache.adelete(otp_key):
+            await cache.aset(cls._verified_cache_key(email.lower()), True, timeout=OTP_VERIFIED_EXPIRY_SECONDS)
             logger.info(f"OTP verified for merchant: {email}")
             return True
         logger.warning(f"OTP verification failed for merchant: {email}")
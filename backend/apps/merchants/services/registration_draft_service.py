@@ -0,0 +1,81 @@
+import uuid
+import logging
+from typing import Dict, Any, Optional
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DRAFT_EXPIRY_SECONDS = 24 * 60 * 60  # 24 hours since the last saved step
+
+
+class RegistrationDraftService:
+    """
+    Service for in-progress (multi-step) merchant registrations.
+
+    Drafts live in the shared Django cache with a sliding TTL instead of as
+    inactive Merchant rows, so abandoned registrations simply expire and
+    never touch the merchants table, its indexes or unique constraints.
+    A Merchant row is only written by register_merchant_atomic at final submit.
+
+    Draft shape:
+        {
+            'draft_id': str,
+            'current_step': int,
+            'business_registration': str | None,
+            'temp_data': {'step_1': {...}, 'step_2': {...}},
+        }
+    """
+
+    # ---------- helpers ----------
+
+    @staticmethod
+    def _draft_cache_key(draft_id: str) -> str:
+        return f"merchant_registration_draft:{draft_id}"
+
+    # ---------- public API ----------
+
+    @classmethod
+    def get(cls, draft_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the draft, or None if it does not exist or has expired."""
+        if not draft_id:
+            return None
+        return cache.get(cls._draft_cache_key(str(draft_id)))
+
+    @classmethod
+    def save_step(cls, draft_id: Optional[str], step: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store JSON-safe data for one step and refresh the draft's TTL.
+        A new draft is started when draft_id is empty (step 1 only).
+
+        Raises:
+            LookupError: draft_id given but the draft is missing or expired.
+            ValueError: a new draft was started from a step other than 1.
+        """
+        if draft_id:
+            draft = cls.get(draft_id)
+            if draft is None:
+                raise LookupError('Registration draft not found or expired.')
+        else:
+            if step != 1:
+                raise ValueError('Cannot start from step other than 1')
+            draft = {
+                'draft_id': uuid.uuid4().hex,
+                'current_step': 0,
+                'business_registration': None,
+                'temp_data': {},
+            }
+
+        draft['temp_data'][f'step_{step}'] = data
+        draft['current_step'] = max(draft['current_step'], step)
+        if step == 1:
+            draft['business_registration'] = data.get('business_registration')
+
+        cache.set(cls._draft_cache_key(draft['draft_id']), draft, timeout=DRAFT_EXPIRY_SECONDS)
+        return draft
+
+    @classmethod
+    def discard(cls, draft_id: Optional[str]) -> None:
+        """Drop a draft once registration completes (no-op if already gone)."""
+        if draft_id:
+            cache.delete(cls._draft_cache_key(str(draft_id)))
+            logger.info(f"Registration draft discarded: {draft_id}")
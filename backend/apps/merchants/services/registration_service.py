@@ -1,15 +1,17 @@
-import json
 import secrets
 import string
 from typing import Dict, Any, Optional
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.contrib.auth.hashers import make_password
 from django.core.files.storage import default_storage
 from pathlib import Path
 import uuid
 from apps.merchants.models import Merchant
+from apps.merchants.services.registration_draft_service import RegistrationDraftService
+from config.instrumentation import span
 
 
 class MerchantRegistrationService:
@@ -18,6 +20,26 @@ class MerchantRegistrationService:
     Implements OOP principles with clean separation of concerns
     """
 
+    # Field-level errors for unique constraints on merchants, matched against
+    # the violated constraint/index name (e.g. merchants_email_key,
+    # merchants_email_lower_uniq).
+    UNIQUE_FIELD_ERRORS = {
+        'username': 'Username already exists.',
+        'email': 'Email already exists.',
+        'phone_number': 'Phone number already exists.',
+    }
+
+    # File fields written after the INSERT, once merchant.id exists for upload paths.
+    DOCUMENT_FIELDS = [
+        'selfie_with_id',
+        'valid_id',
+        'barangay_permit',
+        'dti_sec_certificate',
+        'bir_certificate',
+        'mayors_permit',
+        'other_documents',
+    ]
+
     # ------------------------------------------------------------------
     # Coordinate utilities
     # ------------------------------------------------------------------
@@ -40,19 +62,28 @@ class MerchantRegistrationService:
     # ------------------------------------------------------------------
 
     @staticmethod
-    def check_field_uniqueness(field: str, value: str) -> bool:
-        """
-        Return True if a merchant already exists with this value for the field.
-        Supported fields: username, email, phone_number.
-        """
+    def _uniqueness_queryset(field: str, value: str):
         if field == 'username':
-            return Merchant.objects.filter(username=value).exists()
+            return Merchant.objects.filter_by_username(value)
         if field == 'email':
-            return Merchant.objects.filter(email=value).exists()
+            return Merchant.objects.filter_by_email(value)
         if field == 'phone_number':
-            return Merchant.objects.filter(phone_number=value).exists()
+            return Merchant.objects.filter(phone_number=value)
         raise ValueError(f"Unsupported uniqueness field: {field}")
 
+    @classmethod
+    def check_field_uniqueness(cls, field: str, value: str) -> bool:
+        """
+        Return True if a merchant already exists with this value for the field.
+        Supported fields: username, email, phone_number.
+        """
+        return cls._uniqueness_queryset(field, value).exists()
+
+    @classmethod
+    async def acheck_field_uniqueness(cls, field: str, value: str) -> bool:
+        """Async variant of check_field_uniqueness for async views."""
+        return await cls._uniqueness_queryset(field, value).aexists()
+
     # ------------------------------------------------------------------
     # Authentication
     # ------------------------------------------------------------------
@@ -63,108 +94,30 @@ class MerchantRegistrationService:
         Authenticate a merchant by email or username + password.
         Returns the Merchant on success.
         Raises ValueError with a descriptive message on failure.
+
+        check_password() re-encodes the stored hash when it was made with a
+        different algorithm or cost than PASSWORD_HASHER_POLICY (see
+        config.hashers), so hashes are upgraded transparently on login.
         """
         identifier = identifier.strip()
         try:
             if '@' in identifier:
-                merchant = Merchant.objects.get(email__iexact=identifier)
+                merchant = Merchant.objects.filter_by_email(identifier).get()
             else:
-                merchant = Merchant.objects.get(username__iexact=identifier)
+                merchant = Merchant.objects.filter_by_username(identifier).get()
         except Merchant.DoesNotExist:
             raise ValueError('No merchant account found with those credentials.')
 
         if not merchant.is_active:
             raise ValueError('Your account is not yet active. Please complete registration or contact support.')
 
-        if not merchant.check_password(password):
+        with span('login.check_password'):
+            password_ok = merchant.check_password(password)
+        if not password_ok:
             raise ValueError('Incorrect password. Please try again.')
 
         return merchant
 
-    # ------------------------------------------------------------------
-    # Single-payload step resolver (used by Step3 when no merchant_id provided)
-    # ------------------------------------------------------------------
-
-    @classmethod
-    @transaction.atomic
-    def resolve_merchant_from_single_payload(
-        cls,
-        data: Dict[str, Any],
-        files: Dict[str, Any],
-        step1_serializer_class: Any,
-        step2_serializer_class: Any,
-    ) -> int:
-        """
-        When the frontend submits all three steps in one payload (no merchant_id),
-        parse and save steps 1 and 2 from the raw payload and return the merchant_id.
-
-        Args:
-            data: request.data dict
-            files: request.FILES dict
-            step1_serializer_class: Step1Serializer class (injected to avoid import)
-            step2_serializer_class: Step2Serializer class (injected to avoid import)
-
-        Returns:
-            merchant_id (int)
-
-        Raises:
-            ValidationError with serializer errors on invalid data.
-        """
-        # Parse JSON array fields
-        raw_categories = data.get('business_categories', '[]')
-        raw_types = data.get('business_types', '[]')
-
-        business_categories = (
-            json.loads(raw_categories) if isinstance(raw_categories, str) else raw_categories
-        )
-        business_types = (
-            json.loads(raw_types) if isinstance(raw_types, str) else raw_types
-        )
-
-        step1_payload = {
-            'business_name': data.get('business_name'),
-            'owner_name': data.get('owner_name'),
-            'username': data.get('username'),
-            'phone_number': data.get('phone_number'),
-            'email': data.get('email'),
-            'business_categories': business_categories,
-            'business_types': business_types,
-            'business_registration': data.get('business_registration'),
-        }
-
-        step1_serializer = step1_serializer_class(data=step1_payload)
-        if not step1_serializer.is_valid():
-            raise ValidationError(step1_serializer.errors)
-
-        merchant = cls.save_step_data(
-            merchant_id=None,
-            step=1,
-            data=step1_serializer.validated_data,
-        )
-
-        step2_payload = {
-            'zip_code': data.get('zip_code'),
-            'province': data.get('province'),
-            'city': data.get('city'),
-            'barangay': data.get('barangay'),
-            'street_name': data.get('street_name'),
-            'house_number': data.get('house_number'),
-            'latitude': cls.normalize_coordinate(data.get('latitude')),
-            'longitude': cls.normalize_coordinate(data.get('longitude')),
-        }
-
-        step2_serializer = step2_serializer_class(data=step2_payload)
-        if not step2_serializer.is_valid():
-            raise ValidationError(step2_serializer.errors)
-
-        merchant = cls.save_step_data(
-            merchant_id=merchant.id,
-            step=2,
-            data=step2_serializer.validated_data,
-        )
-
-        return merchant.id
-
     @staticmethod
     def generate_password(length: int = 12) -> str:
         """
@@ -177,7 +130,11 @@ class MerchantRegistrationService:
             Generated password string
         """
         characters = string.ascii_letters + string.digits + string.punctuation
-        return ''.join(secrets.choice(characters) for _ in range(length))
+        while True:
+            password = ''.join(secrets.choice(characters) for _ in range(length))
+            # Always include at least one letter and one digit
+            if any(c.isalpha() for c in password) and any(c.isdigit() for c in password):
+                return password
 
     @staticmethod
     def validate_step_data(step: int, data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
@@ -201,10 +158,10 @@ class MerchantRegistrationService:
                     return False, f"Field '{field}' is required"
             
             # Check uniqueness
-            if Merchant.objects.filter(username=data['username']).exists():
+            if Merchant.objects.filter_by_username(data['username']).exists():
                 return False, "Username already exists"
             
-            if Merchant.objects.filter(email=data['email']).exists():
+            if Merchant.objects.filter_by_email(data['email']).exists():
                 return False, "Email already exists"
             
             if Merchant.objects.filter(phone_number=data['phone_number']).exists():
@@ -230,69 +187,30 @@ class MerchantRegistrationService:
         return False, "Invalid step number"
     
     @classmethod
-    @transaction.atomic
     def save_step_data(
         cls, 
-        merchant_id: Optional[int], 
+        draft_id: Optional[str], 
         step: int, 
         data: Dict[str, Any]
-    ) -> Merchant:
+    ) -> Dict[str, Any]:
         """
         Save data for a specific registration step
-        Uses temporary storage for multi-step process
+        Stored in the expiring draft store — no Merchant row is written
+        until register_merchant_atomic runs at final submit
         
         Args:
-            merchant_id: Existing merchant ID (None for new registration)
-            step: Step number (1, 2, or 3)
+            draft_id: Existing draft ID (None for new registration)
+            step: Step number (1 or 2)
             data: Data to save
             
         Returns:
-            Merchant instance
+            Draft dict (see RegistrationDraftService)
+
+        Raises:
+            LookupError: if the draft does not exist or has expired
+            ValueError: if a new draft is started from a step other than 1
         """
-        if merchant_id:
-            # Update existing merchant
-            merchant = Merchant.objects.get(id=merchant_id)
-        else:
-            # Create new merchant on step 1
-            if step != 1:
-                raise ValidationError("Cannot start from step other than 1")
-            
-            merchant = Merchant.objects.create(
-                username=data['username'],
-                email=data['email'],
-                is_active=False,  # Inactive until registration is complete
-                registration_step=0
-            )
-        
-        # Update temp data
-        temp_data = merchant.temp_registration_data or {}
-        temp_data[f'step_{step}'] = cls._normalize_for_json(data)
-        merchant.temp_registration_data = temp_data
-        merchant.registration_step = step
-        
-        # Save actual fields for completed steps
-        if step == 1:
-            merchant.business_name = data.get('business_name')
-            merchant.owner_name = data.get('owner_name')
-            merchant.username = data.get('username')
-            merchant.phone_number = data.get('phone_number')
-            merchant.email = data.get('email')
-            merchant.business_categories = data.get('business_categories', [])
-            merchant.business_types = data.get('business_types', [])
-            merchant.business_registration = data.get('business_registration')
-        
-        elif step == 2:
-            merchant.zip_code = data.get('zip_code')
-            merchant.province = data.get('province')
-            merchant.city = data.get('city')
-            merchant.barangay = data.get('barangay')
-            merchant.street_name = data.get('street_name')
-            merchant.house_number = data.get('house_number')
-            merchant.latitude = data.get('latitude')
-            merchant.longitude = data.get('longitude')
-        
-        merchant.save()
-        return merchant
+        return RegistrationDraftService.save_step(draft_id, step, cls._normalize_for_json(data))
 
     @staticmethod
     def _normalize_for_json(value: Any) -> Any:
@@ -305,70 +223,6 @@ class MerchantRegistrationService:
             return [MerchantRegistrationService._normalize_for_json(item) for item in value]
         return value
     
-    @classmethod
-    @transaction.atomic
-    def complete_registration(
-        cls, 
-        merchant_id: int, 
-        documents: Dict[str, Any]
-    ) -> tuple[Merchant, str]:
-        """
-        Complete the merchant registration process
-        Generate password and activate account
-        
-        Args:
-            merchant_id: Merchant ID
-            documents: Uploaded documents
-            
-        Returns:
-            Tuple of (merchant, generated_password)
-        """
-        merchant = Merchant.objects.get(id=merchant_id)
-        
-        # Validate documents based on registration type
-        if not cls._validate_documents(merchant.business_registration, documents):
-            raise ValidationError("Required documents are missing")
-        
-        # Save documents
-        merchant.selfie_with_id = documents.get('selfie_with_id')
-        merchant.valid_id = documents.get('valid_id')
-        
-        if merchant.business_registration in [
-            Merchant.REGISTERED_NON_VAT, 
-            Merchant.REGISTERED_VAT
-        ]:
-            merchant.barangay_permit = documents.get('barangay_permit')
-            merchant.dti_sec_certificate = documents.get('dti_sec_certificate')
-        
-        if merchant.business_registration == Merchant.REGISTERED_VAT:
-            merchant.bir_certificate = documents.get('bir_certificate')
-            merchant.mayors_permit = documents.get('mayors_permit')
-        
-        # Handle optional documents
-        other_docs: list[str] = []
-        for key, value in documents.items():
-            if key.startswith('other_document_'):
-                stored_path = cls._store_other_document(merchant_id, value)
-                other_docs.append(stored_path)
-        merchant.other_documents = other_docs
-        
-        # Generate password
-        password = cls.generate_password()
-        merchant.set_password(password)
-        
-        # Activate account
-        merchant.is_active = True
-        merchant.is_new = True
-        merchant.registration_step = 3
-        merchant.status = Merchant.PENDING
-        
-        # Clear temp data
-        merchant.temp_registration_data = {}
-        
-        merchant.save()
-        
-        return merchant, password
-
     @staticmethod
     def _store_other_document(merchant_id: int, uploaded_file: Any) -> str:
         """Store optional document and return persisted relative file path."""
@@ -413,34 +267,33 @@ class MerchantRegistrationService:
         return False
     
     @staticmethod
-    def get_registration_progress(merchant_id: int) -> Dict[str, Any]:
+    def get_registration_progress(draft_id: str) -> Optional[Dict[str, Any]]:
         """
-        Get the current registration progress for a merchant
+        Get the current registration progress for a draft
 
         Args:
-            merchant_id: Merchant ID
+            draft_id: Registration draft ID
 
         Returns:
-            Dictionary with progress information
+            Dictionary with progress information, or None if expired/unknown
         """
-        try:
-            merchant = Merchant.objects.get(id=merchant_id)
-            return {
-                'merchant_id': merchant.id,
-                'current_step': merchant.registration_step,
-                'is_complete': merchant.is_registration_complete,
-                'temp_data': merchant.temp_registration_data,
-                'business_registration': merchant.business_registration
-            }
-        except Merchant.DoesNotExist:
+        draft = RegistrationDraftService.get(draft_id)
+        if draft is None:
             return None
+        return {
+            'draft_id': draft['draft_id'],
+            'current_step': draft['current_step'],
+            'is_complete': False,  # Completed drafts are discarded
+            'temp_data': draft['temp_data'],
+            'business_registration': draft['business_registration'],
+        }
 
     # ------------------------------------------------------------------
     # Atomic single-step full registration (Step 3 confirm button)
     # ------------------------------------------------------------------
 
     @classmethod
-    @transaction.atomic
+    @span('registration.register')
     def register_merchant_atomic(
         cls,
         step1_data: Dict[str, Any],
@@ -454,6 +307,10 @@ class MerchantRegistrationService:
         (uniqueness, required documents, etc.).  If anything fails, the entire
         transaction is rolled back and no files are persisted.
 
+        The password is generated and hashed *before* the transaction opens:
+        hashing is deliberately slow CPU work and must not hold row locks or
+        a pooled connection in an open transaction.
+
         Args:
             step1_data: Validated data from Step1Serializer
             step2_data: Validated data from Step2Serializer
@@ -463,21 +320,56 @@ class MerchantRegistrationService:
             (merchant, plain_text_password) — merchant is fully activated
 
         Raises:
-            ValidationError: if uniqueness checks fail or required documents missing
+            ValidationError: if username/email/phone is taken or required documents missing
         """
-        # ── 1. Uniqueness checks (inside atomic block for integrity) ──
-        if Merchant.objects.filter(username__iexact=step1_data['username']).exists():
-            raise ValidationError({'username': ['Username already exists.']})
-        if Merchant.objects.filter(email__iexact=step1_data['email']).exists():
-            raise ValidationError({'email': ['Email already exists.']})
-        if Merchant.objects.filter(phone_number=step1_data['phone_number']).exists():
-            raise ValidationError({'phone_number': ['Phone number already exists.']})
-
-        # ── 2. Document validation ────────────────────────────────────
+        # ── 0. Generate and hash the password (outside the transaction) ──
+        password = cls.generate_password()
+        with span('registration.hash_password'):
+            encoded_password = make_password(password)
+
+        # Uniqueness is enforced by the database: a duplicate (including one
+        # from a concurrent submission) fails the INSERT, rolls the whole
+        # transaction back, and is reported as the same field-level error.
+        try:
+            with transaction.atomic():
+                merchant = cls._create_registered_merchant(
+                    step1_data, step2_data, documents, encoded_password
+                )
+        except IntegrityError as exc:
+            error = cls._unique_violation_error(exc)
+            if error is None:
+                raise
+            raise error from exc
+
+        return merchant, password
+
+    @classmethod
+    def _unique_violation_error(cls, exc: IntegrityError) -> Optional[ValidationError]:
+        """Map a unique-constraint IntegrityError to a field ValidationError, if possible."""
+        diag = getattr(exc.__cause__, 'diag', None)
+        constraint = getattr(diag, 'constraint_name', None) or ''
+        for field, message in cls.UNIQUE_FIELD_ERRORS.items():
+            if f'merchants_{field}_' in constraint:
+                return ValidationError({field: [message]})
+        return None
+
+    @classmethod
+    def _create_registered_merchant(
+        cls,
+        step1_data: Dict[str, Any],
+        step2_data: Dict[str, Any],
+        documents: Dict[str, Any],
+        encoded_password: str,
+    ) -> Merchant:
+        """
+        Body of register_merchant_atomic; must run inside transaction.atomic().
+        Raises IntegrityError from the INSERT on a username/email/phone clash.
+        """
+        # ── 1. Document validation (no DB access) ─────────────────────
         if not cls._validate_documents(step1_data['business_registration'], documents):
             raise ValidationError({'documents': ['Required documents are missing.']})
 
-        # ── 3. Create the merchant record (single DB write for basic info) ──
+        # ── 2. Insert the merchant — unique constraints check for duplicates ──
         merchant = Merchant(
             username=step1_data['username'],
             email=step1_data['email'],
@@ -495,13 +387,15 @@ class MerchantRegistrationService:
             house_number=step2_data['house_number'],
             latitude=cls.normalize_coordinate(step2_data.get('latitude')),
             longitude=cls.normalize_coordinate(step2_data.get('longitude')),
-            is_active=False,
-            registration_step=2,
-            temp_registration_data={},
+            password=encoded_password,
+            is_active=True,
+            is_new=True,
+            registration_step=3,
+            status=Merchant.PENDING,
         )
-        merchant.save()  # Assigns merchant.id, needed for file upload paths
+        merchant.save(force_insert=True)  # Assigns merchant.id, needed for file upload paths
 
-        # ── 4. Attach documents (file paths use merchant.id) ─────────
+        # ── 3. Attach documents (file paths use merchant.id) ─────────
         merchant.selfie_with_id = documents.get('selfie_with_id')
         merchant.valid_id = documents.get('valid_id')
 
@@ -522,14 +416,6 @@ class MerchantRegistrationService:
                 other_docs.append(stored_path)
         merchant.other_documents = other_docs
 
-        # ── 5. Generate password and activate account ─────────────────
-        password = cls.generate_password()
-        merchant.set_password(password)
-        merchant.is_active = True
-        merchant.is_new = True
-        merchant.registration_step = 3
-        merchant.status = Merchant.PENDING
-
-        merchant.save()  # Single save — commits everything including file fields
+        merchant.save(update_fields=cls.DOCUMENT_FIELDS)  # Persists the uploaded files
 
-        return merchant, password
+        return merchant
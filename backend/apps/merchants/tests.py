@@ -1,6 +1,32 @@
-from django.test import TestCase
-from apps.merchants.models import Merchant
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from unittest import skipIf
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from apps.merchants.models import Merchant, MerchantMetricDelta
+from apps.merchants.services.metrics_service import MerchantMetricsService
 from apps.merchants.services.registration_service import MerchantRegistrationService
+from apps.merchants.services.password_reset_service import PasswordResetService
+from apps.users.models import User
+from config import geohash
+from config.factories import auth_header, seed_merchant
+from config.query_budget import QueryBudgetMixin
 
 
 class MerchantModelTests(TestCase):
@@ -64,3 +90,670 @@ class RegistrationServiceTests(TestCase):
         
         self.assertTrue(is_valid)
         self.assertIsNone(error)
+
+
+class MerchantLookupIndexTests(TestCase):
+    """Case-insensitive login lookups must be served by the lower() indexes"""
+
+    def setUp(self):
+        Merchant.objects.create_merchant(
+            email='Owner@Shop.com',
+            username='ShopOwner',
+            password='testpass123',
+            phone_number='+63 912 123 1234',
+        )
+
+    def _plan(self, queryset):
+        # A handful of rows always favours a seq scan; disable it for this
+        # transaction so the planner reports whether an index is usable at all.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_email_lookup_is_case_insensitive(self):
+        """Test email lookup ignores case"""
+        self.assertTrue(Merchant.objects.filter_by_email('owner@SHOP.com').exists())
+
+    def test_username_lookup_is_case_insensitive(self):
+        """Test username lookup ignores case"""
+        self.assertTrue(Merchant.objects.filter_by_username('shopowner').exists())
+
+    def test_email_login_lookup_uses_index(self):
+        """Test login-by-email plan is an index scan on lower(email)"""
+        plan = self._plan(Merchant.objects.filter_by_email('owner@shop.com'))
+        self.assertIn('Index', plan)
+        self.assertIn('merchants_email_lower_uniq', plan)
+
+    def test_username_login_lookup_uses_index(self):
+        """Test login-by-username plan is an index scan on lower(username)"""
+        plan = self._plan(Merchant.objects.filter_by_username('SHOPOWNER'))
+        self.assertIn('Index', plan)
+        self.assertIn('merchants_username_lower_uniq', plan)
+
+    def test_case_variant_duplicates_rejected(self):
+        """Test the functional unique index rejects case-only duplicates"""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Merchant.objects.create_merchant(
+                email='owner@shop.com',
+                username='another',
+                password='testpass123',
+                phone_number='+63 912 123 9999',
+            )
+
+    def test_migration_reports_case_variant_duplicates(self):
+        """Test the constraint migration lists existing case-only duplicates before failing"""
+        migration = import_module('apps.merchants.migrations.0003_merchant_case_insensitive_indexes')
+        migration.check_case_duplicates(django_apps, None)
+
+        # Recreate a pre-migration table: rolled back with the test transaction.
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX merchants_email_lower_uniq')
+        first = Merchant.objects.get(username='ShopOwner')
+        second = Merchant.objects.create_merchant(
+            email='OWNER@shop.com',
+            username='another',
+            password='testpass123',
+            phone_number='+63 912 123 9999',
+        )
+
+        with self.assertRaisesMessage(RuntimeError, f"email 'owner@shop.com': merchant ids [{first.pk}, {second.pk}]"):
+            migration.check_case_duplicates(django_apps, None)
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        'config.hashers.TunablePBKDF2PasswordHasher',
+        'config.hashers.TunableScryptPasswordHasher',
+    ],
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+)
+class PasswordHasherPolicyTests(TestCase):
+    """Test cases for the tunable hasher policy and rehash on login"""
+
+    def setUp(self):
+        self.merchant = Merchant.objects.create_merchant(
+            email='hash@merchant.com',
+            username='hashmerchant',
+            password='testpass123',
+            phone_number='+63 912 123 1234',
+        )
+
+    def test_cost_comes_from_settings(self):
+        """Test PBKDF2 iterations are read from settings"""
+        self.assertTrue(self.merchant.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_login_upgrades_cost(self):
+        """Test login re-encodes a hash made with an outdated cost"""
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            MerchantRegistrationService.authenticate_merchant('hashmerchant', 'testpass123')
+        self.merchant.refresh_from_db()
+        self.assertTrue(self.merchant.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_login_upgrades_algorithm(self):
+        """Test login re-encodes a hash made with a non-preferred algorithm"""
+        with self.settings(PASSWORD_HASHERS=[
+            'config.hashers.TunableScryptPasswordHasher',
+            'config.hashers.TunablePBKDF2PasswordHasher',
+        ]):
+            MerchantRegistrationService.authenticate_merchant('hash@merchant.com', 'testpass123')
+        self.merchant.refresh_from_db()
+        self.assertTrue(self.merchant.password.startswith('scrypt$'))
+        self.assertTrue(self.merchant.check_password('testpass123'))
+
+
+@skipIf(
+    'LocMemCache' in settings.CACHES['default']['BACKEND'],
+    'OTP flow across processes needs a shared cache backend',
+)
+class MultiProcessOTPFlowTests(TransactionTestCase):
+    """Each OTP step runs in its own worker process against the shared cache"""
+
+    email = 'otp@merchant.com'
+
+    def setUp(self):
+        Merchant.objects.create_merchant(
+            email=self.email,
+            username='otpmerchant',
+            password='OldPassw0rd',
+            phone_number='+63 912 123 1234',
+        )
+
+    def _spawn(self, code):
+        # A fresh interpreter per step behaves like a separate gunicorn worker:
+        # nothing in-process (e.g. LocMemCache) is shared with the test runner.
+        env = {**os.environ, 'DB_NAME': connection.settings_dict['NAME']}
+        return subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'shell', '-c',
+             'from apps.merchants.services.password_reset_service import PasswordResetService as S\n' + code],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+    def _run(self, code):
+        out, err = self._spawn(code).communicate(timeout=60)
+        self.assertEqual(err.strip(), '', err)
+        return out.strip()
+
+    def test_otp_flow_across_workers(self):
+        """Test send, verify and reset each succeed in a different process"""
+        otp = self._run(f"print(S.generate_and_store_otp('{self.email}')[0])")
+        self.assertRegex(otp, r'^\d{6}$')
+
+        self.assertEqual(self._run(f"print(S.verify_otp('{self.email}', '{otp}'))"), 'True')
+        self.assertEqual(self._run(f"print(S.reset_password('{self.email}', 'NewPassw0rd'))"), 'True')
+
+        merchant = Merchant.objects.get(email=self.email)
+        self.assertTrue(merchant.check_password('NewPassw0rd'))
+
+    def test_concurrent_verification_is_single_use(self):
+        """Test only one of several concurrent workers can consume an OTP"""
+        otp = self._run(f"print(S.generate_and_store_otp('{self.email}')[0])")
+        workers = [
+            self._spawn(f"print(S.verify_otp('{self.email}', '{otp}'))") for _ in range(4)
+        ]
+        results = [worker.communicate(timeout=60)[0].strip() for worker in workers]
+        self.assertEqual(results.count('True'), 1, results)
+
+
+class RegistrationDraftTests(TestCase):
+    """Multi-step registration drafts live in the cache, not the merchants table"""
+
+    step1_data = {
+        'business_name': 'Draft Business',
+        'owner_name': 'Draft Owner',
+        'username': 'draftmerchant',
+        'phone_number': '+63 912 123 1234',
+        'email': 'draft@merchant.com',
+        'business_categories': ['Fresh Produce'],
+        'business_types': [],
+        'business_registration': Merchant.UNREGISTERED,
+    }
+    step2_data = {
+        'zip_code': '1000',
+        'province': 'Metro Manila',
+        'city': 'Manila',
+        'barangay': 'Ermita',
+        'street_name': 'Padre Faura',
+        'house_number': '12',
+        'latitude': '14.576400',
+        'longitude': '120.984200',
+    }
+
+    def test_steps_do_not_create_merchant_rows(self):
+        """Test steps 1 and 2 are stored as a draft without a Merchant row"""
+        step1 = self.client.post('/api/merchants/register/step1/', self.step1_data, content_type='application/json')
+        self.assertEqual(step1.status_code, 200)
+        draft_id = step1.json()['data']['draft_id']
+
+        step2 = self.client.post(
+            '/api/merchants/register/step2/',
+            {**self.step2_data, 'draft_id': draft_id},
+            content_type='application/json',
+        )
+        self.assertEqual(step2.status_code, 200)
+        self.assertEqual(step2.json()['data']['current_step'], 2)
+        self.assertFalse(Merchant.objects.exists())
+
+        progress = self.client.get(f'/api/merchants/register/progress/{draft_id}/').json()['data']
+        self.assertEqual(progress['current_step'], 2)
+        self.assertEqual(progress['business_registration'], Merchant.UNREGISTERED)
+        self.assertEqual(progress['temp_data']['step_2']['city'], 'Manila')
+
+    def test_unknown_draft_returns_404(self):
+        """Test expired or unknown drafts are reported as not found"""
+        response = self.client.get('/api/merchants/register/progress/doesnotexist/')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            '/api/merchants/register/step2/',
+            {**self.step2_data, 'draft_id': 'doesnotexist'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+def _registration_payload(**step1_overrides):
+    step1 = {**RegistrationDraftTests.step1_data, **step1_overrides}
+    documents = {
+        'selfie_with_id': SimpleUploadedFile('selfie.jpg', b'selfie'),
+        'valid_id': SimpleUploadedFile('id.jpg', b'id'),
+    }
+    return {'step1_data': step1, 'step2_data': RegistrationDraftTests.step2_data, 'documents': documents}
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RegisterMerchantUniquenessTests(TestCase):
+    """register_merchant_atomic relies on unique constraints, not pre-checks"""
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=self.media_root.name))
+        MerchantRegistrationService.register_merchant_atomic(**_registration_payload())
+
+    def test_registration_issues_no_lookup_queries(self):
+        """Test a registration is one INSERT plus the document UPDATE"""
+        payload = _registration_payload(
+            username='fresh', email='fresh@merchant.com', phone_number='+63 912 000 0000'
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            MerchantRegistrationService.register_merchant_atomic(**payload)
+        statements = [q['sql'].split(None, 1)[0].upper() for q in ctx.captured_queries]
+        self.assertNotIn('SELECT', statements)
+        self.assertEqual(statements.count('INSERT'), 1)
+
+    def test_duplicate_fields_map_to_field_errors(self):
+        """Test each unique violation is reported against its field"""
+        cases = {
+            'username': {'username': 'DRAFTMERCHANT', 'email': 'a@merchant.com', 'phone_number': '+63 912 000 0001'},
+            'email': {'username': 'b', 'email': 'Draft@Merchant.com', 'phone_number': '+63 912 000 0002'},
+            'phone_number': {'username': 'c', 'email': 'c@merchant.com'},
+        }
+        for field, overrides in cases.items():
+            with self.subTest(field=field), self.assertRaises(ValidationError) as ctx:
+                MerchantRegistrationService.register_merchant_atomic(**_registration_payload(**overrides))
+            self.assertEqual(list(ctx.exception.message_dict), [field])
+        self.assertEqual(Merchant.objects.count(), 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ConcurrentRegistrationTests(TransactionTestCase):
+    """Concurrent duplicate submissions yield one merchant and field errors"""
+
+    def test_concurrent_duplicates(self):
+        """Test racing registrations never surface an IntegrityError"""
+        results = []
+        barrier = threading.Barrier(4)
+
+        def submit():
+            try:
+                barrier.wait()
+                MerchantRegistrationService.register_merchant_atomic(**_registration_payload())
+                results.append('created')
+            except ValidationError as exc:
+                results.append(sorted(exc.message_dict))
+            finally:
+                connection.close()
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            threads = [threading.Thread(target=submit) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results.count('created'), 1, results)
+        self.assertEqual(len(results), 4, results)
+        self.assertEqual(Merchant.objects.count(), 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class MerchantEndpointQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Query budgets for the merchant auth, registration and OTP endpoints"""
+
+    def setUp(self):
+        self.merchant = Merchant.objects.create_merchant(
+            email='budget@merchant.com',
+            username='budgetmerchant',
+            password='Passw0rd123',
+            phone_number='+63 912 555 0000',
+        )
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root.name))
+
+    def _post(self, url, data, **extra):
+        return self.client.post(url, data, content_type='application/json', **extra)
+
+    def test_login(self):
+        """Test login is a single merchant lookup"""
+        with self.assertMaxQueries(1):
+            response = self._post('/api/merchants/login/', {'identifier': 'BUDGETMERCHANT', 'password': 'Passw0rd123'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_check_uniqueness(self):
+        """Test the uniqueness probe is a single query"""
+        with self.assertMaxQueries(1):
+            response = self._post('/api/merchants/register/check-uniqueness/', {'field': 'email', 'value': 'x@y.com'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_registration_steps(self):
+        """Test draft steps, progress and final submit stay within budget"""
+        with self.assertMaxQueries(8):
+            step1 = self._post('/api/merchants/register/step1/', RegistrationDraftTests.step1_data)
+        draft_id = step1.json()['data']['draft_id']
+
+        with self.assertMaxQueries(7):
+            self._post('/api/merchants/register/step2/', {**RegistrationDraftTests.step2_data, 'draft_id': draft_id})
+
+        with self.assertMaxQueries(1):
+            self.client.get(f'/api/merchants/register/progress/{draft_id}/')
+
+        payload = {
+            **RegistrationDraftTests.step1_data,
+            **RegistrationDraftTests.step2_data,
+            'business_categories': json.dumps(RegistrationDraftTests.step1_data['business_categories']),
+            'business_types': '[]',
+            'draft_id': draft_id,
+            'selfie_with_id': SimpleUploadedFile('selfie.jpg', b'selfie'),
+            'valid_id': SimpleUploadedFile('id.jpg', b'id'),
+            'other_documents': [SimpleUploadedFile(f'doc{idx}.pdf', b'doc') for idx in range(3)],
+        }
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'), \
+                self.assertMaxQueries(6):
+            response = self.client.post('/api/merchants/register/step3/', payload)
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_forgot_password_flow(self):
+        """Test OTP send, verify and reset stay within budget"""
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'), \
+                self.assertMaxQueries(7):
+            self._post('/api/merchants/forgot-password/send-otp/', {'email': 'budget@merchant.com'})
+        otp = PasswordResetService.generate_and_store_otp('budget@merchant.com')[0]
+
+        with self.assertMaxQueries(8):
+            response = self._post('/api/merchants/forgot-password/verify-otp/', {'email': 'budget@merchant.com', 'otp': otp})
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertMaxQueries(5):
+            response = self._post('/api/merchants/forgot-password/reset/', {
+                'email': 'budget@merchant.com',
+                'new_password': 'NewPassw0rd',
+                'confirm_password': 'NewPassw0rd',
+            })
+        self.assertEqual(response.status_code, 200)
+
+
+class MerchantDocumentTests(TestCase):
+    """Access-controlled document downloads and signed links"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root.name, PROTECTED_MEDIA_SERVER=''))
+
+        self.merchant = Merchant.objects.create_merchant(
+            email='docs@merchant.com',
+            username='docsmerchant',
+            password='Passw0rd123',
+            phone_number='+63 912 555 0400',
+        )
+        self.merchant.valid_id.save('id.png', ContentFile(b'png-bytes'), save=False)
+        self.merchant.other_documents = [default_storage.save(
+            f'merchant/{self.merchant.id}/documents/other-document-1.pdf', ContentFile(b'pdf-bytes'),
+        )]
+        self.merchant.save(update_fields=['valid_id', 'other_documents'])
+        self.url = f'/api/merchants/{self.merchant.id}/documents/valid_id/'
+
+    def test_owner_downloads_via_file_response(self):
+        """Test the owner gets the file streamed by Django without a proxy"""
+        response = self.client.get(self.url, **auth_header(self.merchant))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'png-bytes')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], 'private, no-store')
+
+        response = self.client.get(f'/api/merchants/{self.merchant.id}/documents/other-0/', **auth_header(self.merchant))
+        self.assertEqual(b''.join(response.streaming_content), b'pdf-bytes')
+
+    def test_other_merchants_and_anonymous_are_refused(self):
+        """Test only the owner or staff may download"""
+        other = Merchant.objects.create_merchant(
+            email='other@merchant.com', username='othermerchant',
+            password='Passw0rd123', phone_number='+63 912 555 0401',
+        )
+        self.assertEqual(self.client.get(self.url, **auth_header(other)).status_code, 403)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_staff_session_can_download(self):
+        """Test admin-site staff can review any merchant's documents"""
+        staff = User.objects.create_user(
+            username='staff@rapex.com', email='staff@rapex.com', password='Passw0rd123', is_staff=True,
+        )
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_missing_documents_are_404(self):
+        """Test unknown, unset and out-of-range documents"""
+        auth = auth_header(self.merchant)
+        for document in ('password', 'mayors_permit', 'other-5', 'other-x'):
+            with self.subTest(document):
+                response = self.client.get(f'/api/merchants/{self.merchant.id}/documents/{document}/', **auth)
+                self.assertEqual(response.status_code, 404)
+
+    def test_transfer_is_offloaded_to_front_server(self):
+        """Test X-Accel-Redirect (nginx) and X-Sendfile (apache) hand-off"""
+        auth = auth_header(self.merchant)
+        with self.settings(PROTECTED_MEDIA_SERVER='nginx'):
+            response = self.client.get(self.url, **auth)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.merchant.valid_id.name}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+        with self.settings(PROTECTED_MEDIA_SERVER='apache'):
+            response = self.client.get(self.url, **auth)
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.merchant.valid_id.name))
+        self.assertEqual(response.content, b'')
+
+    def test_signed_link(self):
+        """Test a signed link works without credentials and dies when tampered or replaced"""
+        response = self.client.post(f'{self.url}link/', **auth_header(self.merchant))
+        self.assertEqual(response.status_code, 200)
+        url = response.json()['url']
+
+        download = self.client.get(url)
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(b''.join(download.streaming_content), b'png-bytes')
+
+        self.assertEqual(self.client.get(url[:-2] + 'x/').status_code, 404)
+
+        self.merchant.valid_id.save('id-new.png', ContentFile(b'new'), save=True)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_signed_link_expires(self):
+        """Test links stop working after MERCHANT_DOCUMENT_URL_MAX_AGE"""
+        url = self.client.post(f'{self.url}link/', **auth_header(self.merchant)).json()['url']
+        with self.settings(MERCHANT_DOCUMENT_URL_MAX_AGE=-1):
+            self.assertEqual(self.client.get(url).status_code, 410)
+
+    def test_link_requires_access(self):
+        """Test links are only issued to the owner or staff"""
+        self.assertEqual(self.client.post(f'{self.url}link/').status_code, 403)
+
+
+class NearbyMerchantTests(QueryBudgetMixin, TestCase):
+    """Geohash maintenance and the nearby-merchant search"""
+
+    CENTRE = (14.5547, 121.0244)
+
+    def _merchant(self, n, latitude, longitude, status=Merchant.APPROVED, categories=('Beverages',)):
+        return Merchant.objects.create_merchant(
+            email=f'near{n}@merchant.com',
+            username=f'nearmerchant{n}',
+            password='Passw0rd123',
+            phone_number=f'+63 912 555 07{n:02d}',
+            business_name=f'Near {n}',
+            business_categories=list(categories),
+            latitude=latitude,
+            longitude=longitude,
+            status=status,
+        )
+
+    def setUp(self):
+        self.closest = self._merchant(1, Decimal('14.555000'), Decimal('121.025000'))
+        self.bakery = self._merchant(2, Decimal('14.560000'), Decimal('121.030000'), categories=['Bakery'])
+        self.edge = self._merchant(3, Decimal('14.554700'), Decimal('121.070000'))
+        self._merchant(4, Decimal('14.676000'), Decimal('121.043700'))  # ~13.6 km away
+        self._merchant(5, Decimal('14.554800'), Decimal('121.024500'), status=Merchant.PENDING)
+        self._merchant(6, None, None)
+
+    def _search(self, **params):
+        latitude, longitude = self.CENTRE
+        return self.client.get('/api/merchants/nearby/', {'lat': latitude, 'lng': longitude, **params})
+
+    def test_geohash_follows_coordinates(self):
+        """Test save() keeps the geohash in step with latitude/longitude"""
+        self.assertEqual(self.closest.geohash, geohash.encode(14.555, 121.025, Merchant.GEOHASH_PRECISION))
+
+        self.closest.latitude = Decimal('10.310000')
+        self.closest.save(update_fields=['latitude'])
+        self.closest.refresh_from_db()
+        self.assertEqual(self.closest.geohash, geohash.encode(10.31, 121.025, Merchant.GEOHASH_PRECISION))
+
+        self.closest.latitude = None
+        self.closest.save()
+        self.closest.refresh_from_db()
+        self.assertEqual(self.closest.geohash, '')
+
+    def test_nearest_first_within_radius(self):
+        """Test only approved merchants within the radius are returned, nearest first"""
+        with self.assertMaxQueries(1):
+            response = self._search(radius_km=5)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([row['id'] for row in data], [self.closest.id, self.bakery.id, self.edge.id])
+        distances = [row['distance_km'] for row in data]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(
+            distances[2], geohash.haversine_km(*self.CENTRE, 14.5547, 121.07), places=2,
+        )
+
+        response = self._search(radius_km=1)
+        self.assertEqual([row['id'] for row in response.json()['data']], [self.closest.id, self.bakery.id])
+
+    def test_category_filter_and_limit(self):
+        """Test categories match any listed category and limit caps the result"""
+        response = self._search(radius_km=5, categories='Beverages, Coffee')
+        self.assertEqual([row['id'] for row in response.json()['data']], [self.closest.id, self.edge.id])
+
+        response = self._search(radius_km=5, limit=1)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_invalid_parameters(self):
+        """Test missing coordinates and oversized radii are rejected"""
+        self.assertEqual(self.client.get('/api/merchants/nearby/', {'lat': 14.5}).status_code, 400)
+        self.assertEqual(self._search(radius_km=settings.MERCHANT_NEARBY_MAX_RADIUS_KM + 1).status_code, 400)
+        self.assertEqual(self._search(lat=91).status_code, 400)
+
+
+def _metrics(merchant: Merchant) -> tuple:
+    merchant.refresh_from_db(fields=['total_orders', 'total_sales', 'rating', 'rating_count'])
+    return merchant.total_orders, merchant.total_sales, merchant.rating, merchant.rating_count
+
+
+class MerchantMetricsTests(QueryBudgetMixin, TestCase):
+    """Incremental merchant metrics: delta ledger, drain and reconciliation"""
+
+    def setUp(self):
+        self.first, self.second = seed_merchant('1'), seed_merchant('2')
+
+    def test_drain_applies_deltas_in_batches(self):
+        """Test deltas count only once drained, many per merchant per UPDATE"""
+        for amount in ('100.00', '250.50', '49.50'):
+            MerchantMetricsService.record_order(self.first.pk, Decimal(amount))
+        for stars in (5, 4, 4):
+            MerchantMetricsService.record_rating(self.first.pk, stars)
+        MerchantMetricsService.record_order(self.second.pk, Decimal('10.00'))
+        self.assertEqual(_metrics(self.first), (0, Decimal('0.00'), Decimal('0.00'), 0))
+
+        with self.assertMaxQueries(3):  # savepoint, one statement, release
+            self.assertEqual(MerchantMetricsService.drain(batch_size=5), 5)
+        self.assertEqual(MerchantMetricsService.pending(), 2)
+        self.assertEqual(MerchantMetricsService.drain(), 2)
+        self.assertEqual(MerchantMetricsService.drain(), 0)
+
+        self.assertEqual(_metrics(self.first), (3, Decimal('400.00'), Decimal('4.33'), 3))
+        self.assertEqual(_metrics(self.second), (1, Decimal('10.00'), Decimal('0.00'), 0))
+
+        MerchantMetricsService.record([MerchantMetricDelta(merchant=self.first, orders=-1, sales=Decimal('-49.50'))])
+        MerchantMetricsService.drain()
+        self.assertEqual(_metrics(self.first)[:2], (2, Decimal('350.50')))
+
+    def test_rating_must_be_in_range(self):
+        """Test ratings outside 1-5 stars are rejected"""
+        with self.assertRaises(ValueError):
+            MerchantMetricsService.record_rating(self.first.pk, 6)
+
+    def test_reconcile_corrects_drift(self):
+        """Test drift is reported, fixed, and pending deltas are left to the worker"""
+        MerchantMetricsService.record_order(self.first.pk, Decimal('20.00'))
+        MerchantMetricsService.record_rating(self.first.pk, 3)
+        MerchantMetricsService.drain()
+        MerchantMetricsService.record_order(self.first.pk, Decimal('5.00'))  # still pending
+        Merchant.objects.filter(pk=self.first.pk).update(total_orders=99, rating=Decimal('1.00'))
+
+        self.assertEqual(MerchantMetricsService.reconcile_all(dry_run=True), [self.first.pk])
+        self.assertEqual(_metrics(self.first)[0], 99)
+        self.assertEqual(MerchantMetricsService.reconcile_all(), [self.first.pk])
+        self.assertEqual(_metrics(self.first), (1, Decimal('20.00'), Decimal('3.00'), 1))
+        self.assertEqual(MerchantMetricsService.reconcile_all(), [])
+
+        MerchantMetricsService.drain()
+        self.assertEqual(_metrics(self.first)[:2], (2, Decimal('25.00')))
+
+    def test_commands(self):
+        """Test the worker drains the backlog and the rebuild reports drift"""
+        MerchantMetricsService.record_order(self.second.pk, Decimal('7.00'))
+        call_command('drain_merchant_metrics', once=True, batch_size=1, stdout=StringIO())
+        self.assertEqual(MerchantMetricsService.pending(), 0)
+        Merchant.objects.update(total_sales=Decimal('1.00'))
+
+        out = StringIO()
+        call_command('reconcile_merchant_metrics', rebuild=True, chunk_size=1, workers=1, stdout=out)
+        self.assertIn('corrected drift on 2 merchant(s)', out.getvalue())
+        self.assertEqual(_metrics(self.second)[:2], (1, Decimal('7.00')))
+        self.assertEqual(_metrics(self.first)[:2], (0, Decimal('0.00')))
+
+    def test_existing_metrics_survive_reconcile(self):
+        """Test the migration's opening balances keep pre-ledger metrics through reconcile"""
+        migration = import_module('apps.merchants.migrations.0006_merchant_metric_delta')
+        Merchant.objects.filter(pk=self.first.pk).update(
+            total_orders=12, total_sales=Decimal('1234.50'), rating=Decimal('4.37'),
+        )
+        migration.opening_balances(django_apps, None)
+
+        self.assertEqual(MerchantMetricsService.pending(), 0)
+        self.assertEqual(MerchantMetricsService.reconcile_all(dry_run=True), [])
+        self.assertEqual(MerchantMetricsService.reconcile_all(rebuild=True), [])
+        self.assertEqual(_metrics(self.first)[:3], (12, Decimal('1234.50'), Decimal('4.37')))
+        self.assertEqual(_metrics(self.second), (0, Decimal('0.00'), Decimal('0.00'), 0))
+
+        MerchantMetricsService.record_order(self.first.pk, Decimal('5.50'))
+        MerchantMetricsService.drain()
+        self.assertEqual(_metrics(self.first)[:2], (13, Decimal('1240.00')))
+
+
+class ConcurrentMerchantMetricsTests(TransactionTestCase):
+    """Parallel drain workers and a parallel rebuild agree with the ledger"""
+
+    def test_parallel_drain_and_rebuild(self):
+        """Test concurrent drains apply every delta exactly once"""
+        merchants = [seed_merchant(str(n)) for n in range(4)]
+        MerchantMetricsService.record(
+            MerchantMetricDelta(merchant=merchants[n % 4], orders=1, sales=Decimal('1.25'), rating_count=1,
+                                rating_total=n % 5 + 1)
+            for n in range(400)
+        )
+
+        def work():
+            try:
+                while MerchantMetricsService.drain(batch_size=25):
+                    pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(MerchantMetricsService.pending(), 0)
+        self.assertEqual([_metrics(merchant)[:2] for merchant in merchants], [(100, Decimal('125.00'))] * 4)
+        self.assertEqual(MerchantMetricsService.reconcile_all(dry_run=True), [])
+
+        Merchant.objects.update(total_orders=0)
+        call_command('reconcile_merchant_metrics', rebuild=True, chunk_size=1, workers=2, stdout=StringIO())
+        self.assertEqual([_metrics(merchant)[0] for merchant in merchants], [100] * 4)
@@ -9,6 +9,10 @@ from apps.merchants.views import (
     ForgotPasswordSendOTPView,
     ForgotPasswordVerifyOTPView,
     ForgotPasswordResetView,
+    MerchantDocumentView,
+    MerchantDocumentLinkView,
+    SignedMerchantDocumentView,
+    NearbyMerchantsView,
 )
 
 app_name = 'merchants'
@@ -23,11 +27,19 @@ urlpatterns = [
     path('register/step3/', RegistrationStep3View.as_view(), name='register-step3'),
 
     # Progress and validation
-    path('register/progress/<int:merchant_id>/', RegistrationProgressView.as_view(), name='registration-progress'),
+    path('register/progress/<str:draft_id>/', RegistrationProgressView.as_view(), name='registration-progress'),
     path('register/check-uniqueness/', CheckUniquenessView.as_view(), name='check-uniqueness'),
 
     # Forgot password flow
     path('forgot-password/send-otp/', ForgotPasswordSendOTPView.as_view(), name='forgot-password-send-otp'),
     path('forgot-password/verify-otp/', ForgotPasswordVerifyOTPView.as_view(), name='forgot-password-verify-otp'),
     path('forgot-password/reset/', ForgotPasswordResetView.as_view(), name='forgot-password-reset'),
+
+    # Verification documents (owner or staff; signed links for header-less downloads)
+    path('<int:merchant_id>/documents/<str:document>/', MerchantDocumentView.as_view(), name='merchant-document'),
+    path('<int:merchant_id>/documents/<str:document>/link/', MerchantDocumentLinkView.as_view(), name='merchant-document-link'),
+    path('documents/signed/<str:token>/', SignedMerchantDocumentView.as_view(), name='merchant-document-signed'),
+
+    # Public discovery
+    path('nearby/', NearbyMerchantsView.as_view(), name='merchant-nearby'),
 ]
@@ -1,22 +1,36 @@
 import json
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
+from django.core import signing
 from django.core.exceptions import ValidationError
+from django.urls import reverse
 from apps.merchants.models import Merchant
 from apps.merchants.serializers.merchant_serializers import (
     Step1Serializer,
     Step2Serializer,
     Step3Serializer,
     MerchantSerializer,
-    RegistrationProgressSerializer
+    RegistrationProgressSerializer,
+    NearbyMerchantQuerySerializer,
+    NearbyMerchantSerializer,
 )
 from apps.merchants.services.registration_service import MerchantRegistrationService
+from apps.merchants.services.registration_draft_service import RegistrationDraftService
 from apps.merchants.services.email_service import EmailService
 from apps.merchants.services.password_reset_service import PasswordResetService
+from apps.merchants.services.document_service import MerchantDocumentService
+from apps.merchants.selectors.merchant_selectors import MerchantSelector
+from apps.products.authentication import MerchantJWTAuthentication
+from config.async_views import AsyncAPIView
+from config.compression import compression_exempt
+from config.protected_media import serve_protected_file
 
 
 class RegistrationStep1View(APIView):
@@ -39,13 +53,24 @@ class RegistrationStep1View(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Early feedback on taken username/email/phone (re-checked at final submit)
+        is_valid, error = MerchantRegistrationService.validate_step_data(1, serializer.validated_data)
+        if not is_valid:
+            return Response(
+                {
+                    'success': False,
+                    'message': error
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         try:
-            # Get merchant_id if continuing registration
-            merchant_id = request.data.get('merchant_id')
+            # Get draft_id if continuing registration
+            draft_id = request.data.get('draft_id')
             
-            # Save step data
-            merchant = MerchantRegistrationService.save_step_data(
-                merchant_id=merchant_id,
+            # Save step data to the expiring draft store
+            draft = MerchantRegistrationService.save_step_data(
+                draft_id=draft_id,
                 step=1,
                 data=serializer.validated_data
             )
@@ -54,12 +79,18 @@ class RegistrationStep1View(APIView):
                 'success': True,
                 'message': 'Step 1 completed successfully',
                 'data': {
-                    'merchant_id': merchant.id,
-                    'current_step': merchant.registration_step,
-                    'business_registration': merchant.business_registration
+                    'draft_id': draft['draft_id'],
+                    'current_step': draft['current_step'],
+                    'business_registration': draft['business_registration']
                 }
             }, status=status.HTTP_200_OK)
         
+        except LookupError:
+            return Response({
+                'success': False,
+                'message': 'Registration draft not found or expired'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
         except Exception as e:
             return Response({
                 'success': False,
@@ -85,12 +116,12 @@ class RegistrationStep2View(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            merchant_id = request.data.get('merchant_id')
+            draft_id = request.data.get('draft_id')
             
-            if not merchant_id:
+            if not draft_id:
                 return Response({
                     'success': False,
-                    'message': 'Merchant ID is required'
+                    'message': 'Draft ID is required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Save step data — coordinate normalization handled by the service
@@ -104,8 +135,8 @@ class RegistrationStep2View(APIView):
                 ),
             }
 
-            merchant = MerchantRegistrationService.save_step_data(
-                merchant_id=merchant_id,
+            draft = MerchantRegistrationService.save_step_data(
+                draft_id=draft_id,
                 step=2,
                 data=step2_data
             )
@@ -114,16 +145,16 @@ class RegistrationStep2View(APIView):
                 'success': True,
                 'message': 'Step 2 completed successfully',
                 'data': {
-                    'merchant_id': merchant.id,
-                    'current_step': merchant.registration_step,
-                    'full_address': merchant.full_address
+                    'draft_id': draft['draft_id'],
+                    'current_step': draft['current_step'],
+                    'full_address': Merchant(**serializer.validated_data).full_address
                 }
             }, status=status.HTTP_200_OK)
         
-        except Merchant.DoesNotExist:
+        except LookupError:
             return Response({
                 'success': False,
-                'message': 'Merchant not found'
+                'message': 'Registration draft not found or expired'
             }, status=status.HTTP_404_NOT_FOUND)
         
         except Exception as e:
@@ -209,6 +240,9 @@ class RegistrationStep3View(APIView):
         except Exception as e:
             return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        # ── Drop the multi-step draft, if the client kept one ──
+        RegistrationDraftService.discard(request.data.get('draft_id'))
+
         # ── Send welcome email (after successful DB commit) ──
         email_sent = EmailService.send_welcome_email(
             email=merchant.email,
@@ -237,6 +271,7 @@ class MerchantLoginView(APIView):
     """
     permission_classes = [AllowAny]
 
+    @compression_exempt  # carries JWTs: BREACH
     def post(self, request):
         identifier = request.data.get('identifier', '').strip()
         password = request.data.get('password', '')
@@ -274,19 +309,19 @@ class MerchantLoginView(APIView):
 class RegistrationProgressView(APIView):
     """
     API endpoint to get registration progress
-    Allows continuing incomplete registrations
+    Allows continuing incomplete registrations (served from the draft store)
     """
     permission_classes = [AllowAny]  # Allow public access
     
-    def get(self, request, merchant_id):
-        """Get registration progress for a merchant"""
+    def get(self, request, draft_id):
+        """Get registration progress for a draft"""
         try:
-            progress = MerchantRegistrationService.get_registration_progress(merchant_id)
+            progress = MerchantRegistrationService.get_registration_progress(draft_id)
             
             if not progress:
                 return Response({
                     'success': False,
-                    'message': 'Merchant not found'
+                    'message': 'Registration draft not found or expired'
                 }, status=status.HTTP_404_NOT_FOUND)
             
             serializer = RegistrationProgressSerializer(progress)
@@ -303,14 +338,14 @@ class RegistrationProgressView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class CheckUniquenessView(APIView):
+class CheckUniquenessView(AsyncAPIView):
     """
     API endpoint to check uniqueness of username, email, phone
     Used for real-time validation in the form
     """
     permission_classes = [AllowAny]  # Allow public access
     
-    def post(self, request):
+    async def post(self, request):
         """Check if username, email, or phone is unique"""
         field = request.data.get('field')
         value = request.data.get('value')
@@ -322,7 +357,7 @@ class CheckUniquenessView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            exists = MerchantRegistrationService.check_field_uniqueness(field, value)
+            exists = await MerchantRegistrationService.acheck_field_uniqueness(field, value)
             return Response({
                 'success': True,
                 'exists': exists,
@@ -346,7 +381,7 @@ class CheckUniquenessView(APIView):
 # Forgot Password Views
 # ---------------------------------------------------------------------------
 
-class ForgotPasswordSendOTPView(APIView):
+class ForgotPasswordSendOTPView(AsyncAPIView):
     """
     Step 1 - Send a 6-digit OTP to the merchant's registered email.
     POST /merchants/forgot-password/send-otp/
@@ -354,7 +389,7 @@ class ForgotPasswordSendOTPView(APIView):
     """
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get('email', '').strip()
         if not email:
             return Response(
@@ -362,7 +397,7 @@ class ForgotPasswordSendOTPView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        otp, merchant = PasswordResetService.generate_and_store_otp(email)
+        otp, merchant = await PasswordResetService.agenerate_and_store_otp(email)
 
         if otp is None:
             return Response(
@@ -373,7 +408,8 @@ class ForgotPasswordSendOTPView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        email_sent = EmailService.send_otp_email(
+        # SMTP is blocking network I/O: run it on the thread pool, off the event loop.
+        email_sent = await sync_to_async(EmailService.send_otp_email, thread_sensitive=False)(
             email=merchant.email,
             business_name=merchant.business_name,
             otp=otp
@@ -391,7 +427,7 @@ class ForgotPasswordSendOTPView(APIView):
         )
 
 
-class ForgotPasswordVerifyOTPView(APIView):
+class ForgotPasswordVerifyOTPView(AsyncAPIView):
     """
     Step 2 - Verify the 6-digit OTP.
     POST /merchants/forgot-password/verify-otp/
@@ -399,7 +435,7 @@ class ForgotPasswordVerifyOTPView(APIView):
     """
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get('email', '').strip()
         otp = request.data.get('otp', '').strip()
 
@@ -409,7 +445,7 @@ class ForgotPasswordVerifyOTPView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        verified = PasswordResetService.verify_otp(email, otp)
+        verified = await PasswordResetService.averify_otp(email, otp)
 
         if not verified:
             return Response(
@@ -464,3 +500,109 @@ class ForgotPasswordResetView(APIView):
             {'success': True, 'message': 'Password has been reset successfully.'},
             status=status.HTTP_200_OK
         )
+
+
+# ── Merchant documents ────────────────────────────────────────────────────────
+
+
+class MerchantDocumentView(APIView):
+    """
+    Download a merchant verification document.
+    GET /merchants/<merchant_id>/documents/<document>/
+
+    Allowed for the merchant itself (merchant JWT) and for staff/admin users
+    signed in to the admin (session).  The file transfer itself is handed to
+    the front web server (see config/protected_media.py).
+    """
+    authentication_classes = [MerchantJWTAuthentication, SessionAuthentication]
+    permission_classes = [AllowAny]  # checked per merchant below
+
+    def get(self, request, merchant_id, document):
+        if not MerchantDocumentService.can_access(request.user, merchant_id):
+            return Response(
+                {'success': False, 'message': 'You do not have access to this document.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            path = MerchantDocumentService.get_document_path(merchant_id, document)
+        except LookupError:
+            return Response({'success': False, 'message': 'Document not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_protected_file(path)
+
+
+class MerchantDocumentLinkView(APIView):
+    """
+    Issue a short-lived signed download link for a document, usable without
+    an Authorization header (e.g. as an <img src> or a browser download).
+    POST /merchants/<merchant_id>/documents/<document>/link/
+    """
+    authentication_classes = [MerchantJWTAuthentication, SessionAuthentication]
+    permission_classes = [AllowAny]  # checked per merchant below
+
+    def post(self, request, merchant_id, document):
+        if not MerchantDocumentService.can_access(request.user, merchant_id):
+            return Response(
+                {'success': False, 'message': 'You do not have access to this document.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            path = MerchantDocumentService.get_document_path(merchant_id, document)
+        except LookupError:
+            return Response({'success': False, 'message': 'Document not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        token = MerchantDocumentService.sign(merchant_id, document, path)
+        url = reverse('merchants:merchant-document-signed', kwargs={'token': token})
+        return Response({
+            'success': True,
+            'url': request.build_absolute_uri(url),
+            'expires_in': settings.MERCHANT_DOCUMENT_URL_MAX_AGE,
+        }, status=status.HTTP_200_OK)
+
+
+class SignedMerchantDocumentView(APIView):
+    """
+    Download a document through a signed link.
+    GET /merchants/documents/signed/<token>/
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, token):
+        try:
+            path = MerchantDocumentService.resolve_signed(token)
+        except signing.SignatureExpired:
+            return Response({'success': False, 'message': 'Link has expired.'}, status=status.HTTP_410_GONE)
+        except (signing.BadSignature, LookupError):
+            return Response({'success': False, 'message': 'Document not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_protected_file(path)
+
+
+# ── Nearby merchants ──────────────────────────────────────────────────────────
+
+
+class NearbyMerchantsView(APIView):
+    """
+    Approved merchants near a point, nearest first.
+    GET /merchants/nearby/?lat=14.5764&lng=121.0851&radius_km=5&categories=Beverages,Bakery&limit=20
+
+    Candidates come from a geohash prefix index (no PostGIS); exact
+    distances are computed for those rows only.  Public endpoint.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = NearbyMerchantQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response({'success': False, 'errors': query.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        merchants = list(MerchantSelector.nearby(
+            params['lat'], params['lng'], params['radius_km'],
+            categories=params['categories'], limit=params['limit'],
+        ))
+        return Response({
+            'success': True,
+            'count': len(merchants),
+            'data': NearbyMerchantSerializer(merchants, many=True).data,
+        }, status=status.HTTP_200_OK)
@@ -1,5 +1,11 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from apps.audit.models import AuditEvent
+from apps.audit.services.audit_service import PRODUCT_FIELDS, AuditService
 from apps.products.models import Category, MerchandiseProduct, ProductImage
+from apps.products.services.catalog_service import CatalogService
+from apps.products.services.event_service import CREATED, DELETED, UPDATED, ProductEventService, new_values
 
 
 @admin.register(Category)
@@ -9,6 +15,10 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        CatalogService.refresh_category(obj.pk)
+
 
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
@@ -23,3 +33,42 @@ class MerchandiseProductAdmin(admin.ModelAdmin):
     search_fields = ('name', 'sku', 'merchant__business_name')
     inlines = [ProductImageInline]
     readonly_fields = ('created_at', 'updated_at')
+
+    def save_related(self, request, form, formsets, change):
+        # After the inlines, so the primary image is current.
+        super().save_related(request, form, formsets, change)
+        product = form.instance
+        CatalogService.refresh_products([product.pk])
+        before = {field: form.initial.get(field) for field in PRODUCT_FIELDS} if change else dict.fromkeys(PRODUCT_FIELDS)
+        changes = AuditService.diff(before, product, PRODUCT_FIELDS)
+        AuditService.record(
+            AuditEvent.PRODUCT, product.pk, product.merchant_id, 'update' if change else 'create',
+            changes, actor=request.user, source='admin',
+        )
+        ProductEventService.publish(product.merchant_id, UPDATED if change else CREATED, [product.pk],
+                                    new_values(changes))
+
+    def delete_model(self, request, obj):
+        product_id, merchant_id = obj.pk, obj.merchant_id
+        super().delete_model(request, obj)
+        ProductEventService.publish(merchant_id, DELETED, [product_id])
+        CatalogService.refresh_products([product_id])
+        AuditService.record(
+            AuditEvent.PRODUCT, product_id, merchant_id, 'delete', {'deleted': [False, True]},
+            actor=request.user, source='admin',
+        )
+
+    def delete_queryset(self, request, queryset):
+        rows = list(queryset.values_list('pk', 'merchant_id'))
+        super().delete_queryset(request, queryset)
+        by_merchant = defaultdict(list)
+        for product_id, merchant_id in rows:
+            by_merchant[merchant_id].append(product_id)
+        for merchant_id, product_ids in by_merchant.items():
+            ProductEventService.publish(merchant_id, DELETED, product_ids)
+        CatalogService.refresh_products([product_id for product_id, _ in rows])
+        AuditService.record_many(
+            [(AuditEvent.PRODUCT, product_id, merchant_id, 'delete', {'deleted': [False, True]})
+             for product_id, merchant_id in rows],
+            actor=request.user, source='admin',
+        )
@@ -14,6 +14,7 @@ from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFail
 from rest_framework import authentication, exceptions
 from rest_framework_simplejwt.tokens import AccessToken
 from apps.merchants.models import Merchant
+from config.instrumentation import span
 
 
 class MerchantJWTAuthentication(authentication.BaseAuthentication):
@@ -25,6 +26,10 @@ class MerchantJWTAuthentication(authentication.BaseAuthentication):
     keyword = 'Bearer'
 
     def authenticate(self, request):
+        with span('auth'):
+            return self._authenticate(request)
+
+    def _authenticate(self, request):
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
         if not auth_header.startswith(f'{self.keyword} '):
             return None
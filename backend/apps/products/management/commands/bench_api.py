@@ -0,0 +1,89 @@
+"""
+End-to-end API benchmark against an isolated, seeded database.
+
+    python manage.py bench_api --scale 1000
+    python manage.py bench_api --scale 100000 --keepdb --output bench-100k.json
+    python manage.py bench_api --scale 1000000 --keepdb --baseline bench-1m.json
+
+Creates (or with --keepdb reuses) a ``bench_<DB_NAME>`` database, seeds the
+benchmark merchant's catalog up to --scale products, then drives each
+scenario in config.benchmarks through the Django test client and reports
+p50/p95/p99 latency and queries per request.
+
+--output writes the results as JSON; pass a previous output as --baseline to
+fail when p95 regresses beyond --threshold or queries/request increase.
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from config import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API endpoints (latency percentiles, queries/request) at a given catalog scale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1000,
+            help='Products in the benchmark catalog (e.g. 1000, 100000, 1000000).',
+        )
+        parser.add_argument('--rounds', type=int, default=50, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario.')
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            help='Run only scenarios whose name starts with one of these prefixes.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the seeded benchmark database for the next run.',
+        )
+        parser.add_argument('--output', type=Path, help='Write results as JSON to this path.')
+        parser.add_argument('--baseline', type=Path, help='Compare against a previous --output file.')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=1.2,
+            help='Allowed p95 slowdown factor against the baseline.',
+        )
+
+    def handle(self, *args, **options):
+        if options['baseline'] and not options['baseline'].exists():
+            raise CommandError(f"Baseline {options['baseline']} does not exist.")
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = f'bench_{old_name}'
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            self.stdout.write(f"Seeding catalog to {options['scale']} products...")
+            merchant = benchmarks.seed_catalog(options['scale'], stdout=self.stdout)
+
+            self.stdout.write(benchmarks.format_header())
+            results = benchmarks.run_benchmarks(
+                merchant,
+                rounds=options['rounds'],
+                warmup=options['warmup'],
+                only=options['only'],
+                stdout=self.stdout,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['output']:
+            benchmarks.save_results(options['output'], options['scale'], results)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            regressions = benchmarks.compare_to_baseline(options['baseline'], results, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions against baseline:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
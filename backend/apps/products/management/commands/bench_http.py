@@ -0,0 +1,87 @@
+"""
+Closed-loop HTTP load generator for comparing serving setups.
+
+    python manage.py bench_http http://localhost:8000/api/products/categories/
+    python manage.py bench_http http://localhost:8000/health/ready/ --concurrency 32 --seconds 20
+    python manage.py bench_http http://localhost:8000/api/merchants/register/check-uniqueness/ \
+        --data '{"field": "email", "value": "new@shop.com"}'
+
+Each of --concurrency threads keeps one keep-alive connection and issues
+requests back to back for --seconds; reports throughput, latency percentiles
+and errors.  Run it from another host or container than the server under test
+when comparing production numbers; on the same machine it competes for CPU.
+"""
+
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.benchmarks import summarize
+
+
+class Command(BaseCommand):
+    help = 'Measure requests/s and latency percentiles of a running server.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--header', action='append', default=[], help="Extra header, e.g. 'Authorization: Bearer ...'")
+        parser.add_argument('--data', help='JSON body; sends POST instead of GET.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only http:// URLs are supported.')
+        path = url.path + (f'?{url.query}' if url.query else '')
+        headers = dict(header.split(':', 1) for header in options['header'])
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        method, body = 'GET', None
+        if options['data'] is not None:
+            method, body = 'POST', options['data'].encode()
+            headers.setdefault('Content-Type', 'application/json')
+
+        samples, errors, lock = [], [0], threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+
+        def worker():
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            local_samples, local_errors = [], 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                    if response.status >= 400:
+                        local_errors += 1
+                    else:
+                        local_samples.append((time.perf_counter() - started) * 1000)
+                    if response.will_close:
+                        conn.close()
+                except (OSError, http.client.HTTPException):
+                    local_errors += 1
+                    conn.close()
+            with lock:
+                samples.extend(local_samples)
+                errors[0] += local_errors
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if not samples:
+            raise CommandError(f'No successful requests ({errors[0]} errors).')
+        result = summarize(samples)
+        self.stdout.write(
+            f"{len(samples) / elapsed:,.1f} req/s  p50 {result['p50_ms']:.1f} ms  "
+            f"p95 {result['p95_ms']:.1f} ms  p99 {result['p99_ms']:.1f} ms  "
+            f"ok {len(samples)}  errors {errors[0]}"
+        )
@@ -0,0 +1,30 @@
+"""
+Throughput of the JSON renderer/parser on a product-list-sized payload.
+
+    python manage.py bench_json
+    python manage.py bench_json --items 100 --rounds 500
+
+Compares DRF's stdlib JSONRenderer/JSONParser with the orjson-backed
+defaults in config.fast_json; needs no database.
+"""
+
+from django.core.management.base import BaseCommand
+
+from config import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark stdlib vs orjson JSON rendering and parsing of a product page.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='Products in the rendered page.')
+        parser.add_argument('--rounds', type=int, default=200, help='Timed renders/parses per codec.')
+
+    def handle(self, *args, **options):
+        results = benchmarks.benchmark_json_codecs(
+            rounds=options['rounds'], items=options['items'], stdout=self.stdout,
+        )
+        for op in ('render', 'parse'):
+            speedup = results[f'{op}_stdlib']['mean_ms'] / results[f'{op}_orjson']['mean_ms']
+            self.stdout.write(f'{op}: orjson x{speedup:.1f}')
@@ -0,0 +1,94 @@
+"""
+Cold-start time of the app and where the imports go.
+
+    python manage.py profile_startup
+    python manage.py profile_startup --target wsgi --tree --min-ms 10
+    python manage.py profile_startup --target manage --manage-args showmigrations
+    python manage.py profile_startup --check      # exit 1 if over budget
+
+Boots each target in a fresh interpreter with ``-X importtime`` (see
+config.startup_profile) and reports self time per app and third-party
+package, cumulative time per URL module and per models/app module, the
+slowest modules, and modules from HEAVY_MODULES that were imported eagerly.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config import startup_profile
+
+
+class Command(BaseCommand):
+    help = 'Profile interpreter start-up and import time of the WSGI/ASGI app and manage.py.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', choices=sorted(startup_profile.STARTUP_BUDGETS),
+            help='Target to boot (repeatable; default: all).',
+        )
+        parser.add_argument(
+            '--manage-args', nargs='+', default=['check'],
+            help='Command run by the manage target (default: check).',
+        )
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules to list.')
+        parser.add_argument('--tree', action='store_true', help='Print the import tree.')
+        parser.add_argument('--min-ms', type=float, default=5.0, help='Prune tree nodes below this cumulative time.')
+        parser.add_argument('--json', action='store_true', help='Machine-readable output.')
+        parser.add_argument('--check', action='store_true', help='Fail if a target exceeds its startup budget.')
+
+    def handle(self, *args, **options):
+        over_budget = []
+        reports = []
+        for target in options['target'] or sorted(startup_profile.STARTUP_BUDGETS):
+            try:
+                profile = startup_profile.run_target(target, importtime=True, manage_args=options['manage_args'])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            budget = startup_profile.budget_for(target)
+            if profile.seconds > budget:
+                over_budget.append(target)
+
+            report = {
+                'target': target,
+                'seconds': round(profile.seconds, 4),
+                'wall_seconds': round(profile.wall_seconds, 4),
+                'budget_seconds': budget,
+                'modules': len(profile.modules),
+                'heavy_modules': startup_profile.heavy_modules_loaded(profile),
+                'by_group': startup_profile.time_by_group(profile)[:options['top']],
+                'by_url_module': startup_profile.time_by_url_module(profile),
+                'by_app_module': startup_profile.time_by_app_module(profile)[:options['top']],
+                'slowest': startup_profile.slowest_imports(profile, options['top']),
+            }
+            reports.append(report)
+            if not options['json']:
+                self._write_report(report)
+                if options['tree']:
+                    for line in startup_profile.format_tree(profile.imports, options['min_ms']):
+                        self.stdout.write(f'  {line}')
+
+        if options['json']:
+            self.stdout.write(json.dumps(reports, indent=2))
+        if options['check'] and over_budget:
+            raise CommandError(f"Startup over budget: {', '.join(over_budget)}")
+
+    def _write_report(self, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{report['target']}: {report['seconds'] * 1000:.0f} ms to ready "
+            f"({report['wall_seconds'] * 1000:.0f} ms wall, budget {report['budget_seconds'] * 1000:.0f} ms), "
+            f"{report['modules']} modules"
+        ))
+        if report['heavy_modules']:
+            self.stdout.write(self.style.WARNING(f"  heavy modules imported: {', '.join(report['heavy_modules'])}"))
+        sections = (
+            ('self time by app/package', report['by_group']),
+            ('URL modules (cumulative)', report['by_url_module']),
+            ('app modules loaded by Django (cumulative)', report['by_app_module']),
+            ('slowest modules (self)', report['slowest']),
+        )
+        for title, rows in sections:
+            self.stdout.write(f'  {title}:')
+            for name, ms in rows:
+                self.stdout.write(f'    {ms:8.1f} ms  {name}')
@@ -0,0 +1,17 @@
+"""
+Delete change-feed tombstones past PRODUCT_TOMBSTONE_RETENTION_DAYS.
+
+    python manage.py purge_product_tombstones        # run daily (cron)
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.products.services.product_service import ProductService
+
+
+class Command(BaseCommand):
+    help = 'Expire tombstones of hard-deleted products from the change feed.'
+
+    def handle(self, *args, **options):
+        purged = ProductService.purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'{purged} tombstone(s) purged.'))
@@ -0,0 +1,27 @@
+"""
+Recompute the public catalog (CatalogEntry) from the source tables.
+
+    python manage.py rebuild_catalog
+
+The catalog migration fills the table; this is for any later bulk change
+that bypassed CatalogService (raw SQL, seed_load, queryset.update in a shell).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.products.models import CatalogEntry
+from apps.products.services.catalog_service import CatalogService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized public catalog table.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        upserted = CatalogService.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Catalog rebuilt: {upserted} sellable product(s), {CatalogEntry.objects.count()} entries '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,326 @@
+"""
+Generate large volumes of synthetic merchants, products and product images.
+
+    python manage.py seed_load --merchants 1000
+    python manage.py seed_load --merchants 200000 --products-per-merchant 50 --workers 8 --seed 7
+
+Rows are streamed into Postgres with COPY from in-memory buffers, one chunk
+of merchants (plus their products and images) per transaction, spread over
+worker processes.  Primary keys are reserved from the table sequences up
+front and every chunk draws from its own Random(seed, chunk), so the same
+--seed and sizes produce the same data whatever the worker count.
+
+Merchants get valid '+63 9XX XXX XXXX' phone numbers, Philippine addresses
+and coordinates near their city, and share one password (--password) hashed
+once.  Run against a quiet database: concurrent inserts into these tables
+while the sequences are being reserved can collide with the reserved ids.
+"""
+
+import io
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.postgres.fields import ArrayField
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, models, transaction
+
+from apps.merchants.models import Merchant
+from apps.products.models import Category, MerchandiseProduct, ProductImage
+
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SPAN_SECONDS = 2 * 365 * 24 * 60 * 60
+
+# (province, city, zip code, latitude, longitude)
+CITIES = [
+    ('Metro Manila', 'Manila', '1000', 14.5995, 120.9842),
+    ('Metro Manila', 'Quezon City', '1100', 14.6760, 121.0437),
+    ('Metro Manila', 'Makati', '1200', 14.5547, 121.0244),
+    ('Metro Manila', 'Pasig', '1600', 14.5764, 121.0851),
+    ('Metro Manila', 'Taguig', '1630', 14.5176, 121.0509),
+    ('Cavite', 'Bacoor', '4102', 14.4624, 120.9645),
+    ('Laguna', 'Santa Rosa', '4026', 14.3122, 121.1114),
+    ('Pampanga', 'San Fernando', '2000', 15.0286, 120.6898),
+    ('Benguet', 'Baguio', '2600', 16.4023, 120.5960),
+    ('Cebu', 'Cebu City', '6000', 10.3157, 123.8854),
+    ('Iloilo', 'Iloilo City', '5000', 10.7202, 122.5621),
+    ('Negros Occidental', 'Bacolod', '6100', 10.6765, 122.9509),
+    ('Davao del Sur', 'Davao City', '8000', 7.1907, 125.4553),
+    ('Misamis Oriental', 'Cagayan de Oro', '9000', 8.4542, 124.6319),
+    ('Zamboanga del Sur', 'Zamboanga City', '7000', 6.9214, 122.0790),
+]
+BARANGAYS = ['Poblacion', 'San Isidro', 'San Jose', 'Santo Niño', 'Bagong Silang', 'Malinis', 'San Roque', 'Mabini']
+STREETS = ['Rizal Street', 'Mabini Street', 'Bonifacio Avenue', 'Quezon Avenue', 'Luna Street', 'Burgos Street']
+NAME_PREFIXES = ['Aling', 'Mang', 'Tita', 'Kuya', 'Ate', 'Lola']
+OWNER_NAMES = ['Maria', 'Jose', 'Ana', 'Juan', 'Rosa', 'Pedro', 'Liza', 'Carlo', 'Grace', 'Mark']
+SURNAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Villanueva']
+ADJECTIVES = ['Fresh', 'Organic', 'Classic', 'Premium', 'Local', 'Homemade', 'Sweet', 'Spicy', 'Vintage']
+NOUNS = ['Mango', 'Rice', 'Adobo Mix', 'Coffee', 'Ube Jam', 'Dried Fish', 'Tote Bag', 'Shirt', 'Novel', 'Pan de Sal']
+
+
+@dataclass(frozen=True)
+class LoadPlan:
+    """Everything a worker needs to generate one chunk, picklable."""
+
+    seed: int
+    merchants: int
+    chunk_size: int
+    products_per_merchant: int
+    images_per_product: int
+    merchant_start: int
+    product_start: int
+    image_start: int
+    category_ids: tuple
+    business_categories: tuple
+    password_hash: str
+
+    @property
+    def chunks(self) -> int:
+        return -(-self.merchants // self.chunk_size)
+
+
+# ── COPY encoding ────────────────────────────────────────────────────────────
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _encode(field, value) -> str:
+    """Render one value in COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(field, models.JSONField):
+        return _escape(json.dumps(value))
+    if isinstance(field, ArrayField):
+        items = ','.join('"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value)
+        return _escape('{' + items + '}')
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return _escape(str(value))
+
+
+class CopyBuffer:
+    """Accumulates rows for one model's concrete columns and COPYs them."""
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = model._meta.concrete_fields
+        self.defaults = {field.attname: field.get_default() for field in self.fields}
+        self.buffer = io.StringIO()
+        self.rows = 0
+
+    def add(self, **values) -> None:
+        self.buffer.write('\t'.join(
+            _encode(field, values[field.attname] if field.attname in values else self.defaults[field.attname])
+            for field in self.fields
+        ))
+        self.buffer.write('\n')
+        self.rows += 1
+
+    def copy_to(self, cursor) -> None:
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in self.fields)
+        self.buffer.seek(0)
+        cursor.copy_expert(f'COPY {self.model._meta.db_table} ({columns}) FROM STDIN', self.buffer)
+
+
+# ── Generation ───────────────────────────────────────────────────────────────
+
+
+def _phone_number(merchant_id: int) -> str:
+    # Multiplying by a number coprime to 10**9 is a bijection, so ids map to
+    # unique, evenly spread subscriber numbers.
+    digits = f'9{(merchant_id * 7919 + 12345) % 10**9:09d}'
+    return f'+63 {digits[:3]} {digits[3:6]} {digits[6:]}'
+
+
+def _timestamp(rng: random.Random) -> datetime:
+    return BASE_TIME + timedelta(seconds=rng.randrange(SPAN_SECONDS))
+
+
+def generate_chunk(plan: LoadPlan, chunk: int) -> tuple:
+    """Build the merchant, product and image buffers for one chunk."""
+    rng = random.Random(f'{plan.seed}:{chunk}')
+    merchants, products, images = CopyBuffer(Merchant), CopyBuffer(MerchandiseProduct), CopyBuffer(ProductImage)
+
+    first = chunk * plan.chunk_size
+    for offset in range(first, min(first + plan.chunk_size, plan.merchants)):
+        merchant_id = plan.merchant_start + offset
+        province, city, zip_code, lat, lng = rng.choice(CITIES)
+        owner = f'{rng.choice(OWNER_NAMES)} {rng.choice(SURNAMES)}'
+        created_at = _timestamp(rng)
+        merchant = dict(
+            id=merchant_id,
+            username=f'load{merchant_id}',
+            email=f'load{merchant_id}@load.rapex.test',
+            password=plan.password_hash,
+            phone_number=_phone_number(merchant_id),
+            business_name=f"{rng.choice(NAME_PREFIXES)} {owner.split()[0]}'s Store {merchant_id}",
+            owner_name=owner,
+            business_categories=rng.sample(plan.business_categories, k=rng.randint(1, min(3, len(plan.business_categories)))),
+            business_types=[],
+            business_registration=rng.choice(Merchant.REGISTRATION_TYPES)[0],
+            zip_code=zip_code,
+            province=province,
+            city=city,
+            barangay=rng.choice(BARANGAYS),
+            street_name=rng.choice(STREETS),
+            house_number=str(rng.randint(1, 999)),
+            latitude=Decimal(f'{lat + rng.uniform(-0.08, 0.08):.6f}'),
+            longitude=Decimal(f'{lng + rng.uniform(-0.08, 0.08):.6f}'),
+            status=rng.choices(
+                [Merchant.APPROVED, Merchant.PENDING, Merchant.REJECTED, Merchant.SUSPENDED],
+                weights=[80, 14, 4, 2],
+            )[0],
+            is_new=False,
+            registration_step=3,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        # COPY bypasses Merchant.save(), which derives the geohash.
+        merchant['geohash'] = Merchant.compute_geohash(merchant['latitude'], merchant['longitude'])
+        merchants.add(**merchant)
+
+        for position in range(plan.products_per_merchant):
+            product_index = offset * plan.products_per_merchant + position
+            product_id = plan.product_start + product_index
+            product_created = created_at + timedelta(seconds=rng.randrange(30 * 24 * 60 * 60))
+            products.add(
+                id=product_id,
+                merchant_id=merchant_id,
+                name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}',
+                category_id=rng.choice(plan.category_ids),
+                sku=f'LD-{product_id:010d}',
+                description_text='Synthetic load-test product.',
+                price=Decimal(rng.randrange(1000, 5_000_000)) / 100,
+                stock=rng.choice([0, 0, rng.randint(1, 500)]),
+                is_verified=rng.random() < 0.6,
+                is_archived=rng.random() < 0.05,
+                is_active=rng.random() < 0.9,
+                created_at=product_created,
+                updated_at=product_created,
+            )
+            for sort_order in range(plan.images_per_product):
+                images.add(
+                    id=plan.image_start + product_index * plan.images_per_product + sort_order,
+                    product_id=product_id,
+                    image=f'products/{merchant_id}/images/{product_id}-{sort_order}.jpg',
+                    sort_order=sort_order,
+                    created_at=product_created,
+                )
+
+    return merchants, products, images
+
+
+def load_chunk(plan: LoadPlan, chunk: int) -> tuple:
+    """Worker entry point: generate and COPY one chunk in one transaction."""
+    buffers = generate_chunk(plan, chunk)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for buffer in buffers:
+            buffer.copy_to(cursor.cursor)
+    return tuple(buffer.rows for buffer in buffers)
+
+
+def _init_worker() -> None:
+    django.setup()
+
+
+# ── Command ──────────────────────────────────────────────────────────────────
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate synthetic merchants, products and images with COPY and parallel workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--merchants', type=int, required=True)
+        parser.add_argument('--products-per-merchant', type=int, default=20)
+        parser.add_argument('--images-per-product', type=int, default=3)
+        parser.add_argument('--chunk-size', type=int, default=500, help='Merchants per COPY transaction.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='Load-Passw0rd!', help='Password shared by every merchant.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('seed_load requires PostgreSQL (COPY).')
+        if options['merchants'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--merchants and --chunk-size must be positive.')
+
+        category_ids = tuple(
+            Category.objects.filter(is_active=True, children__isnull=True).order_by('id').values_list('id', flat=True)
+        )
+        if not category_ids:
+            raise CommandError('No categories found; run migrations first.')
+        business_categories = tuple(
+            Category.objects.filter(parent__isnull=True).order_by('sort_order').values_list('name', flat=True)
+        )
+
+        merchants = options['merchants']
+        products = merchants * options['products_per_merchant']
+        images = products * options['images_per_product']
+        plan = LoadPlan(
+            seed=options['seed'],
+            merchants=merchants,
+            chunk_size=options['chunk_size'],
+            products_per_merchant=options['products_per_merchant'],
+            images_per_product=options['images_per_product'],
+            merchant_start=self._reserve_ids(Merchant, merchants),
+            product_start=self._reserve_ids(MerchandiseProduct, products),
+            image_start=self._reserve_ids(ProductImage, images),
+            category_ids=category_ids,
+            business_categories=business_categories,
+            password_hash=make_password(options['password']),
+        )
+        self.stdout.write(
+            f'Loading {merchants} merchants, {products} products, {images} images '
+            f"in {plan.chunks} chunks on {options['workers']} workers..."
+        )
+
+        started = time.perf_counter()
+        totals = [0, 0, 0]
+        # Children must open their own connections, never share the parent's.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = [pool.submit(load_chunk, plan, chunk) for chunk in range(plan.chunks)]
+            for done, future in enumerate(as_completed(futures), start=1):
+                totals = [total + rows for total, rows in zip(totals, future.result())]
+                if done % 10 == 0 or done == plan.chunks:
+                    self.stdout.write(f'  {done}/{plan.chunks} chunks, {sum(totals)} rows')
+
+        with connection.cursor() as cursor:
+            for model in (Merchant, MerchandiseProduct, ProductImage):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {totals[0]} merchants, {totals[1]} products, {totals[2]} images '
+            f'in {elapsed:.1f}s ({sum(totals) / elapsed:,.0f} rows/s).'
+        ))
+        self.stdout.write('COPY bypasses CatalogService; run rebuild_catalog to publish approved products.')
+
+    @staticmethod
+    def _reserve_ids(model, count: int) -> int:
+        """Claim `count` consecutive ids from the model's sequence; return the first."""
+        if count == 0:
+            return 0
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_get_serial_sequence(%s, 'id')", [table]
+            )
+            sequence = cursor.fetchone()[0]
+            cursor.execute(
+                f'SELECT GREATEST(nextval(%s), (SELECT COALESCE(MAX(id), 0) + 1 FROM {table}))', [sequence]
+            )
+            first = cursor.fetchone()[0]
+            cursor.execute('SELECT setval(%s, %s)', [sequence, first + count - 1])
+        return first
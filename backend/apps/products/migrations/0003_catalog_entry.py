@@ -0,0 +1,93 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import OuterRef, Q, Subquery
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def fill_catalog(apps, schema_editor):
+    # Historical models cannot use CatalogService; this mirrors its rebuild()
+    # (SELLABLE, _entry, _SEARCH_VECTOR) as of this migration.
+    MerchandiseProduct = apps.get_model('products', 'MerchandiseProduct')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    CatalogEntry = apps.get_model('products', 'CatalogEntry')
+    sellable = (
+        MerchandiseProduct.objects
+        .filter(is_active=True, is_archived=False, is_verified=True)
+        .filter(merchant__is_active=True, merchant__status='APPROVED', category__is_active=True)
+        .filter(Q(category__parent__isnull=True) | Q(category__parent__is_active=True))
+        .select_related('merchant', 'category', 'category__parent')
+        .annotate(primary_image_name=Subquery(
+            ProductImage.objects.filter(product=OuterRef('pk')).order_by('sort_order', 'id').values('image')[:1]
+        ))
+        .order_by()
+    )
+    batch = []
+    for product in sellable.iterator(chunk_size=BATCH_SIZE):
+        category, parent = product.category, product.category.parent
+        batch.append(CatalogEntry(
+            product_id=product.id,
+            merchant_id=product.merchant.id,
+            merchant_name=product.merchant.business_name,
+            merchant_city=product.merchant.city,
+            category_id=category.id,
+            root_category_id=parent.id if parent else category.id,
+            category_path=f'{parent.name} > {category.name}' if parent else category.name,
+            name=product.name,
+            price=product.price,
+            stock=product.stock,
+            primary_image=product.primary_image_name or '',
+            has_video=bool(product.video),
+            created_at=product.created_at,
+        ))
+        if len(batch) == BATCH_SIZE:
+            CatalogEntry.objects.bulk_create(batch)
+            batch = []
+    CatalogEntry.objects.bulk_create(batch)
+    CatalogEntry.objects.update(search_vector=(
+        SearchVector('name', config='simple')
+        + SearchVector('merchant_name', config='simple')
+        + SearchVector('category_path', config='simple')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0005_merchant_geohash'),
+        ('products', '0002_seed_categories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalog_entry', serialize=False, to='products.merchandiseproduct')),
+                ('merchant_name', models.CharField(max_length=255)),
+                ('merchant_city', models.CharField(blank=True, default='', max_length=100)),
+                ('category_path', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('stock', models.PositiveIntegerField(default=0)),
+                ('primary_image', models.CharField(blank=True, default='', max_length=255)),
+                ('has_video', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category')),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='merchants.merchant')),
+                ('root_category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category')),
+            ],
+            options={
+                'db_table': 'catalog_entry',
+                'ordering': ['-created_at', '-product_id'],
+                'indexes': [models.Index(fields=['-created_at', '-product'], name='catalog_newest'), models.Index(fields=['price', 'product'], name='catalog_price'), models.Index(fields=['category', '-created_at', '-product'], name='catalog_category_newest'), models.Index(fields=['root_category', '-created_at', '-product'], name='catalog_root_newest'), models.Index(fields=['merchant', '-created_at', '-product'], name='catalog_merchant_newest'), django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_search')],
+            },
+        ),
+        migrations.RunPython(fill_catalog, migrations.RunPython.noop),
+    ]
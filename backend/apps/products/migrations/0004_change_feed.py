@@ -0,0 +1,79 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+# change_seq = the writing transaction's id.  Existing rows keep 0, which
+# sorts before every real transaction id.
+TRIGGERS_SQL = """
+CREATE FUNCTION merchandise_product_change_seq() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER merchandise_product_change_seq
+    BEFORE INSERT OR UPDATE ON merchandise_product
+    FOR EACH ROW EXECUTE FUNCTION merchandise_product_change_seq();
+
+CREATE FUNCTION merchandise_product_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO product_tombstone (product_id, merchant_id, change_seq, deleted_at)
+    SELECT id, merchant_id, pg_current_xact_id()::text::bigint, now() FROM deleted
+    ON CONFLICT (product_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER merchandise_product_tombstone
+    AFTER DELETE ON merchandise_product
+    REFERENCING OLD TABLE AS deleted
+    FOR EACH STATEMENT EXECUTE FUNCTION merchandise_product_tombstone();
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER merchandise_product_tombstone ON merchandise_product;
+DROP FUNCTION merchandise_product_tombstone();
+DROP TRIGGER merchandise_product_change_seq ON merchandise_product;
+DROP FUNCTION merchandise_product_change_seq();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_catalog_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTombstone',
+            fields=[
+                ('product_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('merchant_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'product_tombstone',
+            },
+        ),
+        migrations.AddField(
+            model_name='merchandiseproduct',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='merchandiseproduct',
+            index=models.Index(fields=['merchant', 'change_seq', 'id'], name='product_merchant_changes'),
+        ),
+        migrations.AddIndex(
+            model_name='producttombstone',
+            index=models.Index(fields=['merchant_id', 'change_seq', 'product_id'], name='tombstone_merchant_changes'),
+        ),
+        migrations.AddIndex(
+            model_name='producttombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_at'),
+        ),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=DROP_TRIGGERS_SQL),
+    ]
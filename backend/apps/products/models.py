@@ -1,7 +1,8 @@
 """
 Products Models
 ==============
-Defines Category and MerchandiseProduct for merchant product listings.
+Defines Category and MerchandiseProduct for merchant product listings,
+plus the tombstone and catalog tables derived from them.
 
 Category:
   - Hierarchical product categories with icon and status flags.
@@ -12,10 +13,18 @@ MerchandiseProduct:
   - Validation is handled at the serializer/service layer;
     file-path fields are plain CharField so we stay flexible with
     client-driven multi-file uploads.
+
+ProductTombstone:
+  - Hard-deleted products, kept for the delta sync feed (written by a trigger).
+
+CatalogEntry:
+  - Denormalized public read model of sellable products (see CatalogService).
 """
 
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 # ---------------------------------------------------------------------------
@@ -64,9 +73,10 @@ class Category(models.Model):
 # ---------------------------------------------------------------------------
 
 def _product_image_upload_path(instance, filename: str) -> str:
+    # instance is a ProductImage; the merchant lives on its product.
     from pathlib import Path
     ext = Path(filename).suffix.lower()
-    return f"products/{instance.merchant_id}/images/{filename}"
+    return f"products/{instance.product.merchant_id}/images/{filename}"
 
 
 def _product_video_upload_path(instance, filename: str) -> str:
@@ -178,9 +188,17 @@ class MerchandiseProduct(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # ── Change feed ───────────────────────────────────────────────────────
+    # Id of the last transaction that wrote the row, set by a database
+    # trigger on every INSERT/UPDATE (ORM saves, queryset updates, admin).
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
     class Meta:
         db_table = 'merchandise_product'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['merchant', 'change_seq', 'id'], name='product_merchant_changes'),
+        ]
         verbose_name = 'Merchandise Product'
         verbose_name_plural = 'Merchandise Products'
 
@@ -197,3 +215,85 @@ class MerchandiseProduct(models.Model):
     @property
     def image_count(self) -> int:
         return self.images.count()
+
+
+# ---------------------------------------------------------------------------
+# ProductTombstone (change feed deletes)
+# ---------------------------------------------------------------------------
+
+class ProductTombstone(models.Model):
+    """
+    A hard-deleted product, kept so the change feed can report the delete.
+    Written by a database trigger on merchandise_product; expired by
+    `manage.py purge_product_tombstones`.
+    """
+
+    product_id = models.BigIntegerField(primary_key=True)
+    # No foreign key: the merchant may be deleted along with its products.
+    merchant_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'product_tombstone'
+        indexes = [
+            models.Index(fields=['merchant_id', 'change_seq', 'product_id'], name='tombstone_merchant_changes'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_at'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"Deleted product {self.product_id}"
+
+
+# ---------------------------------------------------------------------------
+# CatalogEntry (public read model)
+# ---------------------------------------------------------------------------
+
+class CatalogEntry(models.Model):
+    """
+    One row per *sellable* product, with what the public catalog shows
+    copied in: merchant name and city, category path and primary image.
+    Browsing and search read this table alone — no joins.
+
+    Written only by CatalogService, which refreshes the affected rows
+    whenever a product, its merchant or its category changes.
+    """
+
+    product = models.OneToOneField(
+        MerchandiseProduct,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='catalog_entry',
+    )
+    merchant = models.ForeignKey('merchants.Merchant', on_delete=models.CASCADE, related_name='+')
+    merchant_name = models.CharField(max_length=255)
+    merchant_city = models.CharField(max_length=100, blank=True, default='')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    # Top-level ancestor (the category itself when it has no parent).
+    root_category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    category_path = models.CharField(max_length=255)  # "Fresh Produce > Vegetables"
+
+    name = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    stock = models.PositiveIntegerField(default=0)
+    primary_image = models.CharField(max_length=255, blank=True, default='')  # storage name
+    has_video = models.BooleanField(default=False)
+    created_at = models.DateTimeField()  # the product's
+    refreshed_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True)
+
+    class Meta:
+        db_table = 'catalog_entry'
+        ordering = ['-created_at', '-product_id']
+        indexes = [
+            # Keyset pagination for each sort, optionally within a category or shop.
+            models.Index(fields=['-created_at', '-product'], name='catalog_newest'),
+            models.Index(fields=['price', 'product'], name='catalog_price'),
+            models.Index(fields=['category', '-created_at', '-product'], name='catalog_category_newest'),
+            models.Index(fields=['root_category', '-created_at', '-product'], name='catalog_root_newest'),
+            models.Index(fields=['merchant', '-created_at', '-product'], name='catalog_merchant_newest'),
+            GinIndex(fields=['search_vector'], name='catalog_search'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"Catalog entry for product {self.product_id}"
@@ -0,0 +1,92 @@
+"""
+Catalog Selectors
+=================
+Public catalog queries over the denormalized CatalogEntry table, with
+keyset (cursor) pagination: a page continues strictly after the last row of
+the previous one in (sort value, product id) order, so deep pages cost the
+same as the first and rows do not shift when products are added.
+"""
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.postgres.search import SearchQuery
+from django.core import signing
+from django.db.models import Q, QuerySet
+
+from apps.products.models import CatalogEntry
+from config.db_router import replica_manager
+
+CURSOR_SALT = 'products.catalog.cursor'
+
+# sort name -> (field, descending)
+SORTS = {
+    'newest': ('created_at', True),
+    'price_asc': ('price', False),
+    'price_desc': ('price', True),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CatalogSelector:
+    """Queryset factory for the public catalog."""
+
+    @staticmethod
+    def browse(filters: dict) -> QuerySet:
+        """
+        Sellable products matching `filters` (validated CatalogQuerySerializer
+        data), in the requested sort order.
+        """
+        qs = replica_manager(CatalogEntry).all()
+
+        if filters.get('q'):
+            qs = qs.filter(search_vector=SearchQuery(filters['q'], config='simple', search_type='websearch'))
+        if filters.get('category'):
+            category = filters['category']
+            qs = qs.filter(Q(category_id=category) | Q(root_category_id=category))
+        if filters.get('merchant'):
+            qs = qs.filter(merchant_id=filters['merchant'])
+        if filters.get('min_price') is not None:
+            qs = qs.filter(price__gte=filters['min_price'])
+        if filters.get('max_price') is not None:
+            qs = qs.filter(price__lte=filters['max_price'])
+        if filters.get('in_stock'):
+            qs = qs.filter(stock__gt=0)
+
+        field, descending = SORTS[filters['sort']]
+        prefix = '-' if descending else ''
+        return qs.order_by(f'{prefix}{field}', f'{prefix}product_id').only(
+            'product_id', 'merchant_id', 'merchant_name', 'merchant_city', 'category_id', 'category_path',
+            'name', 'price', 'stock', 'primary_image', 'has_video', 'created_at',
+        )
+
+    # ── Cursors ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def encode_cursor(sort: str, entry: CatalogEntry) -> str:
+        field, _ = SORTS[sort]
+        value = getattr(entry, field)
+        return signing.dumps([sort, value.isoformat() if field == 'created_at' else str(value), entry.product_id],
+                             salt=CURSOR_SALT)
+
+    @staticmethod
+    def after_cursor(qs: QuerySet, sort: str, cursor: str) -> QuerySet:
+        """Rows strictly after `cursor` in `sort` order. Raises InvalidCursor."""
+        try:
+            cursor_sort, raw_value, product_id = signing.loads(cursor, salt=CURSOR_SALT)
+            field, descending = SORTS[sort]
+            value = datetime.fromisoformat(raw_value) if field == 'created_at' else Decimal(raw_value)
+            product_id = int(product_id)
+        except (signing.BadSignature, ValueError, TypeError, KeyError, InvalidOperation):
+            raise InvalidCursor('Invalid cursor.')
+        if cursor_sort != sort:
+            raise InvalidCursor('Cursor belongs to a different sort order.')
+
+        beyond = 'lt' if descending else 'gt'
+        return qs.filter(
+            Q(**{f'{field}__{beyond}': value})
+            | Q(**{field: value, f'product_id__{beyond}': product_id})
+        )
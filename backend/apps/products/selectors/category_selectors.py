@@ -0,0 +1,42 @@
+"""
+Category Selectors
+==================
+Database access for the category tree.
+"""
+
+from django.db.models import Prefetch, QuerySet
+from apps.products.models import Category
+from config.db_router import replica_manager
+
+
+class CategorySelector:
+    """Queryset factory for Category."""
+
+    @staticmethod
+    def _active_children() -> Prefetch:
+        return Prefetch(
+            'children',
+            queryset=Category.objects.filter(is_active=True),
+            to_attr='active_children',
+        )
+
+    @classmethod
+    def active_tree(cls) -> QuerySet:
+        """
+        Active top-level categories with active children (and their active
+        children) prefetched into `active_children`: 3 queries regardless of
+        tree size.  CategorySerializer.get_children reads that attribute.
+        Served from a read replica when one is configured.
+        """
+        return (
+            replica_manager(Category)
+            .filter(is_active=True, parent__isnull=True)
+            .prefetch_related(
+                Prefetch(
+                    'children',
+                    queryset=Category.objects.filter(is_active=True).prefetch_related(cls._active_children()),
+                    to_attr='active_children',
+                )
+            )
+            .order_by('sort_order', 'name')
+        )
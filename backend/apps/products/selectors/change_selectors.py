@@ -0,0 +1,116 @@
+"""
+Change Feed Selectors
+=====================
+What changed in a merchant's catalogue since a client last synced.
+
+Every product row carries change_seq, the id of the transaction that last
+wrote it (a database trigger sets it on INSERT/UPDATE), and hard deletes
+leave a ProductTombstone stamped the same way.  The feed walks products and
+tombstones together in (change_seq, id) order.
+
+Transaction ids are handed out when a transaction starts writing, not when
+it commits, so a slow transaction can commit a change_seq below one a
+client has already read past.  The feed therefore only returns changes
+below the watermark — the snapshot's xmin, the oldest transaction still
+running — and a caught-up client's cursor parks there.  Watermark and rows
+are read from the same database, so a lagging replica only delays changes,
+never skips them.
+
+Cursors are signed and expire after PRODUCT_TOMBSTONE_RETENTION_DAYS: an
+older cursor may have missed purged tombstones and must resync from scratch.
+"""
+
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+from apps.products.models import MerchandiseProduct, ProductTombstone
+from apps.products.selectors.catalog_selectors import InvalidCursor
+from config.db_router import replica_manager
+from config.instrumentation import span
+
+CURSOR_SALT = 'products.changes.cursor'
+
+WATERMARK_SQL = 'SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+
+
+class ExpiredCursor(InvalidCursor):
+    pass
+
+
+class ChangePage(NamedTuple):
+    changed: list          # MerchandiseProduct instances (created, updated or archived)
+    deleted: list          # ids of hard-deleted products
+    position: tuple        # (change_seq, id) to continue from
+    has_more: bool
+
+
+class ChangeSelector:
+
+    @staticmethod
+    def encode_cursor(position: tuple) -> str:
+        return signing.dumps(list(position), salt=CURSOR_SALT)
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """(change_seq, id) of `cursor`; the start of history when empty."""
+        if not cursor:
+            return (0, 0)
+        max_age = settings.PRODUCT_TOMBSTONE_RETENTION_DAYS * 86400
+        try:
+            change_seq, pk = signing.loads(cursor, salt=CURSOR_SALT, max_age=max_age)
+            return (int(change_seq), int(pk))
+        except signing.SignatureExpired:
+            raise ExpiredCursor('Cursor expired; resync from the beginning.')
+        except (signing.BadSignature, ValueError, TypeError):
+            raise InvalidCursor('Invalid cursor.')
+
+    @staticmethod
+    def watermark(alias: str = DEFAULT_DB_ALIAS) -> int:
+        """Every change_seq below this is committed (or rolled back) on `alias`."""
+        with connections[alias].cursor() as cursor:
+            cursor.execute(WATERMARK_SQL)
+            return cursor.fetchone()[0]
+
+    @classmethod
+    @span('changes.page')
+    def page(cls, merchant, position: tuple, limit: int) -> ChangePage:
+        """Up to `limit` changes strictly after `position`, oldest first."""
+        # Pin one database for the watermark and both reads.
+        alias = replica_manager(MerchandiseProduct, merchant).db
+        watermark = cls.watermark(alias)
+
+        change_seq, pk = position
+        products = list(
+            MerchandiseProduct.objects.using(alias)
+            .filter(merchant=merchant, change_seq__lt=watermark)
+            .filter(Q(change_seq__gt=change_seq) | Q(change_seq=change_seq, id__gt=pk))
+            .select_related('category')
+            .prefetch_related('images')
+            .order_by('change_seq', 'id')[:limit + 1]
+        )
+        tombstones = list(
+            ProductTombstone.objects.using(alias)
+            .filter(merchant_id=merchant.pk, change_seq__lt=watermark)
+            .filter(Q(change_seq__gt=change_seq) | Q(change_seq=change_seq, product_id__gt=pk))
+            .order_by('change_seq', 'product_id')
+            .values_list('change_seq', 'product_id')[:limit + 1]
+        )
+
+        entries = sorted(
+            [((product.change_seq, product.pk), product) for product in products]
+            + [(key, None) for key in tombstones]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        # Caught up: skip ahead to the watermark (nothing below it is left).
+        next_position = entries[-1][0] if has_more else max((watermark, 0), position)
+        return ChangePage(
+            changed=[product for _, product in entries if product is not None],
+            deleted=[key[1] for key, product in entries if product is None],
+            position=next_position,
+            has_more=has_more,
+        )
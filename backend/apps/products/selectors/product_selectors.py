@@ -10,6 +10,7 @@ Follows RAPEX blueprint:
 
 from django.db.models import QuerySet, Q
 from apps.products.models import MerchandiseProduct
+from config.db_router import replica_manager
 
 
 class ProductSelector:
@@ -22,14 +23,33 @@ class ProductSelector:
 
     @staticmethod
     def for_merchant(merchant) -> QuerySet:
-        """All products that belong to this merchant (no status filter)."""
+        """
+        All products that belong to this merchant (no status filter).
+        Read from a replica unless the merchant wrote within the pin window.
+        """
         return (
-            MerchandiseProduct.objects
+            replica_manager(MerchandiseProduct, merchant)
             .filter(merchant=merchant)
             .select_related('category')
             .prefetch_related('images')
         )
 
+    @classmethod
+    def by_ids(cls, merchant, ids: list) -> list:
+        """
+        The merchant's products with these ids, in the order given, in one
+        query plus the images prefetch.  Unknown ids are left out.
+        """
+        products = cls.for_merchant(merchant).in_bulk(ids)
+        return [products[pk] for pk in ids if pk in products]
+
+    @staticmethod
+    def video_source(pk: int) -> QuerySet:
+        """Just the columns needed to authorize and stream a product's video."""
+        return MerchandiseProduct.objects.filter(pk=pk).only(
+            'id', 'merchant_id', 'video', 'is_active', 'is_archived',
+        )
+
     # ── Filtering helpers ─────────────────────────────────────────────────
 
     @staticmethod
@@ -5,6 +5,8 @@ Handles validation for:
   - Category (read)
   - MerchandiseProduct (create / update)
   - ProductImage (nested)
+  - Batch lookup by id (query/body)
+  - CatalogEntry (public catalog read + query parameters)
 
 Validation rules mirrored from product spec:
   images        : 3-10 files, each JPG/PNG ≤ 2 MB, will validate 1:1 ratio in service
@@ -14,8 +16,10 @@ Validation rules mirrored from product spec:
   name          : ≤ 100 chars
 """
 
+from django.core.files.storage import default_storage
+from django.urls import reverse
 from rest_framework import serializers
-from apps.products.models import Category, MerchandiseProduct, ProductImage
+from apps.products.models import CatalogEntry, Category, MerchandiseProduct, ProductImage
 
 ALLOWED_IMAGE_TYPES = ('image/jpeg', 'image/png')
 ALLOWED_IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
@@ -23,6 +27,7 @@ MAX_IMAGE_SIZE = 2 * 1024 * 1024        # 2 MB
 MAX_VIDEO_SIZE = 30 * 1024 * 1024       # 30 MB
 ALLOWED_VIDEO_TYPES = ('video/mp4',)
 ALLOWED_VIDEO_EXTS = ('.mp4',)
+MAX_BATCH_IDS = 300
 
 
 # ── Category ─────────────────────────────────────────────────────────────────
@@ -38,9 +43,12 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug', 'description', 'icon', 'parent', 'children', 'sort_order')
 
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategorySerializer(obj.children.filter(is_active=True), many=True).data
-        return []
+        # Views prefetch active children into `active_children`
+        # (see CategorySelector.active_tree) so the tree costs O(1) queries.
+        children = getattr(obj, 'active_children', None)
+        if children is None:
+            children = obj.children.filter(is_active=True)
+        return CategorySerializer(children, many=True).data
 
 
 # ── ProductImage ──────────────────────────────────────────────────────────────
@@ -62,6 +70,7 @@ class MerchandiseProductSerializer(serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     primary_image_url = serializers.SerializerMethodField()
+    video_stream_url = serializers.SerializerMethodField()
 
     class Meta:
         model = MerchandiseProduct
@@ -70,7 +79,7 @@ class MerchandiseProductSerializer(serializers.ModelSerializer):
             'sku', 'description_text', 'description_image',
             'price', 'stock',
             'is_verified', 'is_archived', 'is_active',
-            'video', 'images', 'primary_image_url',
+            'video', 'video_stream_url', 'images', 'primary_image_url',
             'created_at', 'updated_at',
         )
         read_only_fields = ('id', 'merchant', 'is_verified', 'created_at', 'updated_at')
@@ -83,6 +92,14 @@ class MerchandiseProductSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(img.image.url)
         return None
 
+    def get_video_stream_url(self, obj):
+        """Seekable (HTTP Range) video URL for players."""
+        if not obj.video:
+            return None
+        url = reverse('products:product-video', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
 
 class MerchandiseProductCreateSerializer(serializers.Serializer):
     """
@@ -134,3 +151,79 @@ class MerchandiseProductCreateSerializer(serializers.Serializer):
                 "Provide either a description text OR a description image, not both."
             )
         return data
+
+
+# ── Batch lookup ──────────────────────────────────────────────────────────────
+
+
+class ProductBatchSerializer(serializers.Serializer):
+    """Ids of GET/POST /api/products/merchant/batch/; duplicates are dropped, order kept."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BATCH_IDS,
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
+# ── Change feed ───────────────────────────────────────────────────────────────
+
+
+class ProductChangesQuerySerializer(serializers.Serializer):
+    """Query parameters of GET /api/products/merchant/changes/."""
+
+    since = serializers.CharField(required=False, allow_blank=True, default='')
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=500, default=100)
+
+
+# ── Public catalog ────────────────────────────────────────────────────────────
+
+
+class CatalogQuerySerializer(serializers.Serializer):
+    """Query parameters of GET /api/products/catalog/."""
+
+    q = serializers.CharField(required=False, allow_blank=True, max_length=200, default='')
+    category = serializers.IntegerField(required=False, min_value=1)
+    merchant = serializers.IntegerField(required=False, min_value=1)
+    min_price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+    in_stock = serializers.BooleanField(required=False, default=False)
+    sort = serializers.ChoiceField(choices=('newest', 'price_asc', 'price_desc'), default='newest')
+    cursor = serializers.CharField(required=False, allow_blank=True, default='')
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=60, default=24)
+
+
+class CatalogEntrySerializer(serializers.ModelSerializer):
+    """Public catalog card, read from the denormalized CatalogEntry row."""
+
+    id = serializers.IntegerField(source='product_id')
+    merchant = serializers.SerializerMethodField()
+    category = serializers.SerializerMethodField()
+    primary_image_url = serializers.SerializerMethodField()
+    video_stream_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CatalogEntry
+        fields = (
+            'id', 'name', 'price', 'stock', 'merchant', 'category',
+            'primary_image_url', 'video_stream_url', 'created_at',
+        )
+
+    def get_merchant(self, obj):
+        return {'id': obj.merchant_id, 'name': obj.merchant_name, 'city': obj.merchant_city}
+
+    def get_category(self, obj):
+        return {'id': obj.category_id, 'path': obj.category_path}
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_primary_image_url(self, obj):
+        return self._absolute(default_storage.url(obj.primary_image)) if obj.primary_image else None
+
+    def get_video_stream_url(self, obj):
+        if not obj.has_video:
+            return None
+        return self._absolute(reverse('products:product-video', kwargs={'pk': obj.product_id}))
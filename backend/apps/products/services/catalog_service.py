@@ -0,0 +1,169 @@
+"""
+Catalog Service
+===============
+Maintains the public catalog read model (CatalogEntry).
+
+A product is *sellable* when it is active, not archived and verified, its
+merchant is active and APPROVED, and its category (and parent) is active.
+Every write path that can change one of those facts, or a denormalized
+value (name, price, stock, images, merchant name/city, category name),
+calls one of the refresh_* methods in the same transaction:
+
+    product create/update/bulk action   refresh_products(ids)
+    merchant change (admin)             refresh_merchant(merchant_id)
+    category change (admin)             refresh_category(category_id)
+    drift repair                        rebuild()  (manage.py rebuild_catalog)
+
+A refresh recomputes the rows in scope from the source tables: entries of
+products that are no longer sellable are deleted, the rest are upserted.
+Hard-deleted products lose their entry through the CASCADE.
+
+After each change the catalog *generation* is bumped (on commit); cached
+catalog pages are keyed by it, so they are never served stale.
+"""
+
+import hashlib
+import json
+import time
+
+from django.contrib.postgres.search import SearchVector
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from apps.merchants.models import Merchant
+from apps.products.models import CatalogEntry, MerchandiseProduct, ProductImage
+from config.instrumentation import span
+
+GENERATION_CACHE_KEY = 'catalog:generation'
+BATCH_SIZE = 1000
+
+SELLABLE = (
+    Q(is_active=True, is_archived=False, is_verified=True)
+    & Q(merchant__is_active=True, merchant__status=Merchant.APPROVED)
+    & Q(category__is_active=True)
+    & (Q(category__parent__isnull=True) | Q(category__parent__is_active=True))
+)
+
+_UPDATE_FIELDS = [
+    'merchant', 'merchant_name', 'merchant_city', 'category', 'root_category', 'category_path',
+    'name', 'price', 'stock', 'primary_image', 'has_video', 'created_at', 'refreshed_at',
+]
+
+_SEARCH_VECTOR = (
+    SearchVector('name', config='simple')
+    + SearchVector('merchant_name', config='simple')
+    + SearchVector('category_path', config='simple')
+)
+
+
+class CatalogService:
+    """Incremental maintenance of CatalogEntry. All methods are classmethods."""
+
+    # ── Refresh ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def refresh_products(cls, product_ids) -> int:
+        return cls._refresh(Q(pk__in=list(product_ids)))
+
+    @classmethod
+    def refresh_merchant(cls, merchant_id: int) -> int:
+        return cls._refresh(Q(merchant_id=merchant_id))
+
+    @classmethod
+    def refresh_category(cls, category_id: int) -> int:
+        return cls._refresh(Q(category_id=category_id) | Q(category__parent_id=category_id))
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Recompute every entry, e.g. after a bulk import that bypassed the service."""
+        return cls._refresh(Q())
+
+    @classmethod
+    @span('catalog.refresh')
+    @transaction.atomic
+    def _refresh(cls, scope: Q) -> int:
+        """Re-derive the entries of products matching `scope`; returns the number upserted."""
+        in_scope = MerchandiseProduct.objects.filter(scope)
+        sellable = in_scope.filter(SELLABLE)
+
+        CatalogEntry.objects.filter(product__in=in_scope.values('pk')).exclude(
+            product__in=sellable.values('pk'),
+        ).delete()
+
+        rows = (
+            sellable
+            .select_related('merchant', 'category', 'category__parent')
+            .annotate(primary_image_name=Subquery(
+                ProductImage.objects.filter(product=OuterRef('pk')).order_by('sort_order', 'id').values('image')[:1]
+            ))
+            .only(
+                'id', 'name', 'price', 'stock', 'video', 'created_at',
+                'merchant__id', 'merchant__business_name', 'merchant__city',
+                'category__id', 'category__name', 'category__parent__id', 'category__parent__name',
+            )
+            .order_by()
+        )
+        upserted, batch = 0, []
+        for product in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(cls._entry(product))
+            if len(batch) == BATCH_SIZE:
+                upserted += cls._upsert(batch)
+                batch = []
+        upserted += cls._upsert(batch)
+
+        transaction.on_commit(cls.bump_generation)
+        return upserted
+
+    @staticmethod
+    def _entry(product) -> CatalogEntry:
+        category, parent = product.category, product.category.parent
+        return CatalogEntry(
+            product_id=product.id,
+            merchant_id=product.merchant.id,
+            merchant_name=product.merchant.business_name,
+            merchant_city=product.merchant.city,
+            category_id=category.id,
+            root_category_id=parent.id if parent else category.id,
+            category_path=f'{parent.name} > {category.name}' if parent else category.name,
+            name=product.name,
+            price=product.price,
+            stock=product.stock,
+            primary_image=product.primary_image_name or '',
+            has_video=bool(product.video),
+            created_at=product.created_at,
+        )
+
+    @staticmethod
+    def _upsert(entries: list) -> int:
+        if not entries:
+            return 0
+        CatalogEntry.objects.bulk_create(
+            entries, update_conflicts=True, unique_fields=['product'], update_fields=_UPDATE_FIELDS,
+        )
+        CatalogEntry.objects.filter(pk__in=[entry.product_id for entry in entries]).update(search_vector=_SEARCH_VECTOR)
+        return len(entries)
+
+    # ── Cache generation ──────────────────────────────────────────────────
+
+    @staticmethod
+    def bump_generation() -> None:
+        # A timestamp rather than a counter: if the key is evicted, the
+        # next value still differs from every generation cached before.
+        cache.set(GENERATION_CACHE_KEY, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def page_cache_key(generation: int, host: str, params: dict) -> str:
+        """Cache key of one catalog page (the host is part of the absolute URLs)."""
+        canonical = json.dumps([host, sorted((name, str(value)) for name, value in params.items())])
+        digest = hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+        return f'catalog:page:{generation}:{digest}'
+
+    @classmethod
+    async def ageneration(cls) -> int:
+        generation = await cache.aget(GENERATION_CACHE_KEY)
+        if generation is None:
+            generation = time.time_ns()
+            if not await cache.aadd(GENERATION_CACHE_KEY, generation, timeout=None):
+                generation = await cache.aget(GENERATION_CACHE_KEY, generation)
+        return generation
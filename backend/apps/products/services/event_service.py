@@ -0,0 +1,325 @@
+"""
+Product Event Service
+=====================
+Live product change events for the merchant dashboard stream
+(GET /api/products/merchant/events/).
+
+    publish(...)       called by ProductService, the product views and the
+                       admin inside the write's transaction: a pg_notify on
+                       PRODUCT_EVENTS_CHANNEL, delivered to every worker
+                       process only if the transaction commits
+    ProductEventHub    per-process pub/sub: one listener thread holds the
+                       process's only LISTEN connection and fans each
+                       notification out to the merchant's Subscriptions,
+                       on their event loop
+    Subscription       one stream's bounded queue (SSE_QUEUE_MAX_EVENTS); a
+                       stream that falls behind is marked lagging instead of
+                       slowing the hub down, and closes so the client resumes
+
+Resume: every SSE_HEARTBEAT_SECONDS the listener reads the change-feed
+watermark (see change_selectors) and, one tick later, queues it to every
+subscription behind the notifications received before it.  Streams send it
+as the SSE event id, so a reconnect with Last-Event-ID replays what it may
+have missed from the change feed.  The one-tick delay covers notifications
+still in flight when the watermark was read.
+
+LISTEN needs a session-level connection: behind PgBouncer's transaction
+pooling (DB_PGBOUNCER) the listener connects to Postgres directly at
+SSE_LISTEN_DB_HOST/PORT, and streams are refused when that is not set.
+
+Idle streams hold no database connection and no thread: a subscription is a
+queue awaited by the stream's coroutine.
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from apps.products.selectors.change_selectors import WATERMARK_SQL
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_EVENTS_CHANNEL = 'product_events'
+
+CREATED, UPDATED, DELETED = 'product.created', 'product.updated', 'product.deleted'
+
+# Postgres caps a notification payload at 8000 bytes.
+IDS_PER_NOTIFY = 400
+
+# Queue message kinds.
+EVENT, WATERMARK, LAGGING, CLOSED = 'event', 'watermark', 'lagging', 'closed'
+
+
+class Subscription:
+    """One stream's queue of (kind, payload) messages; fed on the stream's loop."""
+
+    def __init__(self, merchant_id: int, loop):
+        self.merchant_id = merchant_id
+        self.loop = loop
+        self.lagging = False
+        self.closed = False
+        self._messages = collections.deque()
+        self._ready = asyncio.Event()
+
+    def put(self, message: tuple) -> None:
+        if self.lagging or self.closed:
+            return
+        if message[0] == LAGGING or len(self._messages) >= settings.SSE_QUEUE_MAX_EVENTS:
+            # Keep what is queued; the stream delivers it, then closes.
+            self.lagging = True
+        else:
+            self._messages.append(message)
+        self._ready.set()
+
+    def close(self) -> None:
+        """The client is gone: drop what is queued and end the stream."""
+        self.closed = True
+        self._messages.clear()
+        self._ready.set()
+
+    async def get(self, timeout: float):
+        """
+        Next message; (LAGGING, None) once drained after falling behind;
+        (CLOSED, None) after close(); None on timeout.
+        """
+        if self.closed:
+            return (CLOSED, None)
+        if not self._messages and not self.lagging:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.closed:
+            return (CLOSED, None)
+        if self._messages:
+            return self._messages.popleft()
+        return (LAGGING, None)
+
+
+def new_values(diff: dict) -> dict:
+    """{field: new} from an AuditService.diff() result ({field: [old, new]})."""
+    return {field: new for field, (_, new) in diff.items()}
+
+
+def listen_settings() -> dict:
+    """
+    Connection settings for the LISTEN connection: the default database, or
+    Postgres directly when DB_PGBOUNCER is set.  Raises ImproperlyConfigured
+    if PgBouncer is in use and no direct host is configured.
+    """
+    database = connections.settings[DEFAULT_DB_ALIAS]
+    if settings.SSE_LISTEN_DB_HOST:
+        return {**database, 'HOST': settings.SSE_LISTEN_DB_HOST,
+                'PORT': settings.SSE_LISTEN_DB_PORT or database['PORT']}
+    if settings.DB_PGBOUNCER:
+        raise ImproperlyConfigured(
+            'Live product events need LISTEN, which PgBouncer transaction pooling does not support: '
+            'set SSE_LISTEN_DB_HOST (and SSE_LISTEN_DB_PORT) to Postgres itself.'
+        )
+    return database
+
+
+def _put_all(subscriptions: list, message: tuple) -> None:
+    for subscription in subscriptions:
+        subscription.put(message)
+
+
+class ProductEventHub:
+    """Per-process fan-out of product notifications to stream subscriptions."""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._subscriptions = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._pid = os.getpid()
+
+    # ── Subscriptions (event loop side) ──────────────────────────────────
+
+    def subscribe(self, merchant_id: int) -> Subscription:
+        if self._pid != os.getpid():
+            # Forked (gunicorn preload): the parent's listener is not ours.
+            self._reset()
+        subscription = Subscription(merchant_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[merchant_id].add(subscription)
+        self._start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.merchant_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.merchant_id]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    # ── Fan-out (listener side) ──────────────────────────────────────────
+
+    def dispatch(self, merchant_id: int, message: tuple) -> None:
+        with self._lock:
+            targets = list(self._subscriptions.get(merchant_id, ()))
+        self._deliver(targets, message)
+
+    def broadcast(self, message: tuple) -> None:
+        with self._lock:
+            targets = [s for subscriptions in self._subscriptions.values() for s in subscriptions]
+        self._deliver(targets, message)
+
+    @staticmethod
+    def _deliver(targets: list, message: tuple) -> None:
+        by_loop = collections.defaultdict(list)
+        for subscription in targets:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_put_all, subscriptions, message)
+            except RuntimeError:  # loop closed: its streams are gone
+                pass
+
+    # ── Listener thread ──────────────────────────────────────────────────
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            # close() writes to the pipe to wake the listener out of select().
+            self._wakeup = os.pipe()
+            self._thread = threading.Thread(target=self._run, name='product-events', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                try:
+                    self._listen()
+                except Exception:
+                    logger.exception('Product event listener failed; reconnecting')
+                    # Notifications may have been missed: every stream resumes.
+                    self.broadcast((LAGGING, None))
+                    self._stopping.wait(1)
+        finally:
+            for fd in self._wakeup:
+                os.close(fd)
+
+    def _listen(self) -> None:
+        db = connections.create_connection(DEFAULT_DB_ALIAS)
+        db.settings_dict = listen_settings()
+        try:
+            with db.cursor() as cursor:
+                cursor.execute(f'LISTEN {PRODUCT_EVENTS_CHANNEL}')
+            raw = db.connection
+            watermark, next_tick = None, time.monotonic()
+            while not self._stopping.is_set():
+                readable, _, _ = select.select([raw, self._wakeup[0]], [], [], max(0.0, next_tick - time.monotonic()))
+                if raw in readable:
+                    raw.poll()
+                self._drain(raw)
+                if time.monotonic() >= next_tick:
+                    # Send the previous tick's watermark: everything below it
+                    # committed a full interval ago and has been dispatched.
+                    self.broadcast((WATERMARK, watermark))
+                    with db.cursor() as cursor:
+                        cursor.execute(WATERMARK_SQL)
+                        watermark = cursor.fetchone()[0]
+                    self._drain(raw)
+                    next_tick = time.monotonic() + settings.SSE_HEARTBEAT_SECONDS
+        finally:
+            db.close()
+
+    def _drain(self, raw) -> None:
+        while raw.notifies:
+            notify = raw.notifies.pop(0)
+            try:
+                payload = json.loads(notify.payload)
+            except ValueError:
+                logger.warning('Ignoring malformed product event %r', notify.payload)
+                continue
+            self.dispatch(payload.pop('merchant'), (EVENT, payload))
+
+    def close(self) -> None:
+        """Stop the listener (shutdown, tests); open streams resume elsewhere."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        os.write(self._wakeup[1], b'\0')
+        thread.join(timeout=5)
+        self._thread = None
+        self.broadcast((LAGGING, None))
+
+
+_hub = ProductEventHub()
+
+
+class ProductEventService:
+    """Publishing and subscribing to product change events. All methods are static."""
+
+    @staticmethod
+    def publish(merchant_id: int, event: str, ids, changes: dict = None) -> None:
+        """
+        Notify the merchant's streams that products `ids` were created,
+        updated (`changes`: {field: new value}) or deleted.  Call inside the
+        write's transaction; nothing is sent if it rolls back.
+        """
+        ids = list(ids)
+        if not ids or (event == UPDATED and not changes):
+            return
+        payloads = [
+            json.dumps({'merchant': merchant_id, 'event': event, 'ids': ids[start:start + IDS_PER_NOTIFY],
+                        'changes': changes or {}}, cls=DjangoJSONEncoder)
+            for start in range(0, len(ids), IDS_PER_NOTIFY)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [PRODUCT_EVENTS_CHANNEL, payloads],
+            )
+
+    @staticmethod
+    def available() -> bool:
+        """Whether this deployment can listen for events; logs why not."""
+        try:
+            listen_settings()
+        except ImproperlyConfigured as exc:
+            logger.error('Product event stream disabled: %s', exc)
+            return False
+        return True
+
+    @staticmethod
+    def subscribe(merchant_id: int) -> Subscription:
+        """Subscribe the running event loop's stream to the merchant's events."""
+        return _hub.subscribe(merchant_id)
+
+    @staticmethod
+    def unsubscribe(subscription: Subscription) -> None:
+        _hub.unsubscribe(subscription)
+
+    @staticmethod
+    def subscribers() -> int:
+        return len(_hub)
+
+    @staticmethod
+    def shutdown() -> None:
+        _hub.close()
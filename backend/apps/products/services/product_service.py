@@ -8,11 +8,21 @@ Responsibilities:
   - Enforce image count (3-10), size, and type constraints
   - Enforce video constraints (size, format)
   - Atomic transactions for product + image creation
+  - Publish product events to the merchant's live streams
+  - Expire change-feed tombstones of deleted products
 """
 
 import os
+from datetime import timedelta
+from django.conf import settings
 from django.db import transaction
-from apps.products.models import MerchandiseProduct, ProductImage
+from django.utils import timezone
+from apps.audit.models import AuditEvent
+from apps.audit.services.audit_service import PRODUCT_FIELDS, AuditService
+from apps.products.models import MerchandiseProduct, ProductImage, ProductTombstone
+from apps.products.services.catalog_service import CatalogService
+from apps.products.services.event_service import CREATED, ProductEventService, new_values
+from config.instrumentation import span
 
 ALLOWED_IMAGE_EXTS = {'.jpg', '.jpeg', '.png'}
 ALLOWED_VIDEO_EXTS = {'.mp4'}
@@ -63,6 +73,7 @@ class ProductService:
     # ── Core CRUD ─────────────────────────────────────────────────────────
 
     @classmethod
+    @span('product.create')
     @transaction.atomic
     def create_product(cls, merchant, validated_data: dict, images: list, video=None) -> MerchandiseProduct:
         """
@@ -107,6 +118,10 @@ class ProductService:
         ]
         ProductImage.objects.bulk_create(image_objects)
 
+        CatalogService.refresh_products([product.pk])
+        changes = AuditService.diff(dict.fromkeys(PRODUCT_FIELDS), product, PRODUCT_FIELDS)
+        AuditService.record(AuditEvent.PRODUCT, product.pk, merchant.pk, 'create', changes, actor=merchant)
+        ProductEventService.publish(merchant.pk, CREATED, [product.pk], new_values(changes))
         return product
 
     @classmethod
@@ -116,3 +131,14 @@ class ProductService:
         if not include_archived:
             qs = qs.filter(is_archived=False)
         return qs
+
+    @staticmethod
+    def purge_tombstones() -> int:
+        """
+        Delete tombstones older than PRODUCT_TOMBSTONE_RETENTION_DAYS (plus a
+        day, for transactions still open when a cursor was issued).  Cursors
+        expire after the retention, so no live cursor still needs them.
+        """
+        cutoff = timezone.now() - timedelta(days=settings.PRODUCT_TOMBSTONE_RETENTION_DAYS + 1)
+        deleted, _ = ProductTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        return deleted
@@ -0,0 +1,841 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from importlib import import_module
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils.http import http_date
+from PIL import Image
+
+from apps.audit.services.audit_service import AuditService
+from apps.merchants.models import Merchant
+from apps.products.management.commands import seed_load
+from apps.products.models import CatalogEntry, Category, MerchandiseProduct, ProductImage, ProductTombstone
+from apps.products.services.catalog_service import CatalogService
+from apps.products.services.event_service import ProductEventService, listen_settings
+from apps.products.views import product_video
+from config import benchmarks
+from config.asgi import application as asgi_application
+from config.byte_ranges import MAX_RANGES, parse_range_header
+from config.factories import auth_header, seed_merchant, seed_products
+from config.query_budget import QueryBudgetMixin
+
+
+def jpeg_upload(name: str) -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class CategoryQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Category tree must load in a fixed number of queries"""
+
+    def test_category_list(self):
+        """Test categories with nested children stay within budget"""
+        with self.assertMaxQueries(3):
+            response = self.client.get('/api/products/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any(category['children'] for category in response.json()['data']))
+
+
+class ProductQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Merchant product endpoints must not issue per-row queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.merchant = seed_merchant()
+        cls.products = seed_products(cls.merchant, 60)
+
+    def setUp(self):
+        self.auth = auth_header(self.merchant)
+
+    def _list(self, size, **params):
+        response = self.client.get('/api/products/merchant/', {'page_size': size, **params}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_budget(self):
+        """Test the product list stays within budget"""
+        with self.assertMaxQueries(4):
+            response = self._list(20)
+        product = response.json()['data'][0]
+        self.assertEqual(len(product['images']), 3)
+        self.assertTrue(product['primary_image_url'].endswith('-0.jpg'))
+
+    def test_list_constant_in_page_size(self):
+        """Test list queries do not grow with page size"""
+        self.assertQueryCountConstant(self._list, sizes=(1, 10, 60))
+        self.assertQueryCountConstant(
+            lambda size: self._list(size, status='active', order_by='-price', search='Product'),
+            sizes=(1, 60),
+        )
+
+    def test_detail_budget(self):
+        """Test product detail stays within budget"""
+        with self.assertMaxQueries(3):
+            response = self.client.get(f'/api/products/merchant/{self.products[0].id}/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_patch_budget(self):
+        """Test product PATCH stays within budget"""
+        # 4 for the update, 4 for the catalog refresh, 3 for the event
+        # (pg_notify and the savepoint pair of its transaction).
+        with self.assertMaxQueries(11):
+            response = self.client.patch(
+                f'/api/products/merchant/{self.products[0].id}/',
+                {'stock': 5},
+                content_type='application/json',
+                **self.auth,
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_action_constant_in_ids(self):
+        """Test bulk updates do not grow with the number of ids"""
+        def bulk(size):
+            ids = [product.id for product in self.products[:size]]
+            # Products already inactive would publish no event.
+            MerchandiseProduct.objects.filter(id__in=ids).update(is_active=True)
+            response = self.client.post(
+                '/api/products/merchant/bulk-action/',
+                {'action': 'deactivate', 'ids': ids},
+                content_type='application/json',
+                **self.auth,
+            )
+            self.assertEqual(response.status_code, 200)
+
+        # 1 to reset, 3 for the update, 4 for the catalog refresh, 3 for the
+        # event (pg_notify and the savepoint pair of its transaction).
+        with self.assertMaxQueries(11):
+            bulk(5)
+        self.assertQueryCountConstant(bulk, sizes=(1, 50))
+
+    def test_bulk_delete_constant_in_ids(self):
+        """Test bulk delete (with cascading images) does not grow with ids"""
+        def bulk_delete(size):
+            start = 0 if size == 1 else 1
+            ids = [product.id for product in self.products[start:start + size]]
+            response = self.client.post(
+                '/api/products/merchant/bulk-action/',
+                {'action': 'delete', 'ids': ids},
+                content_type='application/json',
+                **self.auth,
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertQueryCountConstant(bulk_delete, sizes=(1, 40))
+
+    def test_create_constant_in_images(self):
+        """Test product creation does not issue a query per image"""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root.name))
+        category = Category.objects.filter(parent__isnull=False).first()
+
+        def create(image_count):
+            response = self.client.post(
+                '/api/products/merchant/create/',
+                {
+                    'name': f'New {image_count}',
+                    'category': category.id,
+                    'price': '99.50',
+                    'stock': 3,
+                    'images': [jpeg_upload(f'img{idx}.jpg') for idx in range(image_count)],
+                },
+                **self.auth,
+            )
+            self.assertEqual(response.status_code, 201, response.content)
+
+        # 8 for the product and images, 4 for the catalog refresh, 1 for the event.
+        with self.assertMaxQueries(13):
+            create(3)
+        self.assertQueryCountConstant(create, sizes=(3, 10))
+
+
+class ProductBatchTests(QueryBudgetMixin, TestCase):
+    """Batch lookup: requested order, missing ids and a fixed query count"""
+
+    URL = '/api/products/merchant/batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.merchant = seed_merchant()
+        cls.products = seed_products(cls.merchant, 40)
+        cls.foreign = seed_products(seed_merchant('2'), 1)[0]
+
+    def setUp(self):
+        self.auth = auth_header(self.merchant)
+
+    def test_order_duplicates_and_missing(self):
+        """Test ids come back in request order, once, with unknown and foreign ids missing"""
+        first, second, third = (product.pk for product in self.products[:3])
+        ids = [third, 999999, first, third, self.foreign.pk, second]
+        response = self.client.get(self.URL, {'ids': ','.join(map(str, ids))}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([product['id'] for product in body['data']], [third, first, second])
+        self.assertEqual(body['missing'], [999999, self.foreign.pk])
+        self.assertEqual(len(body['data'][0]['images']), 3)
+
+        posted = self.client.post(self.URL, {'ids': ids}, content_type='application/json', **self.auth).json()
+        self.assertEqual(posted, body)
+
+    def test_query_count_is_constant(self):
+        """Test any number of ids costs the same queries"""
+        def batch(size):
+            ids = [product.pk for product in self.products[:size]]
+            response = self.client.post(self.URL, {'ids': ids}, content_type='application/json', **self.auth)
+            self.assertEqual(len(response.json()['data']), size)
+
+        # 1 for the merchant, 1 for the products and categories, 1 for images.
+        with self.assertMaxQueries(3):
+            batch(10)
+        self.assertQueryCountConstant(batch, sizes=(1, 40))
+
+    def test_rejects_bad_input(self):
+        """Test empty, malformed and oversized id lists are rejected"""
+        for params in ({}, {'ids': ''}, {'ids': '1,x'}, {'ids': ','.join(map(str, range(1, 302)))}):
+            self.assertEqual(self.client.get(self.URL, params, **self.auth).status_code, 400, params)
+        self.assertEqual(self.client.post(self.URL, {'ids': 'nope'}, content_type='application/json',
+                                          **self.auth).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'ids': '1'}).status_code, 403)
+
+
+class CatalogTests(QueryBudgetMixin, TestCase):
+    """Public catalog: sellable products only, kept current by the write paths"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.merchant = seed_merchant()
+        cls.merchant.status = Merchant.APPROVED
+        cls.merchant.save(update_fields=['status'])
+        cls.products = seed_products(cls.merchant, 40)
+        cls.pending = seed_merchant('2')
+        seed_products(cls.pending, 4)
+        CatalogService.rebuild()
+        cls.verified = [product for product in cls.products if product.is_verified]
+
+    def _catalog(self, **params):
+        response = self.client.get('/api/products/catalog/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def _ids(self, **params):
+        return {entry['id'] for entry in self._catalog(page_size=60, **params)['data']}
+
+    def _walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            page = self._catalog(page_size=7, **params, **({'cursor': cursor} if cursor else {}))
+            ids.extend(entry['id'] for entry in page['data'])
+            cursor = page['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_only_sellable_products(self):
+        """Test unverified products and unapproved merchants are left out"""
+        self.assertEqual(self._ids(), {product.id for product in self.verified})
+        entry = self._catalog(page_size=1)['data'][0]
+        self.assertEqual(entry['merchant']['name'], 'Shop 1')
+        self.assertIn(' > ', entry['category']['path'])
+        self.assertTrue(entry['primary_image_url'].endswith('-0.jpg'))
+
+    def test_migration_fills_existing_products(self):
+        """Test the catalog migration's backfill matches a rebuild"""
+        fields = ['product_id', 'merchant_name', 'category_path', 'price', 'primary_image', 'search_vector']
+        rebuilt = list(CatalogEntry.objects.order_by('pk').values_list(*fields))
+        CatalogEntry.objects.all().delete()
+
+        import_module('apps.products.migrations.0003_catalog_entry').fill_catalog(django_apps, None)
+        self.assertEqual(list(CatalogEntry.objects.order_by('pk').values_list(*fields)), rebuilt)
+        self.assertEqual(len(rebuilt), len(self.verified))
+
+    def test_product_writes_refresh_entries(self):
+        """Test PATCH and bulk actions add and remove catalog entries"""
+        auth = auth_header(self.merchant)
+        first, second = self.verified[0], self.verified[1]
+        self.client.patch(f'/api/products/merchant/{first.id}/', {'is_active': False},
+                          content_type='application/json', **auth)
+        self.client.post('/api/products/merchant/bulk-action/', {'action': 'archive', 'ids': [second.id]},
+                         content_type='application/json', **auth)
+        self.assertFalse(CatalogEntry.objects.filter(pk__in=[first.id, second.id]).exists())
+
+        self.client.patch(f'/api/products/merchant/{first.id}/', {'is_active': True, 'stock': 99},
+                          content_type='application/json', **auth)
+        self.assertEqual(CatalogEntry.objects.get(pk=first.id).stock, 99)
+
+    def test_merchant_and_category_refresh(self):
+        """Test merchant status and category activity changes reach the catalog"""
+        Merchant.objects.filter(pk=self.merchant.pk).update(status=Merchant.SUSPENDED, business_name='Renamed')
+        CatalogService.refresh_merchant(self.merchant.pk)
+        self.assertFalse(CatalogEntry.objects.exists())
+
+        Merchant.objects.filter(pk=self.merchant.pk).update(status=Merchant.APPROVED)
+        CatalogService.refresh_merchant(self.merchant.pk)
+        self.assertEqual(set(CatalogEntry.objects.values_list('merchant_name', flat=True)), {'Renamed'})
+
+        parent = self.verified[0].category.parent
+        Category.objects.filter(pk=parent.pk).update(is_active=False)
+        CatalogService.refresh_category(parent.pk)
+        self.assertFalse(CatalogEntry.objects.filter(root_category=parent).exists())
+        self.assertTrue(CatalogEntry.objects.exists())
+
+    def test_cursor_pages_cover_catalog_once(self):
+        """Test keyset paging visits every entry exactly once, ties included"""
+        MerchandiseProduct.objects.filter(pk__in=[product.id for product in self.verified[:6]]).update(price=25)
+        CatalogService.rebuild()
+        expected = sorted(product.id for product in self.verified)
+        for sort in ('newest', 'price_asc', 'price_desc'):
+            ids = self._walk(sort=sort)
+            self.assertEqual(sorted(ids), expected, sort)
+        prices = [float(entry['price']) for entry in self._catalog(sort='price_desc', page_size=60)['data']]
+        self.assertEqual(prices, sorted(prices, reverse=True))
+
+    def test_search_and_filters(self):
+        """Test full-text search and the category, price and stock filters"""
+        product = self.verified[3]
+        self.assertIn(product.id, self._ids(q=f'"{product.name}"'))
+        self.assertEqual(self._ids(q='Shop 1'), {p.id for p in self.verified})
+        self.assertEqual(self._ids(q='nonexistentword'), set())
+
+        root = product.category.parent
+        self.assertEqual(
+            self._ids(category=root.id),
+            {p.id for p in self.verified if p.category.parent_id == root.id},
+        )
+        self.assertEqual(self._ids(min_price=20, max_price=30), {p.id for p in self.verified if 20 <= p.price <= 30})
+        self.assertEqual(self._ids(in_stock='true'), {p.id for p in self.verified if p.stock > 0})
+
+    def test_invalid_cursor(self):
+        """Test tampered cursors and cursors from another sort are rejected"""
+        cursor = self._catalog(page_size=2)['next_cursor']
+        for params in ({'cursor': cursor + 'x'}, {'cursor': cursor, 'sort': 'price_asc'}, {'page_size': 0}):
+            response = self.client.get('/api/products/catalog/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    @override_settings(AUDIT_BACKGROUND_FLUSH=False)
+    def test_cached_pages_follow_generation(self):
+        """Test pages are served from cache until the catalog changes"""
+        self.addCleanup(AuditService.flush)  # the PATCH below is audited
+        first = self._catalog()
+        with self.assertMaxQueries(2):
+            response = self.client.get('/api/products/catalog/')
+        self.assertEqual(response.json(), first)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=30')
+
+        product_id = first['data'][0]['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/products/merchant/{product_id}/', {'stock': 123},
+                              content_type='application/json', **auth_header(self.merchant))
+        self.assertEqual(self._catalog()['data'][0]['stock'], 123)
+
+    def test_browse_constant_in_page_size(self):
+        """Test catalog pages do not issue per-row queries"""
+        self._catalog()  # creates the cache generation
+        self.assertQueryCountConstant(lambda size: self._catalog(page_size=size, q='Product'), sizes=(1, 60))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], AUDIT_BACKGROUND_FLUSH=False)
+class ProductChangesTests(QueryBudgetMixin, TransactionTestCase):
+    """Delta sync feed: ordered changes, tombstones and the in-flight watermark"""
+
+    URL = '/api/products/merchant/changes/'
+
+    def setUp(self):
+        # TransactionTestCase flushes the migration-seeded categories.
+        parent = Category.objects.create(name='Sync', slug='sync')
+        Category.objects.create(name='Sync Child', slug='sync-child', parent=parent)
+        self.merchant = seed_merchant('1')
+        self.auth = auth_header(self.merchant)
+
+    def _sync(self, since=None, limit=100):
+        """Follow next_cursor until caught up; returns (changed ids, deleted ids, cursor)."""
+        changed, deleted = [], []
+        while True:
+            params = {'limit': limit, **({'since': since} if since else {})}
+            body = self.client.get(self.URL, params, **self.auth).json()
+            changed += [product['id'] for product in body['data']['changed']]
+            deleted += body['data']['deleted']
+            since = body['next_cursor']
+            if not body['has_more']:
+                return changed, deleted, since
+
+    def test_full_then_incremental_sync(self):
+        """Test a full sync pages everything, then only later changes and deletes arrive"""
+        products = seed_products(self.merchant, 7, images_per_product=1)
+        seed_products(seed_merchant('2'), 3, images_per_product=1)
+        ids = [product.pk for product in products]
+
+        changed, deleted, cursor = self._sync(limit=3)
+        self.assertEqual(changed, ids)
+        self.assertEqual(deleted, [])
+        self.assertEqual(self._sync(cursor)[:2], ([], []))
+
+        self.client.patch(f'/api/products/merchant/{ids[4]}/', {'stock': 50},
+                          content_type='application/json', **self.auth)
+        self.client.delete(f'/api/products/merchant/{ids[1]}/', **self.auth)
+        self.client.post('/api/products/merchant/bulk-action/', {'action': 'delete', 'ids': ids[5:]},
+                         content_type='application/json', **self.auth)
+
+        body = self.client.get(self.URL, {'since': cursor}, **self.auth).json()
+        self.assertEqual([product['id'] for product in body['data']['changed']], [ids[4], ids[1]])
+        self.assertTrue(body['data']['changed'][1]['is_archived'])
+        self.assertEqual(body['data']['deleted'], ids[5:])
+        self.assertEqual(ProductTombstone.objects.filter(merchant_id=self.merchant.pk).count(), 2)
+
+    def test_open_transaction_holds_back_later_commits(self):
+        """Test a change committed after a newer one is still delivered"""
+        first, second = seed_products(self.merchant, 2, images_per_product=1)
+        cursor = self._sync()[2]
+        written, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            # Older transaction id, commits last.
+            with transaction.atomic():
+                MerchandiseProduct.objects.filter(pk=first.pk).update(stock=99)
+                written.set()
+                release.wait(5)
+            connection.close()
+
+        thread = threading.Thread(target=slow_writer)
+        thread.start()
+        written.wait(5)
+        MerchandiseProduct.objects.filter(pk=second.pk).update(stock=98)
+
+        changed, _, cursor = self._sync(cursor)
+        self.assertEqual(changed, [])  # second waits behind the open transaction
+
+        release.set()
+        thread.join()
+        self.assertEqual(self._sync(cursor)[0], [first.pk, second.pk])
+
+    def test_query_count_is_constant(self):
+        """Test the feed costs the same number of queries for any page size"""
+        seed_products(self.merchant, 12, images_per_product=2)
+        self.assertQueryCountConstant(
+            lambda size: self.client.get(self.URL, {'limit': size}, **self.auth), sizes=(2, 10),
+        )
+
+    def test_bad_and_expired_cursors(self):
+        """Test tampered cursors are rejected and old ones must resync"""
+        self.assertEqual(self.client.get(self.URL, {'since': 'nope'}, **self.auth).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'limit': 0}, **self.auth).status_code, 400)
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+
+        cursor = self._sync()[2]
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 31 * 86400):
+            response = self.client.get(self.URL, {'since': cursor}, **self.auth)
+        self.assertEqual(response.status_code, 410)
+
+    def test_purge_expired_tombstones(self):
+        """Test purge_product_tombstones drops only tombstones past retention"""
+        old, recent = seed_products(self.merchant, 2, images_per_product=0)
+        MerchandiseProduct.objects.filter(pk__in=[old.pk, recent.pk]).delete()
+        ProductTombstone.objects.filter(product_id=old.pk).update(deleted_at='2020-01-01T00:00:00Z')
+
+        call_command('purge_product_tombstones', stdout=StringIO())
+        self.assertEqual(list(ProductTombstone.objects.values_list('product_id', flat=True)), [recent.pk])
+
+
+def sse_frames(chunk: bytes) -> list:
+    """Parse SSE frames into dicts of their fields; comments become {'comment': ...}."""
+    frames = []
+    for block in chunk.decode().strip('\n').split('\n\n'):
+        frame = {}
+        for line in block.split('\n'):
+            name, _, value = line.partition(': ')
+            frame[name or 'comment'] = value
+        frames.append(frame)
+    return frames
+
+
+@override_settings(SSE_HEARTBEAT_SECONDS=0.05, AUDIT_BACKGROUND_FLUSH=False)
+class ProductEventStreamTests(TransactionTestCase):
+    """Live SSE stream: pushed events, heartbeats, Last-Event-ID resume and backpressure"""
+
+    URL = '/api/products/merchant/events/'
+
+    def setUp(self):
+        parent = Category.objects.create(name='Live', slug='live')
+        Category.objects.create(name='Live Child', slug='live-child', parent=parent)
+        self.merchant = seed_merchant('1')
+        self.products = seed_products(self.merchant, 3, images_per_product=1)
+        self.auth = auth_header(self.merchant)
+        self.addCleanup(ProductEventService.shutdown)
+
+    async def _open(self, **headers):
+        token = self.auth['HTTP_AUTHORIZATION']
+        response = await self.async_client.get(self.URL, headers={'Authorization': token, **headers})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.streaming_content
+
+    async def _next(self, stream, wanted):
+        """Skip frames until one has the `wanted` field."""
+        while True:
+            for frame in sse_frames(await asyncio.wait_for(anext(stream), 5)):
+                if wanted in frame:
+                    return frame
+
+    async def _write(self, method, path, data=None):
+        response = await sync_to_async(getattr(self.client, method))(
+            path, data, content_type='application/json', **self.auth,
+        )
+        self.assertLess(response.status_code, 300)
+
+    async def test_pushes_changes_and_resumes(self):
+        """Test writes are pushed live and a reconnect replays what was missed"""
+        first, second, third = (product.pk for product in self.products)
+        stream = await self._open()
+        self.assertEqual((await self._next(stream, 'retry'))['retry'], '3000')
+        await self._next(stream, 'id')
+        self.assertEqual(await sync_to_async(ProductEventService.subscribers)(), 1)
+
+        await self._write('patch', f'/api/products/merchant/{first}/', {'stock': 9})
+        frame = await self._next(stream, 'event')
+        self.assertEqual(frame['event'], 'product.updated')
+        self.assertEqual(json.loads(frame['data']), {'ids': [first], 'changes': {'stock': 9}})
+
+        await self._write('post', '/api/products/merchant/bulk-action/', {'action': 'delete', 'ids': [third]})
+        frame = await self._next(stream, 'event')
+        self.assertEqual((frame['event'], json.loads(frame['data'])['ids']), ('product.deleted', [third]))
+
+        # Heartbeats advance the resume position past everything delivered.
+        while True:
+            frame = await self._next(stream, 'id')
+            if 'event' not in frame:
+                break
+        await stream.aclose()
+
+        await self._write('delete', f'/api/products/merchant/{second}/')
+        stream = await self._open(**{'Last-Event-ID': frame['id']})
+        frame = await self._next(stream, 'event')
+        self.assertEqual(frame['event'], 'product.sync')
+        replayed = json.loads(frame['data'])
+        self.assertEqual([product['id'] for product in replayed['changed']], [second])
+        self.assertTrue(replayed['changed'][0]['is_archived'])
+        await stream.aclose()
+
+    async def test_bad_last_event_id_asks_for_resync(self):
+        """Test an unusable Last-Event-ID gets a resync event with a fresh id"""
+        stream = await self._open(**{'Last-Event-ID': 'garbage'})
+        frame = await self._next(stream, 'event')
+        self.assertEqual(frame['event'], 'resync')
+        self.assertIn('id', frame)
+        await stream.aclose()
+
+    async def test_disconnect_drops_subscription(self):
+        """Test a client that goes away is unsubscribed at once, not at the stream deadline"""
+        communicator = ApplicationCommunicator(asgi_application, {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': self.URL, 'raw_path': self.URL.encode(), 'query_string': b'',
+            'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver'), (b'authorization', self.auth['HTTP_AUTHORIZATION'].encode())],
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b'', 'more_body': False})
+        self.assertEqual((await communicator.receive_output(5))['status'], 200)
+        await communicator.receive_output(5)  # retry frame
+        self.assertEqual(await sync_to_async(ProductEventService.subscribers)(), 1)
+
+        await communicator.send_input({'type': 'http.disconnect'})
+
+        async def body_ends():
+            while (await communicator.receive_output(5)).get('more_body', False):
+                pass
+
+        await asyncio.wait_for(body_ends(), 5)  # SSE_STREAM_MAX_SECONDS is 600
+        await communicator.wait(5)
+        self.assertEqual(await sync_to_async(ProductEventService.subscribers)(), 0)
+
+    @override_settings(SSE_QUEUE_MAX_EVENTS=3, SSE_HEARTBEAT_SECONDS=30)
+    async def test_slow_stream_is_closed_not_buffered(self):
+        """Test a stream that falls behind ends (client resumes) instead of growing"""
+        stream = await self._open()
+        await self._next(stream, 'id')
+        for stock in range(1, 6):
+            await self._write('patch', f'/api/products/merchant/{self.products[0].pk}/', {'stock': stock})
+        await asyncio.sleep(0.3)
+
+        events = []
+        async for chunk in stream:
+            events += [frame['event'] for frame in sse_frames(chunk) if 'event' in frame]
+        self.assertLessEqual(len(events), 3)
+        self.assertEqual(set(events), {'product.updated'})
+        self.assertEqual(await sync_to_async(ProductEventService.subscribers)(), 0)
+
+    def test_requires_merchant_and_asgi(self):
+        """Test anonymous requests are refused and WSGI cannot hold streams"""
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+        self.assertEqual(self.client.get(self.URL, **self.auth).status_code, 501)
+
+    @override_settings(DB_PGBOUNCER=True, SSE_LISTEN_DB_HOST='')
+    async def test_refused_behind_pgbouncer_without_direct_host(self):
+        """Test PgBouncer without SSE_LISTEN_DB_HOST refuses streams and logs why"""
+        with self.assertLogs('apps.products.services.event_service', 'ERROR'):
+            response = await self.async_client.get(
+                self.URL, headers={'Authorization': self.auth['HTTP_AUTHORIZATION']},
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(await sync_to_async(ProductEventService.subscribers)(), 0)
+
+    def test_listener_bypasses_pgbouncer(self):
+        """Test the LISTEN connection goes to SSE_LISTEN_DB_HOST, not DB_HOST"""
+        with override_settings(DB_PGBOUNCER=True, SSE_LISTEN_DB_HOST='postgres-direct', SSE_LISTEN_DB_PORT='5433'):
+            database = listen_settings()
+        self.assertEqual((database['HOST'], database['PORT']), ('postgres-direct', '5433'))
+        self.assertEqual(database['NAME'], connection.settings_dict['NAME'])
+        with override_settings(DB_PGBOUNCER=True, SSE_LISTEN_DB_HOST=''):
+            self.assertRaises(ImproperlyConfigured, listen_settings)
+        with override_settings(DB_PGBOUNCER=False, SSE_LISTEN_DB_HOST=''):
+            self.assertEqual(listen_settings()['HOST'], connection.settings_dict['HOST'])
+
+
+class BenchmarkHarnessTests(TestCase):
+    """Smoke test for the bench_api scenarios and baseline comparison"""
+
+    def test_every_scenario_runs(self):
+        """Test each scenario succeeds and reports percentiles and queries"""
+        merchant = benchmarks.seed_catalog(30)
+        results = benchmarks.run_benchmarks(merchant, rounds=2, warmup=0)
+
+        self.assertEqual(len(results), len(benchmarks.PRODUCT_LIST_VARIANTS) + 6)
+        for name, result in results.items():
+            with self.subTest(scenario=name):
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertGreater(result['queries_per_request'], 0)
+
+    def test_baseline_comparison(self):
+        """Test slower p95 and extra queries are reported as regressions"""
+        baseline = {'list': {'p95_ms': 10.0, 'queries_per_request': 4}}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'baseline.json'
+            path.write_text(json.dumps({'scale': 1000, 'results': baseline}))
+
+            ok = benchmarks.compare_to_baseline(path, {'list': {'p95_ms': 11.0, 'queries_per_request': 4}}, 1.2)
+            slow = benchmarks.compare_to_baseline(path, {'list': {'p95_ms': 13.0, 'queries_per_request': 5}}, 1.2)
+
+        self.assertEqual(ok, [])
+        self.assertEqual(len(slow), 2)
+
+    def test_json_codec_benchmark_runs(self):
+        """Test the bench_json comparison reports every codec"""
+        results = benchmarks.benchmark_json_codecs(rounds=3, items=5)
+        self.assertEqual(set(results), {'render_stdlib', 'render_orjson', 'parse_stdlib', 'parse_orjson'})
+        for result in results.values():
+            self.assertGreater(result['mb_per_s'], 0)
+
+    def test_profile_startup_command_reports_json(self):
+        """Test profile_startup reports time, URL modules and heavy imports"""
+        out = StringIO()
+        call_command('profile_startup', '--target', 'wsgi', '--json', '--check', stdout=out)
+        [report] = json.loads(out.getvalue())
+        self.assertEqual(report['target'], 'wsgi')
+        self.assertLess(report['seconds'], report['budget_seconds'])
+        self.assertEqual(report['heavy_modules'], [])
+        self.assertIn('config.urls', dict(report['by_url_module']))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SeedLoadTests(TransactionTestCase):
+    """seed_load must produce valid, deterministic rows via COPY"""
+
+    def setUp(self):
+        # TransactionTestCase flushes the migration-seeded categories.
+        if not Category.objects.exists():
+            Category.objects.create(name='Load Category', slug='load-category')
+
+    def test_chunks_are_deterministic(self):
+        """Test the same seed and chunk always generate the same rows"""
+        plan = seed_load.LoadPlan(
+            seed=1, merchants=4, chunk_size=2, products_per_merchant=2, images_per_product=3,
+            merchant_start=1, product_start=1, image_start=1, category_ids=(1, 2),
+            business_categories=('Fresh Produce', 'Beverages'), password_hash='x',
+        )
+        first = [buffer.buffer.getvalue() for buffer in seed_load.generate_chunk(plan, 1)]
+        second = [buffer.buffer.getvalue() for buffer in seed_load.generate_chunk(plan, 1)]
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, [buffer.buffer.getvalue() for buffer in seed_load.generate_chunk(plan, 0)])
+
+    def test_load(self):
+        """Test merchants, products and images are loaded and valid"""
+        call_command('seed_load', merchants=5, products_per_merchant=4, chunk_size=2, workers=2, stdout=StringIO())
+
+        self.assertEqual(Merchant.objects.count(), 5)
+        self.assertEqual(MerchandiseProduct.objects.count(), 20)
+        self.assertEqual(ProductImage.objects.count(), 60)
+        merchant = Merchant.objects.order_by('id').first()
+        merchant.full_clean(exclude=['password'])
+        self.assertTrue(merchant.check_password('Load-Passw0rd!'))
+
+        # Sequences were advanced past the loaded ids.
+        loaded_max_id = Merchant.objects.order_by('-id').values_list('id', flat=True)[0]
+        self.assertGreater(seed_merchant('9').id, loaded_max_id)
+
+
+class RangeHeaderTests(SimpleTestCase):
+    """Parsing of Range headers against a 1000-byte file"""
+
+    def test_parse(self):
+        cases = {
+            'bytes=0-499': [(0, 499)],
+            'bytes=500-': [(500, 999)],
+            'bytes=-200': [(800, 999)],
+            'bytes=-2000': [(0, 999)],
+            'bytes=900-5000': [(900, 999)],
+            'bytes=0-99, 200-299': [(0, 99), (200, 299)],
+            'bytes=200-299, 0-99': [(0, 99), (200, 299)],
+            'bytes=0-99,100-199,150-250': [(0, 250)],
+            'bytes=1000-': [],
+            'bytes=-0': [],
+            'bytes=5000-6000, 2000-': [],
+            'items=0-1': None,
+            'bytes=abc': None,
+            'bytes=9-1': None,
+            'bytes=': None,
+            'bytes=-': None,
+            ', '.join(['bytes=0-0'] + [f'{idx * 2}-{idx * 2}' for idx in range(1, MAX_RANGES + 1)]): None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header):
+                self.assertEqual(parse_range_header(header, 1000), expected)
+
+
+class ProductVideoTests(TestCase):
+    """Range streaming of product videos"""
+
+    VIDEO = bytes(range(256)) * 40  # 10 240 bytes
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root.name, PROTECTED_MEDIA_SERVER=''))
+
+        self.merchant = seed_merchant()
+        self.product = seed_products(self.merchant, 1, images_per_product=0)[0]
+        self.product.video.save('clip.mp4', ContentFile(self.VIDEO), save=True)
+        self.url = f'/api/products/{self.product.pk}/video/'
+
+    def _get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_response(self):
+        """Test a plain GET returns the whole file and advertises ranges"""
+        response, body = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.VIDEO)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(int(response['Content-Length']), len(self.VIDEO))
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_single_range(self):
+        """Test 206 with Content-Range and exactly the requested bytes"""
+        response, body = self._get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.VIDEO)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(body, self.VIDEO[100:200])
+
+        response, body = self._get(HTTP_RANGE='bytes=-16')
+        self.assertEqual(body, self.VIDEO[-16:])
+
+    def test_single_range_is_sendfile_ready(self):
+        """Test the streamed file is positioned at the range start for os.sendfile"""
+        # The test client re-wraps streaming content, so call the view directly.
+        request = RequestFactory().get(self.url, HTTP_RANGE='bytes=4096-')
+        response = product_video(request, pk=self.product.pk)
+        filelike = response.file_to_stream
+        self.addCleanup(filelike.close)
+        self.assertEqual(os.lseek(filelike.fileno(), 0, os.SEEK_CUR), 4096)
+        self.assertEqual(int(response['Content-Length']), len(self.VIDEO) - 4096)
+
+    def test_multi_range(self):
+        """Test multipart/byteranges with one part per coalesced range"""
+        response, body = self._get(HTTP_RANGE='bytes=0-9, 20-29, 25-39')
+        self.assertEqual(response.status_code, 206)
+        content_type = response['Content-Type']
+        self.assertTrue(content_type.startswith('multipart/byteranges; boundary='))
+        boundary = content_type.split('boundary=')[1]
+        self.assertEqual(int(response['Content-Length']), len(body))
+
+        parts = body.split(f'--{boundary}'.encode())[1:-1]
+        self.assertEqual(len(parts), 2)
+        headers, data = parts[1].split(b'\r\n\r\n', 1)
+        self.assertIn(f'Content-Range: bytes 20-39/{len(self.VIDEO)}'.encode(), headers)
+        self.assertEqual(data[:-2], self.VIDEO[20:40])
+
+    def test_unsatisfiable_range(self):
+        """Test 416 with the full length"""
+        response, _ = self._get(HTTP_RANGE=f'bytes={len(self.VIDEO)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.VIDEO)}')
+
+    def test_if_range(self):
+        """Test ranges apply only while If-Range names the current version"""
+        etag = self._get()[0]['ETag']
+        response, body = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+        response, body = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.VIDEO)
+
+        response, _ = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='W/' + etag)
+        self.assertEqual(response.status_code, 200)
+
+        last_modified = self._get()[0]['Last-Modified']
+        response, _ = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+        response, _ = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        """Test If-None-Match revalidation answers 304"""
+        etag = self._get()[0]['ETag']
+        response, body = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b'')
+
+    def test_head(self):
+        """Test HEAD reports the length without a body"""
+        response = self.client.head(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response.content, b'')
+
+    def test_unpublished_video_is_owner_only(self):
+        """Test archived products' videos need the owner's token"""
+        self.product.is_archived = True
+        self.product.save(update_fields=['is_archived'])
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        response = self.client.get(self.url, **auth_header(self.merchant))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=0')
+
+    def test_offloaded_to_front_server(self):
+        """Test nginx handles ranges itself via X-Accel-Redirect"""
+        with self.settings(PROTECTED_MEDIA_SERVER='nginx'):
+            response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.product.video.name}')
+
+    def test_serializer_links_stream(self):
+        """Test product payloads point players at the range endpoint"""
+        response = self.client.get(f'/api/products/merchant/{self.product.pk}/', **auth_header(self.merchant))
+        self.assertEqual(response.json()['data']['video_stream_url'], f'http://testserver{self.url}')
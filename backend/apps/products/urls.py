@@ -1,10 +1,15 @@
 from django.urls import path
 from apps.products.views import (
+    CatalogView,
     CategoryListView,
     MerchandiseProductListView,
     MerchandiseProductCreateView,
+    MerchandiseProductBatchView,
     MerchandiseProductBulkActionView,
+    MerchandiseProductChangesView,
+    MerchandiseProductEventsView,
     MerchandiseProductDetailView,
+    product_video,
 )
 
 app_name = 'products'
@@ -12,10 +17,17 @@ app_name = 'products'
 urlpatterns = [
     # Categories (public)
     path('categories/', CategoryListView.as_view(), name='category-list'),
+    path('catalog/', CatalogView.as_view(), name='catalog'),
 
     # Merchant product endpoints (auth required)
     path('merchant/', MerchandiseProductListView.as_view(), name='product-list'),
     path('merchant/create/', MerchandiseProductCreateView.as_view(), name='product-create'),
+    path('merchant/batch/', MerchandiseProductBatchView.as_view(), name='product-batch'),
+    path('merchant/changes/', MerchandiseProductChangesView.as_view(), name='product-changes'),
+    path('merchant/events/', MerchandiseProductEventsView.as_view(), name='product-events'),
     path('merchant/bulk-action/', MerchandiseProductBulkActionView.as_view(), name='product-bulk-action'),
     path('merchant/<int:pk>/', MerchandiseProductDetailView.as_view(), name='product-detail'),
+
+    # Product media (public for active products; HTTP Range for seeking)
+    path('<int:pk>/video/', product_video, name='product-video'),
 ]
@@ -8,36 +8,74 @@ All product-write endpoints require a valid Merchant JWT.
 
 Endpoints:
   GET  /api/products/categories/           – public category list
+  GET  /api/products/catalog/              – public cross-merchant catalog (cursor paged)
   GET  /api/products/merchant/             – paginated, filtered product list
+  GET  /api/products/merchant/batch/       – several products by id (?ids=1,2,3)
+  POST /api/products/merchant/batch/       – same, ids in the body (large sets)
+  GET  /api/products/merchant/changes/     – delta sync feed (changes since a cursor)
+  GET  /api/products/merchant/events/      – live change events (Server-Sent Events)
   POST /api/products/merchant/create/      – create product
   POST /api/products/merchant/bulk-action/ – bulk archive/delete/activate
   GET  /api/products/merchant/<pk>/        – single product
   PATCH /api/products/merchant/<pk>/       – partial update (status flags)
   DELETE /api/products/merchant/<pk>/      – soft-delete (archive)
+  GET  /api/products/<pk>/video/           – video stream (HTTP Range)
+
+Read-heavy endpoints (categories, catalog, list, batch, detail) are AsyncAPIViews
+using the async ORM; uploads and bulk writes stay synchronous.  Every write
+refreshes the affected catalog entries (CatalogService), is recorded in the
+audit log (AuditService) and is published to the merchant's event streams
+(ProductEventService).
 """
 
+import asyncio
 import math
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import AllowAny
-
-from apps.products.models import Category, MerchandiseProduct
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from apps.audit.models import AuditEvent
+from apps.audit.services.audit_service import PRODUCT_FIELDS, AuditService
+from apps.products.models import MerchandiseProduct
 from apps.products.serializers.product_serializers import (
+    CatalogEntrySerializer,
+    CatalogQuerySerializer,
     CategorySerializer,
     MerchandiseProductSerializer,
     MerchandiseProductCreateSerializer,
+    ProductBatchSerializer,
+    ProductChangesQuerySerializer,
+)
+from apps.products.services.catalog_service import CatalogService
+from apps.products.services.event_service import (
+    CLOSED, DELETED, LAGGING, UPDATED, WATERMARK, ProductEventService, new_values,
 )
 from apps.products.services.product_service import ProductService
 from apps.products.selectors.product_selectors import ProductSelector
+from apps.products.selectors.category_selectors import CategorySelector
+from apps.products.selectors.catalog_selectors import CatalogSelector, InvalidCursor
+from apps.products.selectors.change_selectors import ChangeSelector, ExpiredCursor
 from apps.products.authentication import MerchantJWTAuthentication, IsMerchantAuthenticated
+from config.async_views import AsyncAPIView
+from config.byte_ranges import serve_file_ranges
+from config.disconnect import client_disconnected
+from config.fast_json import ORJSONParser, ORJSONRenderer
+from config.instrumentation import span
 
 
 # ── Category ──────────────────────────────────────────────────────────────────
 
 
-class CategoryListView(APIView):
+class CategoryListView(AsyncAPIView):
     """
     GET /api/products/categories/
     Returns all active top-level categories (with nested children).
@@ -52,21 +90,78 @@ class CategoryListView(APIView):
     authentication_classes = []
     permission_classes = [AllowAny]
 
-    def get(self, request):
-        categories = (
-            Category.objects
-            .filter(is_active=True, parent__isnull=True)
-            .prefetch_related('children')
-            .order_by('sort_order', 'name')
-        )
-        serializer = CategorySerializer(categories, many=True)
-        return Response({'success': True, 'data': serializer.data}, status=status.HTTP_200_OK)
+    async def get(self, request):
+        categories = [category async for category in CategorySelector.active_tree()]
+        with span('serialize'):
+            data = CategorySerializer(categories, many=True).data
+        return Response({'success': True, 'data': data}, status=status.HTTP_200_OK)
+
+
+# ── Public catalog ────────────────────────────────────────────────────────────
+
+
+class CatalogView(AsyncAPIView):
+    """
+    GET /api/products/catalog/
+    Sellable products across all merchants, from the denormalized
+    catalog_entry table.  Public endpoint.
+
+    Query params:
+      q          – full-text search (name, shop, category; web-search syntax)
+      category   – category id (a top-level id includes its subcategories)
+      merchant   – merchant id
+      min_price, max_price, in_stock
+      sort       – newest | price_asc | price_desc  (default: newest)
+      cursor     – `next_cursor` of the previous page
+      page_size  – default 24, max 60
+
+    Pages are cached per catalog generation (CATALOG_CACHE_SECONDS), so any
+    catalog change invalidates them, and are publicly cacheable for
+    CATALOG_HTTP_MAX_AGE seconds.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    async def get(self, request):
+        query = CatalogQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response({'success': False, 'errors': query.errors}, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        generation = await CatalogService.ageneration()
+        cache_key = CatalogService.page_cache_key(generation, request.get_host(), params)
+        body = await cache.aget(cache_key)
+        if body is None:
+            qs = CatalogSelector.browse(params)
+            if params['cursor']:
+                try:
+                    qs = CatalogSelector.after_cursor(qs, params['sort'], params['cursor'])
+                except InvalidCursor as exc:
+                    return Response({'success': False, 'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+            page_size = params['page_size']
+            entries = [entry async for entry in qs[:page_size + 1]]
+            has_next = len(entries) > page_size
+            entries = entries[:page_size]
+            with span('serialize'):
+                data = CatalogEntrySerializer(entries, many=True, context={'request': request}).data
+            body = {
+                'success': True,
+                'data': data,
+                'next_cursor': CatalogSelector.encode_cursor(params['sort'], entries[-1]) if has_next else None,
+                'page_size': page_size,
+            }
+            await cache.aset(cache_key, body, timeout=settings.CATALOG_CACHE_SECONDS)
+
+        response = Response(body, status=status.HTTP_200_OK)
+        response['Cache-Control'] = f'public, max-age={settings.CATALOG_HTTP_MAX_AGE}'
+        return response
 
 
 # ── Product List (with search, filter, pagination) ────────────────────────────
 
 
-class MerchandiseProductListView(APIView):
+class MerchandiseProductListView(AsyncAPIView):
     """
     GET /api/products/merchant/
 
@@ -83,12 +178,12 @@ class MerchandiseProductListView(APIView):
     authentication_classes = [MerchantJWTAuthentication]
     permission_classes = [IsMerchantAuthenticated]
 
-    def get(self, request):
+    async def get(self, request):
         merchant = request.user
         params = request.query_params
 
-        # Build filtered queryset via selector
-        qs = ProductSelector.build_filtered_qs(merchant, params)
+        # Build filtered queryset via selector (may consult the replica pin cache)
+        qs = await sync_to_async(ProductSelector.build_filtered_qs)(merchant, params)
 
         # ── Pagination ─────────────────────────────────────────────────────
         try:
@@ -101,18 +196,20 @@ class MerchandiseProductListView(APIView):
         except (ValueError, TypeError):
             page_size = 20
 
-        total_count = qs.count()
+        with span('count'):
+            total_count = await qs.acount()
         total_pages = max(1, math.ceil(total_count / page_size))
         page = min(page, total_pages)
 
         offset = (page - 1) * page_size
-        products = qs[offset: offset + page_size]
+        products = [product async for product in qs[offset: offset + page_size]]
 
-        serializer = MerchandiseProductSerializer(products, many=True, context={'request': request})
+        with span('serialize'):
+            data = MerchandiseProductSerializer(products, many=True, context={'request': request}).data
 
         return Response({
             'success': True,
-            'data': serializer.data,
+            'data': data,
             'pagination': {
                 'total_count': total_count,
                 'total_pages': total_pages,
@@ -124,6 +221,221 @@ class MerchandiseProductListView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+# ── Batch Lookup ──────────────────────────────────────────────────────────────
+
+
+class MerchandiseProductBatchView(AsyncAPIView):
+    """
+    GET  /api/products/merchant/batch/?ids=3,1,2
+    POST /api/products/merchant/batch/   {"ids": [3, 1, 2]}
+
+    Up to MAX_BATCH_IDS (300) of the merchant's products in one request (bulk
+    edit and preview dialogs), in the order requested, with the same
+    representation as the detail endpoint.  Ids that do not exist or belong
+    to another merchant are listed in `missing`.  Costs the same few queries
+    for any number of ids.
+    """
+    authentication_classes = [MerchantJWTAuthentication]
+    permission_classes = [IsMerchantAuthenticated]
+    parser_classes = [ORJSONParser]
+
+    async def get(self, request):
+        raw = request.query_params.get('ids', '')
+        return await self._lookup(request, {'ids': [part.strip() for part in raw.split(',') if part.strip()]})
+
+    async def post(self, request):
+        return await self._lookup(request, request.data)
+
+    async def _lookup(self, request, data):
+        query = ProductBatchSerializer(data=data)
+        if not query.is_valid():
+            return Response({'success': False, 'errors': query.errors}, status=status.HTTP_400_BAD_REQUEST)
+        ids = query.validated_data['ids']
+
+        products = await sync_to_async(ProductSelector.by_ids)(request.user, ids)
+        found = {product.pk for product in products}
+        with span('serialize'):
+            data = MerchandiseProductSerializer(products, many=True, context={'request': request}).data
+        return Response({
+            'success': True,
+            'data': data,
+            'missing': [pk for pk in ids if pk not in found],
+        }, status=status.HTTP_200_OK)
+
+
+# ── Change Feed ───────────────────────────────────────────────────────────────
+
+
+class MerchandiseProductChangesView(AsyncAPIView):
+    """
+    GET /api/products/merchant/changes/
+
+    Delta sync: the merchant's products created, updated or archived, and
+    the ids of hard-deleted ones, since a cursor — oldest change first.
+
+    Query params:
+      since  – `next_cursor` of the previous response (omit for a full sync)
+      limit  – changes per response (default 100, max 500)
+
+    Keep calling with `next_cursor` while `has_more`; when caught up, store
+    `next_cursor` and poll with it later.  A product changed several times
+    appears once, in its latest state.  410 means the cursor is older than
+    the tombstone retention: discard local state and sync without `since`.
+    """
+    authentication_classes = [MerchantJWTAuthentication]
+    permission_classes = [IsMerchantAuthenticated]
+
+    async def get(self, request):
+        query = ProductChangesQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response({'success': False, 'errors': query.errors}, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        try:
+            position = ChangeSelector.decode_cursor(params['since'])
+        except ExpiredCursor as exc:
+            return Response({'success': False, 'message': str(exc)}, status=status.HTTP_410_GONE)
+        except InvalidCursor as exc:
+            return Response({'success': False, 'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = await sync_to_async(ChangeSelector.page)(request.user, position, params['limit'])
+        with span('serialize'):
+            changed = MerchandiseProductSerializer(page.changed, many=True, context={'request': request}).data
+        return Response({
+            'success': True,
+            'data': {'changed': changed, 'deleted': page.deleted},
+            'next_cursor': ChangeSelector.encode_cursor(page.position),
+            'has_more': page.has_more,
+        }, status=status.HTTP_200_OK)
+
+
+# ── Live Events (SSE) ─────────────────────────────────────────────────────────
+
+SSE_RETRY_MILLISECONDS = 3000
+SSE_REPLAY_PAGE_SIZE = 100
+
+
+def _sse(event: str = None, data=None, event_id: str = None, retry: int = None) -> bytes:
+    """One Server-Sent Events frame (JSON data is a single line)."""
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event:
+        lines.append(f'event: {event}')
+    if event_id:
+        lines.append(f'id: {event_id}')
+    if data is not None:
+        lines.append('data: ' + ORJSONRenderer().render(data).decode())
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class MerchandiseProductEventsView(AsyncAPIView):
+    """
+    GET /api/products/merchant/events/
+    Server-Sent Events stream of the merchant's product changes, so the
+    dashboard stops polling the product list.
+
+    Events (data is JSON):
+      product.created | product.updated | product.deleted
+                     {"ids": [...], "changes": {"stock": 9, ...}}
+      product.sync   replay after a reconnect, in the change-feed format
+                     {"changed": [product, ...], "deleted": [id, ...]}
+      resync         more was missed than can be replayed: reload the list
+
+    Event ids are change-feed cursors; clients reconnecting with
+    Last-Event-ID (EventSource does it automatically) get what they missed
+    as product.sync events.  Open the stream before loading the list.  A
+    ": ping" comment or an id-only frame arrives every SSE_HEARTBEAT_SECONDS.
+    Streams end after SSE_STREAM_MAX_SECONDS, or as soon as the client falls
+    SSE_QUEUE_MAX_EVENTS behind, and the client resumes from its last id.
+    A stream whose client disconnects is dropped at once (config.disconnect).
+
+    Authenticates with the Bearer header (use a fetch-based EventSource).
+    Needs ASGI: under WSGI a stream would tie up a worker thread.  Behind
+    PgBouncer (DB_PGBOUNCER) it also needs SSE_LISTEN_DB_HOST, else 503.
+    """
+    authentication_classes = [MerchantJWTAuthentication]
+    permission_classes = [IsMerchantAuthenticated]
+
+    async def get(self, request):
+        if 'wsgi.version' in request.META:
+            return Response({'success': False, 'message': 'Event streams need the ASGI server.'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        if not ProductEventService.available():
+            return Response({'success': False, 'message': 'Live product events are unavailable.'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        stream = self._stream(request, request.user, request.headers.get('Last-Event-ID', ''))
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+        return response
+
+    @staticmethod
+    def _replay(request, merchant, last_event_id: str) -> tuple:
+        """(frames, position): what a reconnecting client missed, or where a new one starts."""
+        frames = []
+        if last_event_id:
+            try:
+                position = ChangeSelector.decode_cursor(last_event_id)
+            except InvalidCursor:
+                position = None
+            replayed = 0
+            while position is not None and replayed < settings.SSE_REPLAY_MAX_EVENTS:
+                page = ChangeSelector.page(merchant, position, SSE_REPLAY_PAGE_SIZE)
+                position = page.position
+                if page.changed or page.deleted:
+                    changed = MerchandiseProductSerializer(page.changed, many=True, context={'request': request}).data
+                    frames.append(_sse('product.sync', {'changed': changed, 'deleted': page.deleted},
+                                       ChangeSelector.encode_cursor(position)))
+                    replayed += len(page.changed) + len(page.deleted)
+                if not page.has_more:
+                    return frames, position
+
+        position = (ChangeSelector.watermark(), 0)
+        frames.append(_sse('resync' if last_event_id else None, {} if last_event_id else None,
+                           ChangeSelector.encode_cursor(position)))
+        return frames, position
+
+    async def _stream(self, request, merchant, last_event_id: str):
+        # Subscribe first, so nothing committed during the replay is lost.
+        subscription = ProductEventService.subscribe(merchant.pk)
+        disconnected = client_disconnected(request)
+        watch = None
+        if disconnected is not None:
+            watch = asyncio.ensure_future(disconnected.wait())
+            watch.add_done_callback(lambda _: subscription.close())
+        try:
+            yield _sse(retry=SSE_RETRY_MILLISECONDS)
+            frames, position = await sync_to_async(self._replay)(request, merchant, last_event_id)
+            for frame in frames:
+                yield frame
+            # An idle stream must not hold the request's database connection.
+            await sync_to_async(connections.close_all)()
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.SSE_STREAM_MAX_SECONDS
+            while (remaining := deadline - loop.time()) > 0:
+                message = await subscription.get(min(remaining, 2 * settings.SSE_HEARTBEAT_SECONDS))
+                if message is None:
+                    yield b': ping\n\n'
+                    continue
+                kind, payload = message
+                if kind in (LAGGING, CLOSED):
+                    break
+                if kind == WATERMARK:
+                    if payload is not None and (payload, 0) > position:
+                        position = (payload, 0)
+                        yield _sse(event_id=ChangeSelector.encode_cursor(position))
+                    else:
+                        yield b': ping\n\n'
+                else:
+                    yield _sse(payload['event'], {'ids': payload['ids'], 'changes': payload['changes']})
+        finally:
+            if watch is not None:
+                watch.cancel()
+            ProductEventService.unsubscribe(subscription)
+
+
 # ── Bulk Actions ──────────────────────────────────────────────────────────────
 
 
@@ -141,11 +453,11 @@ class MerchandiseProductBulkActionView(APIView):
     - unarchive  : sets is_archived=False, is_active=True
     - activate   : sets is_active=True
     - deactivate : sets is_active=False
-    - delete     : hard delete (permanent)
+    - delete     : hard delete (permanent; the change feed reports a tombstone)
     """
     authentication_classes = [MerchantJWTAuthentication]
     permission_classes = [IsMerchantAuthenticated]
-    parser_classes = [JSONParser]
+    parser_classes = [ORJSONParser]
 
     ALLOWED_ACTIONS = {'archive', 'unarchive', 'activate', 'deactivate', 'delete'}
 
@@ -167,7 +479,9 @@ class MerchandiseProductBulkActionView(APIView):
             )
 
         qs = MerchandiseProduct.objects.filter(merchant=merchant, id__in=ids)
-        count = qs.count()
+        # Current flags double as the count and as the audit "before" values.
+        before = list(qs.values('id', 'is_active', 'is_archived'))
+        count = len(before)
 
         if count == 0:
             return Response(
@@ -176,28 +490,63 @@ class MerchandiseProductBulkActionView(APIView):
             )
 
         if action == 'archive':
-            qs.update(is_archived=True, is_active=False)
+            updates = {'is_archived': True, 'is_active': False}
             msg = f'{count} product(s) archived.'
         elif action == 'unarchive':
-            qs.update(is_archived=False, is_active=True)
+            updates = {'is_archived': False, 'is_active': True}
             msg = f'{count} product(s) restored.'
         elif action == 'activate':
-            qs.update(is_active=True)
+            updates = {'is_active': True}
             msg = f'{count} product(s) activated.'
         elif action == 'deactivate':
-            qs.update(is_active=False)
+            updates = {'is_active': False}
             msg = f'{count} product(s) deactivated.'
         elif action == 'delete':
-            qs.delete()
+            updates = {}
             msg = f'{count} product(s) permanently deleted.'
 
+        changes = {row['id']: self._changes(row, updates) for row in before}
+        with transaction.atomic():
+            if updates:
+                qs.update(**updates)
+                ProductEventService.publish(merchant.pk, UPDATED, [pk for pk, c in changes.items() if c], updates)
+            else:
+                qs.delete()
+                ProductEventService.publish(merchant.pk, DELETED, list(changes))
+            CatalogService.refresh_products(list(changes))
+
+        AuditService.record_many(
+            [(AuditEvent.PRODUCT, pk, merchant.pk, f'bulk_{action}', row_changes)
+             for pk, row_changes in changes.items()],
+            actor=merchant,
+        )
+
         return Response({'success': True, 'message': msg, 'affected': count})
 
+    @staticmethod
+    def _changes(row: dict, updates: dict) -> dict:
+        if not updates:
+            return {'deleted': [False, True]}
+        return {field: [row[field], value] for field, value in updates.items() if row[field] != value}
+
 
 # ── Product Detail (GET / PATCH / DELETE) ─────────────────────────────────────
 
 
-class MerchandiseProductDetailView(APIView):
+def _save_product(merchant, product, before: dict, action: str) -> None:
+    """
+    Save the fields in `before`, publish the change and refresh the catalog
+    entry in one transaction, then audit it (one thread hop).
+    """
+    changes = AuditService.diff(before, product, PRODUCT_FIELDS)
+    with transaction.atomic():
+        product.save(update_fields=list(before))
+        ProductEventService.publish(merchant.pk, UPDATED, [product.pk], new_values(changes))
+        CatalogService.refresh_products([product.pk])
+    AuditService.record(AuditEvent.PRODUCT, product.pk, merchant.pk, action, changes, actor=merchant)
+
+
+class MerchandiseProductDetailView(AsyncAPIView):
     """
     GET    /api/products/merchant/<int:pk>/   – retrieve single product
     PATCH  /api/products/merchant/<int:pk>/   – partial update status flags
@@ -206,30 +555,30 @@ class MerchandiseProductDetailView(APIView):
     authentication_classes = [MerchantJWTAuthentication]
     permission_classes = [IsMerchantAuthenticated]
 
-    def _get_product(self, merchant, pk):
+    async def _get_product(self, merchant, pk):
         try:
-            return (
+            return await (
                 MerchandiseProduct.objects
                 .select_related('category')
                 .prefetch_related('images')
-                .get(pk=pk, merchant=merchant)
+                .aget(pk=pk, merchant=merchant)
             )
         except MerchandiseProduct.DoesNotExist:
             return None
 
-    def get(self, request, pk):
-        product = self._get_product(request.user, pk)
+    async def get(self, request, pk):
+        product = await self._get_product(request.user, pk)
         if not product:
             return Response({'success': False, 'message': 'Product not found.'}, status=status.HTTP_404_NOT_FOUND)
         serializer = MerchandiseProductSerializer(product, context={'request': request})
         return Response({'success': True, 'data': serializer.data})
 
-    def patch(self, request, pk):
+    async def patch(self, request, pk):
         """
         Partial update for status fields only:
           is_active, is_archived, stock
         """
-        product = self._get_product(request.user, pk)
+        product = await self._get_product(request.user, pk)
         if not product:
             return Response({'success': False, 'message': 'Product not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -242,20 +591,22 @@ class MerchandiseProductDetailView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        before = {field: getattr(product, field) for field in updates}
         for field, value in updates.items():
             setattr(product, field, value)
-        product.save(update_fields=list(updates.keys()))
+        await sync_to_async(_save_product)(request.user, product, before, 'update')
 
         serializer = MerchandiseProductSerializer(product, context={'request': request})
         return Response({'success': True, 'message': 'Product updated.', 'data': serializer.data})
 
-    def delete(self, request, pk):
-        product = self._get_product(request.user, pk)
+    async def delete(self, request, pk):
+        product = await self._get_product(request.user, pk)
         if not product:
             return Response({'success': False, 'message': 'Product not found.'}, status=status.HTTP_404_NOT_FOUND)
+        before = {'is_archived': product.is_archived, 'is_active': product.is_active}
         product.is_archived = True
         product.is_active = False
-        product.save(update_fields=['is_archived', 'is_active'])
+        await sync_to_async(_save_product)(request.user, product, before, 'archive')
         return Response({'success': True, 'message': 'Product archived.'})
 
 
@@ -309,3 +660,37 @@ class MerchandiseProductCreateView(APIView):
             status=status.HTTP_201_CREATED,
         )
 
+
+# ── Product Video ──────────────────────────────────────────────────────────────
+
+
+@require_safe
+def product_video(request, pk):
+    """
+    GET/HEAD /api/products/<pk>/video/
+    Stream a product's video with HTTP Range support so players can start
+    immediately and seek (see config/byte_ranges.py).
+
+    Public for active, unarchived products; otherwise only the owning
+    merchant (Bearer token) may watch it.  A plain Django view: media players
+    send Accept headers DRF's content negotiation would reject.
+    """
+    product = ProductSelector.video_source(pk).first()
+    if product is None or not product.video:
+        raise Http404('Video not found.')
+
+    public = product.is_active and not product.is_archived
+    if not public:
+        try:
+            auth = MerchantJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            auth = None
+        if auth is None or auth[0].pk != product.merchant_id:
+            raise Http404('Video not found.')
+
+    return serve_file_ranges(
+        request,
+        product.video.name,
+        content_type='video/mp4',
+        cache_control='public, max-age=3600' if public else 'private, max-age=0',
+    )
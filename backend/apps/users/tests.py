@@ -1,5 +1,66 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.users.models import User
+from config.query_budget import QueryBudgetMixin
 
 
 class UserTests(TestCase):
     pass
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserViewSetQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Query budgets for the users viewset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@rapex.com', email='admin@rapex.com', password='Passw0rd123', role=User.Role.ADMIN
+        )
+        User.objects.bulk_create([
+            User(username=f'user{idx}@rapex.com', email=f'user{idx}@rapex.com', password='!')
+            for idx in range(40)
+        ])
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_list(self):
+        """Test a full user page is auth + count + page (no per-row queries)"""
+        with self.assertMaxQueries(3):
+            response = self.client.get('/api/users/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 20)
+
+    def test_retrieve_and_me(self):
+        """Test single-user endpoints stay within budget"""
+        with self.assertMaxQueries(2):
+            self.client.get(f'/api/users/{self.admin.id}/', **self.auth)
+        with self.assertMaxQueries(1):
+            self.client.get('/api/users/me/', **self.auth)
+
+    def test_login_and_register(self):
+        """Test login and registration stay within budget"""
+        with self.assertMaxQueries(2):
+            response = self.client.post(
+                '/api/users/login/',
+                {'email': 'admin@rapex.com', 'password': 'Passw0rd123'},
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        with self.assertMaxQueries(2):
+            response = self.client.post(
+                '/api/users/register/',
+                {
+                    'email': 'new@rapex.com',
+                    'password': 'Passw0rd123',
+                    'password_confirm': 'Passw0rd123',
+                    'first_name': 'New',
+                    'last_name': 'User',
+                },
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 201, response.content)
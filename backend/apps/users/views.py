@@ -6,6 +6,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from .models import User
 from .serializers import UserSerializer, RegisterSerializer, LoginSerializer
 from .services import AuthService
+from config.compression import compression_exempt
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -20,6 +21,7 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_field = 'id'
 
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    @compression_exempt  # carries JWTs: BREACH
     def login(self, request):
         """
         Login endpoint.
@@ -45,6 +47,7 @@ class UserViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    @compression_exempt  # carries JWTs: BREACH
     def register(self, request):
         """
         Register endpoint.
@@ -8,4 +8,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from config.disconnect import DisconnectMiddleware  # noqa: E402  (after setup)
+
+# Streaming views (product events) learn when their client has gone.
+application = DisconnectMiddleware(django_application)
@@ -0,0 +1,59 @@
+"""
+Async API Views
+===============
+DRF 3.14's APIView only dispatches synchronously.  AsyncAPIView keeps its
+request wrapping, authentication, permissions, exception handling and
+rendering, but awaits ``async def`` handlers:
+
+    class CategoryListView(AsyncAPIView):
+        async def get(self, request):
+            categories = [c async for c in CategorySelector.active_tree()]
+            ...
+
+Under ASGI the view then runs on the event loop and an idle or slow client
+costs no thread.  Blocking work must be awaited off the loop:
+
+  * ORM: use the async queryset API (aget, acount, ``async for``, asave);
+    building a queryset that itself does I/O goes through sync_to_async.
+  * Authentication/permission checks (sync DRF backends that hit the
+    database) run through sync_to_async automatically.
+  * Password hashing, SMTP and file I/O: ``await sync_to_async(fn)(...)``.
+
+All handlers on an AsyncAPIView must be ``async def``.  Under WSGI Django
+runs async views in a per-request event loop, so they stay usable there.
+"""
+
+import inspect
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView whose HTTP method handlers are coroutines."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            # OPTIONS and 405 are DRF's own sync handlers.
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,406 @@
+"""
+API Benchmarks
+==============
+End-to-end benchmark scenarios that drive the real URL routing, middleware,
+authentication, views and serializers through the Django test client.
+
+Used by ``manage.py bench_api`` (which seeds an isolated benchmark database)
+and small enough to smoke-test from the test suite.
+
+A scenario is a callable that performs one request and asserts its status;
+BenchmarkRunner times it pytest-benchmark style (warmup, then N rounds) and
+records per-request latency percentiles and query counts.
+"""
+
+import itertools
+import json
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.merchants.models import Merchant
+from apps.products.models import Category, MerchandiseProduct, ProductImage
+
+BENCH_USERNAME = 'bench-merchant'
+BENCH_PASSWORD = 'Bench-Passw0rd!'
+SEED_BATCH_SIZE = 5000
+
+# (label, query params) for the product list; covers every filter and ordering.
+PRODUCT_LIST_VARIANTS = [
+    ('default', {}),
+    ('active', {'status': 'active'}),
+    ('archived', {'status': 'archived'}),
+    ('in_stock', {'stock': 'in_stock'}),
+    ('empty_stock', {'stock': 'empty'}),
+    ('verified', {'verified': 'verified'}),
+    ('search', {'search': 'Product 12'}),
+    ('category', {'category': None}),  # filled with a seeded category id
+    ('order_name', {'order_by': 'name'}),
+    ('order_-price', {'order_by': '-price'}),
+    ('order_stock', {'order_by': 'stock'}),
+    ('order_created_at', {'order_by': 'created_at'}),
+    ('active_in_stock_-price_p100', {'status': 'active', 'stock': 'in_stock', 'order_by': '-price', 'page_size': 100}),
+    ('deep_page', {'page': 50}),
+]
+
+
+# ── Seeding ──────────────────────────────────────────────────────────────────
+
+
+def seed_catalog(scale: int, stdout=None) -> Merchant:
+    """
+    Create the benchmark merchant with `scale` products (3 images each)
+    spread across the seeded leaf categories.  Idempotent: tops up an
+    existing catalog to `scale` products.
+    """
+    merchant = Merchant.objects.filter(username=BENCH_USERNAME).first()
+    if merchant is None:
+        merchant = Merchant.objects.create(
+            username=BENCH_USERNAME,
+            email='bench@rapex.com',
+            password=make_password(BENCH_PASSWORD),
+            phone_number='+63 900 000 0000',
+            business_name='Bench Store',
+            owner_name='Bench Owner',
+            city='Manila',
+            is_active=True,
+            status=Merchant.APPROVED,
+        )
+
+    categories = list(Category.objects.filter(parent__isnull=False).values_list('id', flat=True))
+    existing = MerchandiseProduct.objects.filter(merchant=merchant).count()
+    for start in range(existing, scale, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, scale)
+        products = MerchandiseProduct.objects.bulk_create([
+            MerchandiseProduct(
+                merchant=merchant,
+                name=f'Product {idx}',
+                category_id=categories[idx % len(categories)],
+                sku=f'BENCH-{idx:08d}',
+                price=(idx % 5000) + 0.99,
+                stock=idx % 13,
+                is_verified=idx % 3 == 0,
+                is_archived=idx % 17 == 0,
+                is_active=idx % 11 != 0,
+            )
+            for idx in range(start, stop)
+        ])
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image=f'products/{merchant.id}/images/{product.id}-{pos}.jpg', sort_order=pos)
+            for product in products
+            for pos in range(3)
+        ])
+        if stdout:
+            stdout.write(f'  seeded {stop}/{scale} products')
+    return merchant
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+
+class BenchmarkRunner:
+    """Times scenarios and collects latency percentiles and queries/request."""
+
+    def __init__(self, rounds: int = 50, warmup: int = 5):
+        self.rounds = rounds
+        self.warmup = warmup
+        self.results: dict[str, dict] = {}
+
+    def run(self, name: str, scenario: Callable[[], None], rounds: Optional[int] = None) -> dict:
+        for _ in range(self.warmup):
+            scenario()
+
+        query_count = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        rounds = rounds or self.rounds
+        samples = []
+        with connections['default'].execute_wrapper(count_queries):
+            for _ in range(rounds):
+                started = time.perf_counter()
+                scenario()
+                samples.append((time.perf_counter() - started) * 1000)
+
+        result = summarize(samples)
+        result['queries_per_request'] = round(query_count / rounds, 2)
+        self.results[name] = result
+        return result
+
+
+def summarize(samples_ms: list) -> dict:
+    if len(samples_ms) > 1:
+        cuts = statistics.quantiles(samples_ms, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = samples_ms[0]
+    return {
+        'rounds': len(samples_ms),
+        'mean_ms': round(statistics.fmean(samples_ms), 3),
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+    }
+
+
+# ── Scenarios ────────────────────────────────────────────────────────────────
+
+
+def _jpeg_bytes() -> bytes:
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), (200, 80, 40)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def _expect(response, status: int) -> None:
+    if response.status_code != status:
+        raise AssertionError(f'Expected {status}, got {response.status_code}: {response.content[:300]!r}')
+
+
+def build_scenarios(merchant: Merchant) -> dict[str, Callable[[], None]]:
+    """Return {name: scenario} for every benchmarked endpoint."""
+    client = Client()
+    auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(merchant).access_token}'}
+    category_id = Category.objects.filter(parent__isnull=False).values_list('id', flat=True).first()
+    jpeg = _jpeg_bytes()
+    # Continue after existing merchants so reruns on a kept database still
+    # submit unique usernames, emails and phone numbers.
+    counter = itertools.count(Merchant.objects.count() + 1)
+    scenarios = {}
+
+    for label, params in PRODUCT_LIST_VARIANTS:
+        params = {k: (category_id if k == 'category' else v) for k, v in params.items()}
+
+        def product_list(params=params):
+            _expect(client.get('/api/products/merchant/', params, **auth), 200)
+
+        scenarios[f'product_list[{label}]'] = product_list
+
+    sample_id = MerchandiseProduct.objects.filter(merchant=merchant).values_list('id', flat=True).first()
+
+    def product_detail():
+        _expect(client.get(f'/api/products/merchant/{sample_id}/', **auth), 200)
+
+    def product_create():
+        n = next(counter)
+        _expect(client.post('/api/products/merchant/create/', {
+            'name': f'Bench created {n}',
+            'category': category_id,
+            'price': '123.45',
+            'stock': 10,
+            'images': [SimpleUploadedFile(f'bench-{n}-{i}.jpg', jpeg, content_type='image/jpeg') for i in range(3)],
+        }, **auth), 201)
+
+    bulk_ids = list(MerchandiseProduct.objects.filter(merchant=merchant).values_list('id', flat=True)[:50])
+    bulk_actions = itertools.cycle(['deactivate', 'activate', 'archive', 'unarchive'])
+
+    def bulk_action():
+        _expect(client.post(
+            '/api/products/merchant/bulk-action/',
+            {'action': next(bulk_actions), 'ids': bulk_ids},
+            content_type='application/json',
+            **auth,
+        ), 200)
+
+    def categories():
+        _expect(client.get('/api/products/categories/'), 200)
+
+    def login():
+        _expect(client.post(
+            '/api/merchants/login/',
+            {'identifier': BENCH_USERNAME, 'password': BENCH_PASSWORD},
+            content_type='application/json',
+        ), 200)
+
+    def registration_step3():
+        n = next(counter)
+        _expect(client.post('/api/merchants/register/step3/', {
+            'business_name': f'Bench Reg {n}',
+            'owner_name': 'Bench Owner',
+            'username': f'bench-reg-{n}',
+            'email': f'bench-reg-{n}@rapex.com',
+            'phone_number': f'+63 9{n // 10**7 % 100:02d} {n // 10**4 % 1000:03d} {n % 10**4:04d}',
+            'business_categories': '["Fresh Produce"]',
+            'business_types': '[]',
+            'business_registration': Merchant.UNREGISTERED,
+            'zip_code': '1000',
+            'province': 'Metro Manila',
+            'city': 'Manila',
+            'barangay': 'Ermita',
+            'street_name': 'Padre Faura',
+            'house_number': str(n),
+            'latitude': '14.576400',
+            'longitude': '120.984200',
+            'selfie_with_id': SimpleUploadedFile('selfie.jpg', jpeg, content_type='image/jpeg'),
+            'valid_id': SimpleUploadedFile('id.jpg', jpeg, content_type='image/jpeg'),
+        }), 201)
+
+    scenarios.update({
+        'product_detail': product_detail,
+        'product_create': product_create,
+        'bulk_action': bulk_action,
+        'categories': categories,
+        'login': login,
+        'registration_step3': registration_step3,
+    })
+    return scenarios
+
+
+def run_benchmarks(merchant: Merchant, rounds: int, warmup: int, only: Optional[list] = None, stdout=None) -> dict:
+    """Run every (or the selected) scenario; uploads go to a throwaway MEDIA_ROOT."""
+    runner = BenchmarkRunner(rounds=rounds, warmup=warmup)
+    with tempfile.TemporaryDirectory() as media_root, override_settings(
+        MEDIA_ROOT=media_root,
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ):
+        for name, scenario in build_scenarios(merchant).items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            result = runner.run(name, scenario)
+            if stdout:
+                stdout.write(format_row(name, result))
+    return runner.results
+
+
+# ── JSON codecs ──────────────────────────────────────────────────────────────
+
+
+def product_page_payload(items: int = 100, images: int = 5) -> dict:
+    """
+    A product list response shaped like MerchandiseProductSerializer output:
+    serializer fields are already strings, plus the raw Decimal/datetime/lazy
+    values that reach the renderer from hand-built responses.
+    """
+    from django.utils import timezone
+    from django.utils.translation import gettext_lazy
+
+    now = timezone.now()
+    data = []
+    for idx in range(items):
+        data.append({
+            'id': idx + 1,
+            'merchant': 1,
+            'name': f'Product {idx} — “Limited” édition',
+            'category': 3,
+            'category_name': 'Apparel',
+            'sku': f'SKU-{idx:06d}',
+            'description_text': 'Soft cotton tee. ' * 20,
+            'description_image': None,
+            'price': f'{idx % 500}.99',
+            'stock': idx % 17,
+            'is_verified': idx % 2 == 0,
+            'is_archived': False,
+            'is_active': True,
+            'video': None,
+            'images': [
+                {
+                    'id': idx * images + pos,
+                    'image': f'http://testserver/media/products/{idx}/img-{pos}.jpg',
+                    'is_primary': pos == 0,
+                    'position': pos,
+                }
+                for pos in range(images)
+            ],
+            'primary_image_url': f'http://testserver/media/products/{idx}/img-0.jpg',
+            'created_at': '2024-05-01T08:30:00.123456Z',
+            'updated_at': now,
+            'list_price': Decimal(f'{idx % 500}.99'),
+            'badge': gettext_lazy('New arrival'),
+        })
+    return {
+        'success': True,
+        'data': data,
+        'pagination': {'total_count': items, 'total_pages': 1, 'current_page': 1,
+                       'page_size': items, 'has_next': False, 'has_previous': False},
+    }
+
+
+def benchmark_json_codecs(rounds: int = 200, items: int = 100, stdout=None) -> dict:
+    """Time DRF's stdlib JSON renderer/parser against the orjson ones."""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from config.fast_json import ORJSONParser, ORJSONRenderer
+
+    payload = product_page_payload(items)
+    body = JSONRenderer().render(payload)
+    cases = {
+        'render_stdlib': lambda: JSONRenderer().render(payload),
+        'render_orjson': lambda: ORJSONRenderer().render(payload),
+        'parse_stdlib': lambda: JSONParser().parse(BytesIO(body)),
+        'parse_orjson': lambda: ORJSONParser().parse(BytesIO(body)),
+    }
+    results = {}
+    for name, case in cases.items():
+        for _ in range(min(rounds, 10)):
+            case()
+        samples = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            case()
+            samples.append((time.perf_counter() - started) * 1000)
+        result = summarize(samples)
+        result['mb_per_s'] = round(len(body) / (result['mean_ms'] / 1000) / 1e6, 1)
+        results[name] = result
+        if stdout:
+            stdout.write(f"{name:<16} mean {result['mean_ms']:>8.3f} ms  p95 {result['p95_ms']:>8.3f} ms  "
+                         f"{result['mb_per_s']:>8.1f} MB/s")
+    if stdout:
+        stdout.write(f'payload: {items} products, {len(body):,} bytes')
+    return results
+
+
+# ── Reporting & baseline comparison ──────────────────────────────────────────
+
+
+def format_header() -> str:
+    return f"{'scenario':<44} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}"
+
+
+def format_row(name: str, result: dict) -> str:
+    return (
+        f"{name:<44} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+        f"{result['p99_ms']:>9.2f} {result['queries_per_request']:>8.1f}"
+    )
+
+
+def save_results(path: Path, scale: int, results: dict) -> None:
+    path.write_text(json.dumps({'scale': scale, 'results': results}, indent=2, sort_keys=True))
+
+
+def compare_to_baseline(path: Path, results: dict, threshold: float) -> list[str]:
+    """
+    Return human-readable regressions: p95 slower than baseline * threshold,
+    or more queries per request than the baseline.
+    """
+    baseline = json.loads(path.read_text())['results']
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result['p95_ms'] > base['p95_ms'] * threshold:
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.2f} ms vs baseline {base['p95_ms']:.2f} ms "
+                f"(x{result['p95_ms'] / base['p95_ms']:.2f})"
+            )
+        if result['queries_per_request'] > base['queries_per_request']:
+            regressions.append(
+                f"{name}: {result['queries_per_request']} queries/request vs baseline "
+                f"{base['queries_per_request']}"
+            )
+    return regressions
@@ -0,0 +1,220 @@
+"""
+Byte-Range File Responses
+=========================
+RFC 9110 range requests for media files (product videos), so players can
+start playback from the first bytes and seek without downloading the whole
+file:
+
+  * ``Range: bytes=0-1023``, ``bytes=1024-``, ``bytes=-500`` -> 206 with
+    Content-Range; several ranges -> 206 ``multipart/byteranges``.
+    Overlapping or adjacent ranges are coalesced; more than MAX_RANGES
+    ranges, or a malformed header, are ignored (full 200 response).
+  * Unsatisfiable ranges -> 416 with ``Content-Range: bytes */<size>``.
+  * ETag/Last-Modified come from the file's size and mtime.  If-None-Match,
+    If-Modified-Since, If-Match and If-Unmodified-Since answer 304/412.
+    If-Range only honours the Range when it names the current strong ETag
+    or Last-Modified date; otherwise the full file is sent.
+
+Single ranges (and full responses) are FileResponses over a file object
+positioned at the range start, with Content-Length set to the range length:
+gunicorn's sync/gthread workers send exactly that slice with os.sendfile
+(zero-copy).  Multipart bodies are assembled in Python.  With a front
+server configured (PROTECTED_MEDIA_SERVER), the transfer is offloaded
+entirely and the server handles ranges itself.
+"""
+
+import mimetypes
+import os
+import secrets
+from typing import Optional
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from config.protected_media import media_path, offload_response
+
+MAX_RANGES = 16
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range_header(header: str, size: int) -> Optional[list]:
+    """
+    Parse a ``Range`` header against a file of `size` bytes.
+
+    Returns None when the header is absent, malformed or should be ignored,
+    [] when no range is satisfiable, else sorted, coalesced, inclusive
+    (start, end) pairs.
+    """
+    unit, _, spec = (header or '').partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        first, dash, last = part.strip().partition('-')
+        if not dash:
+            return None
+        first, last = first.strip(), last.strip()
+        if not (first.isdigit() or first == '') or not (last.isdigit() or last == ''):
+            return None
+        if first == '':
+            if last == '':
+                return None
+            # Suffix range: the final `last` bytes.
+            length = int(last)
+            if length == 0:
+                continue
+            ranges.append((max(size - length, 0), size - 1))
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+            ranges.append((start, min(int(last), size - 1) if last else size - 1))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    coalesced = []
+    for start, end in sorted(ranges):
+        if coalesced and start <= coalesced[-1][1] + 1:
+            coalesced[-1] = (coalesced[-1][0], max(coalesced[-1][1], end))
+        else:
+            coalesced.append((start, end))
+    return coalesced
+
+
+def _if_range_matches(request, etag: str, last_modified: int) -> bool:
+    validator = request.META.get('HTTP_IF_RANGE')
+    if validator is None:
+        return True
+    validator = validator.strip()
+    if validator.startswith('"'):
+        # Strong comparison only: weak tags never match.
+        return validator == etag
+    if validator.startswith('W/'):
+        return False
+    return parse_http_date_safe(validator) == last_modified
+
+
+class _FileRange:
+    """
+    Read-only view of `length` bytes of an open file from its current
+    position.  Exposes fileno() so the WSGI server can sendfile() it; the
+    response's Content-Length bounds that transfer.
+    """
+
+    def __init__(self, file, length: int):
+        self._file = file
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _multipart_body(path: str, ranges: list, size: int, content_type: str, boundary: str):
+    headers = [
+        (f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+         f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n').encode()
+        for start, end in ranges
+    ]
+    trailer = f'\r\n--{boundary}--\r\n'.encode()
+    length = sum(len(header) for header in headers) + sum(end - start + 1 for start, end in ranges) + len(trailer)
+
+    def body():
+        with open(path, 'rb') as file:
+            for header, (start, end) in zip(headers, ranges):
+                yield header
+                file.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    data = file.read(min(CHUNK_SIZE, remaining))
+                    if not data:
+                        return
+                    remaining -= len(data)
+                    yield data
+        yield trailer
+
+    return body(), length
+
+
+def serve_file_ranges(request, name: str, content_type: str = '', cache_control: str = '') -> HttpResponse:
+    """
+    Respond to GET/HEAD for the default-storage file `name`, honouring
+    Range and conditional headers.  Callers are responsible for
+    authorization.
+    """
+    path = media_path(name)
+    content_type = content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    response = offload_response(name, path, content_type)
+    if response is not None:
+        if cache_control:
+            response['Cache-Control'] = cache_control
+        return response
+
+    stat = os.stat(path)
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+
+    def finish(response):
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        if cache_control:
+            response['Cache-Control'] = cache_control
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        return finish(conditional)
+
+    ranges = None
+    if 'HTTP_RANGE' in request.META and _if_range_matches(request, etag, last_modified):
+        ranges = parse_range_header(request.META['HTTP_RANGE'], size)
+
+    head = request.method == 'HEAD'
+
+    if ranges == []:
+        response = HttpResponse(status=416, content_type=content_type)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+
+    if ranges is not None and len(ranges) > 1:
+        boundary = secrets.token_hex(16)
+        body, length = _multipart_body(path, ranges, size, content_type, boundary)
+        response = StreamingHttpResponse(
+            iter(()) if head else body,
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = str(length)
+        return finish(response)
+
+    start, end = ranges[0] if ranges else (0, size - 1)
+    length = end - start + 1 if size else 0
+    if head:
+        response = HttpResponse(content_type=content_type)
+    else:
+        file = open(path, 'rb')
+        file.seek(start)
+        response = FileResponse(_FileRange(file, length), content_type=content_type)
+    if ranges:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    return finish(response)
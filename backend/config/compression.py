@@ -0,0 +1,247 @@
+"""
+Response Compression
+====================
+Brotli/gzip compression for API responses, replacing Django's GZipMiddleware
+(which compresses every content type at a fixed level and has no brotli).
+
+  * Encoding: brotli when the client accepts ``br`` and the optional
+    ``brotli`` package is installed, otherwise gzip; q-values are honoured.
+  * Only bodies of at least COMPRESSION_MIN_SIZE bytes whose content type is
+    in COMPRESSION_CONTENT_TYPES are compressed.
+  * Streaming responses (sync or async iterators) are compressed
+    incrementally, chunk by chunk.
+  * Compressed bodies are kept in a per-process LRU keyed by a digest of the
+    uncompressed body, so a repeated response (category tree, an unchanged
+    product page) costs a hash instead of a compression.  Bounded by
+    COMPRESSION_CACHE_MAX_BYTES.
+
+BREACH: a secret compressed together with attacker-influenced input leaks
+through the compressed length.  Handlers whose responses carry credentials
+(login, registration that issues JWTs) are decorated with
+``@compression_exempt`` and are never compressed:
+
+    class MerchantLoginView(APIView):
+        @compression_exempt
+        def post(self, request): ...
+"""
+
+import functools
+import hashlib
+import inspect
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+_EXEMPT_ATTR = 'compression_exempt'
+
+
+def compression_exempt(handler):
+    """Never compress responses returned by `handler` (sync or async)."""
+    if inspect.iscoroutinefunction(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            response = await handler(*args, **kwargs)
+            setattr(response, _EXEMPT_ATTR, True)
+            return response
+    else:
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            response = handler(*args, **kwargs)
+            setattr(response, _EXEMPT_ATTR, True)
+            return response
+    return wrapper
+
+
+def _accepted_encodings(header: str) -> dict:
+    """Parse Accept-Encoding into {coding: q}."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Best supported coding for an Accept-Encoding header, or None."""
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Compressor:
+    """Incremental compressor with a zlib-style compress/flush interface."""
+
+    def __init__(self, encoding: str):
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits=31: gzip container.
+            self._zlib = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress `data` and flush it, so each streamed chunk reaches the client."""
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+class CompressedBodyCache:
+    """Thread-safe LRU of compressed bodies, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class CompressionMiddleware:
+    """Compress eligible responses with brotli or gzip."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.body_cache = CompressedBodyCache(settings.COMPRESSION_CACHE_MAX_BYTES)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def _eligible(self, response) -> bool:
+        if getattr(response, _EXEMPT_ATTR, False) or response.has_header('Content-Encoding'):
+            return False
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return False
+        return response.streaming or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+    def process_response(self, request, response):
+        if not self._eligible(response):
+            return response
+
+        # The representation now depends on Accept-Encoding, compressed or not.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self._compress_stream(response, encoding)
+            del response.headers['Content-Length']
+        else:
+            content = response.content
+            key = (encoding, hashlib.blake2b(content, digest_size=16).digest())
+            compressed = self.body_cache.get(key)
+            if compressed is None:
+                compressed = compress_bytes(content, encoding)
+                self.body_cache.set(key, compressed)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag names the uncompressed bytes (RFC 9110 8.8.1).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _compress_stream(response, encoding: str):
+        # Capture the iterator now: streaming_content may be replaced later.
+        original = response.streaming_content
+        compressor = _Compressor(encoding)
+
+        if response.is_async:
+            async def compressed():
+                async for chunk in original:
+                    data = compressor.compress(chunk)
+                    if data:
+                        yield data
+                yield compressor.finish()
+        else:
+            def compressed():
+                for chunk in original:
+                    data = compressor.compress(chunk)
+                    if data:
+                        yield data
+                yield compressor.finish()
+        return compressed()
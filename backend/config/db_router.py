@@ -0,0 +1,128 @@
+"""
+Read Replica Routing
+====================
+Selector reads go to a read replica; everything else stays on the primary.
+
+Replica reads are opt-in per queryset.  Selectors build their querysets from
+a manager carrying the replica hint:
+
+    from config.db_router import replica_manager
+
+    MerchandiseProduct.objects  ->  replica_manager(MerchandiseProduct, merchant)
+
+PrimaryReplicaRouter then sends those reads to a random DATABASE_REPLICAS
+alias, except inside a ``transaction.atomic`` block on the primary.  All
+writes go to the primary, even for instances that were loaded from a
+replica.  Related objects (prefetches, FK access) follow the database their
+parent instance came from.
+
+Read-your-writes: ReplicaPinMiddleware pins the authenticated merchant to the
+primary for DB_REPLICA_PIN_SECONDS after any successful unsafe request
+(POST/PUT/PATCH/DELETE), so a dashboard reload right after an edit never
+shows replica-lagged data.  Pins live in the shared cache so every worker
+honours them.
+
+With no replicas configured, replica_manager() returns the default manager
+without touching the cache.
+"""
+
+import random
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_READ_HINT = 'replica_read'
+
+_UNSAFE_METHODS = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+
+
+def _pin_cache_key(principal) -> str:
+    return f"db_primary_pin:{principal._meta.label_lower}:{principal.pk}"
+
+
+def pin_to_primary(principal) -> None:
+    """Serve `principal`'s replica-eligible reads from the primary for a while."""
+    cache.set(_pin_cache_key(principal), True, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(principal) -> bool:
+    return bool(cache.get(_pin_cache_key(principal)))
+
+
+def replica_manager(model, principal: Optional[object] = None):
+    """
+    Manager whose querysets may be read from a replica, unless `principal`
+    (the merchant the data belongs to) wrote recently.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return model._default_manager
+    if principal is not None and is_pinned_to_primary(principal):
+        return model._default_manager
+    return model._default_manager.db_manager(hints={REPLICA_READ_HINT: True})
+
+
+class PrimaryReplicaRouter:
+    """Database router for one primary (default) and DATABASE_REPLICAS."""
+
+    def db_for_read(self, model, **hints):
+        if not hints.get(REPLICA_READ_HINT) or not settings.DATABASE_REPLICAS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads inside a transaction must see its own writes.
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Pin the authenticated principal to the primary after it writes."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _writer(request, response):
+        if (
+            not settings.DATABASE_REPLICAS
+            or request.method not in _UNSAFE_METHODS
+            or response.status_code >= 400
+        ):
+            return None
+        # DRF authenticates inside the view and sets the user on the
+        # underlying HttpRequest, so merchants are visible here too.
+        user = getattr(request, 'user', None)
+        return user if user is not None and user.is_authenticated else None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        writer = self._writer(request, response)
+        if writer is not None:
+            pin_to_primary(writer)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if settings.DATABASE_REPLICAS and request.method in _UNSAFE_METHODS:
+            # request.user may still be a lazy session lookup; resolve it off the loop.
+            writer = await sync_to_async(self._writer)(request, response)
+            if writer is not None:
+                await cache.aset(_pin_cache_key(writer), True, timeout=settings.DB_REPLICA_PIN_SECONDS)
+        return response
@@ -0,0 +1,69 @@
+"""
+Client Disconnect Detection
+===========================
+Django 4.2's ASGI handler reads the request body and then stops listening to
+the client, and uvicorn's send() silently drops data once the client has
+gone.  A long-lived streaming response therefore cannot tell that nobody is
+reading it.
+
+DisconnectMiddleware wraps the ASGI application and lets a view ask for an
+asyncio.Event that is set when the server reports ``http.disconnect``:
+
+    disconnected = client_disconnected(request)   # None outside ASGI
+    if disconnected is not None:
+        ...
+
+Watching starts only when a view asks (on the event loop, after Django has
+read the body), so ordinary requests pay nothing, and it stops when the
+response is done.
+"""
+
+import asyncio
+from typing import Optional
+
+SCOPE_KEY = 'rapex.disconnect'
+
+
+class DisconnectWatch:
+    """Reads the rest of the ASGI receive channel for one request."""
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._task = None
+        self.disconnected = asyncio.Event()
+
+    def start(self) -> asyncio.Event:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._watch())
+        return self.disconnected
+
+    async def _watch(self) -> None:
+        while (await self._receive())['type'] != 'http.disconnect':
+            pass
+        self.disconnected.set()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+class DisconnectMiddleware:
+    """ASGI middleware exposing a DisconnectWatch to views via the scope."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        watch = DisconnectWatch(receive)
+        try:
+            await self.app({**scope, SCOPE_KEY: watch}, receive, send)
+        finally:
+            watch.stop()
+
+
+def client_disconnected(request) -> Optional[asyncio.Event]:
+    """Event set once the client of `request` disconnects; call on the event loop."""
+    watch = getattr(request, 'scope', {}).get(SCOPE_KEY)
+    return watch.start() if watch is not None else None
@@ -0,0 +1,57 @@
+"""
+Test Factories
+==============
+Shared merchants, products and credentials for the app test suites.
+
+    merchant = seed_merchant('1')
+    products = seed_products(merchant, 60)
+    self.client.get(url, **auth_header(merchant))
+
+Products are spread over the seeded child categories, so the category seed
+migration must have run (any TestCase database).
+"""
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.merchants.models import Merchant
+from apps.products.models import Category, MerchandiseProduct, ProductImage
+
+
+def seed_merchant(suffix: str = '1') -> Merchant:
+    """Active merchant with a unique username/email/phone."""
+    return Merchant.objects.create(
+        username=f'merchant{suffix}',
+        email=f'merchant{suffix}@shop.com',
+        phone_number=f'+63 912 000 {int(suffix):04d}',
+        business_name=f'Shop {suffix}',
+        owner_name='Owner',
+        is_active=True,
+    )
+
+
+def seed_products(merchant: Merchant, count: int, images_per_product: int = 3) -> list:
+    """Bulk-create products across the seeded categories, each with images."""
+    categories = list(Category.objects.filter(parent__isnull=False))
+    products = MerchandiseProduct.objects.bulk_create([
+        MerchandiseProduct(
+            merchant=merchant,
+            name=f'Product {idx}',
+            category=categories[idx % len(categories)],
+            sku=f'SKU-{idx:05d}',
+            price=10 + idx,
+            stock=idx % 7,
+            is_verified=idx % 2 == 0,
+        )
+        for idx in range(count)
+    ])
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image=f'products/{merchant.id}/images/{product.id}-{pos}.jpg', sort_order=pos)
+        for product in products
+        for pos in range(images_per_product)
+    ])
+    return products
+
+
+def auth_header(merchant: Merchant) -> dict:
+    """Bearer credentials for `merchant`, as test client kwargs."""
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(merchant).access_token}'}
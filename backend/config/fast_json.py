@@ -0,0 +1,105 @@
+"""
+Fast JSON Rendering and Parsing
+===============================
+orjson-backed drop-ins for DRF's JSONRenderer and JSONParser, installed as
+REST_FRAMEWORK defaults.  Output is byte-for-byte what the stdlib renderer
+produces with DRF's default settings (UNICODE_JSON, COMPACT_JSON,
+STRICT_JSON):
+
+  * compact separators, UTF-8 without ``\\uXXXX`` escaping, and U+2028 /
+    U+2029 escaped for JavaScript;
+  * Decimal, datetime/date/time, timedelta, UUID, lazy translation strings,
+    querysets, bytes and other iterables go through DRF's JSONEncoder rules
+    (datetimes are passed through to it so the ``+00:00`` -> ``Z`` rewrite
+    matches exactly).
+
+Anything orjson cannot express falls back to the stdlib renderer, so the
+result never differs: ``indent`` requests (including the browsable API),
+non-default UNICODE_JSON/COMPACT_JSON settings, and integers beyond 64 bits.
+The parser likewise hands bodies with very long integers, or anything orjson
+rejects, to JSONParser, so parsed values and error messages are unchanged.
+
+Known differences, both outside what this API emits: a float in exponent
+form is spelled ``1e-7`` instead of ``1e-07`` (same value), and NaN/Infinity
+render as ``null`` where the stdlib renderer raises.
+"""
+
+import codecs
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.parsers import JSONParser
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+)
+
+_drf_encoder = encoders.JSONEncoder()
+
+# 19+ digit runs may not fit orjson's 64-bit integers.  Mapping every digit
+# to '0' and searching for a run is several times faster than a regex.
+_DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+_LONG_DIGIT_RUN = b'0' * 19
+
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def _default(obj):
+    return _drf_encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer that encodes with orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            not api_settings.UNICODE_JSON
+            or not api_settings.COMPACT_JSON
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Unsupported values (e.g. >64-bit ints) or a genuine encoding
+            # error: the stdlib renderer produces the same output or error.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer: these are valid JSON but not valid
+        # JavaScript string literals.
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser that decodes with orjson."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not api_settings.STRICT_JSON or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if _LONG_DIGIT_RUN not in body.translate(_DIGITS_TO_ZERO):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        # orjson reads integers beyond 64 bits as floats and rejects some
+        # input the stdlib accepts (1e400, lone surrogates); let JSONParser
+        # decide those, which also keeps its error messages.
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,123 @@
+"""
+Geohash
+=======
+Geohashes encode a latitude/longitude as a base-32 string whose prefixes are
+nested grid cells: every extra character splits a cell into 32.  Points in
+the same cell share a prefix, so "near this point" becomes a handful of
+indexed ``LIKE 'prefix%'`` scans on a plain varchar column — no PostGIS.
+
+covering_cells() returns the cells overlapping a circle's bounding box at
+the finest precision that needs only a few of them.  They are a candidate
+filter only: callers apply the exact haversine distance to the rows they
+fetch.
+"""
+
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {char: index for index, char in enumerate(BASE32)}
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude: float, longitude: float, precision: int = 9) -> str:
+    """Geohash of a point, `precision` characters long."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            interval[0] = middle
+        else:
+            value <<= 1
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def bounds(geohash: str) -> tuple:
+    """(min_lat, min_lng, max_lat, max_lng) of a geohash cell."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def cell_size_degrees(precision: int) -> tuple:
+    """(height, width) in degrees of a cell at `precision`."""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    return 180.0 / (1 << (bits - lng_bits)), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple:
+    """
+    (min_lat, min_lng, max_lat, max_lng) containing every point within
+    `radius_km`.  Longitudes may fall outside [-180, 180] when the box
+    crosses the antimeridian; None when it reaches a pole.
+    """
+    d_lat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = latitude - d_lat, latitude + d_lat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return None
+    # The box is widest in longitude on its edge nearest a pole.
+    cos_latitude = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    d_lng = d_lat / cos_latitude
+    if d_lng >= 180.0:
+        return None
+    return min_lat, longitude - d_lng, max_lat, longitude + d_lng
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float,
+                   max_cells: int = 16, max_precision: int = 9) -> list:
+    """
+    Geohash prefixes whose union contains every point within `radius_km`
+    of the centre: the cells overlapping its bounding box, at the finest
+    precision that needs at most `max_cells` of them.  [] means no prefix
+    set narrows the search (radius too large, or a pole is in range).
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    if box is None:
+        return []
+    min_lat, min_lng, max_lat, max_lng = box
+    for precision in range(max_precision, 0, -1):
+        height, width = cell_size_degrees(precision)
+        first_row, last_row = math.floor((min_lat + 90.0) / height), math.floor((max_lat + 90.0) / height)
+        first_col, last_col = math.floor((min_lng + 180.0) / width), math.floor((max_lng + 180.0) / width)
+        if (last_row - first_row + 1) * (last_col - first_col + 1) > max_cells:
+            continue
+        cells = []
+        for row in range(first_row, last_row + 1):
+            lat = (row + 0.5) * height - 90.0
+            for col in range(first_col, last_col + 1):
+                lng = ((col + 0.5) * width) % 360.0 - 180.0
+                cell = encode(lat, lng, precision)
+                if cell not in cells:
+                    cells.append(cell)
+        return cells
+    return []
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
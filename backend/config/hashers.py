@@ -0,0 +1,75 @@
+"""
+Password Hashers
+================
+Tunable variants of Django's built-in hashers.
+
+Each hasher keeps the stock algorithm name, so hashes stay readable by plain
+Django, but reads its cost parameters from settings instead of class
+constants.  Because Django's check_password() re-encodes any hash whose
+algorithm or cost differs from the preferred hasher, changing
+PASSWORD_HASHER_POLICY or a cost setting upgrades stored hashes
+transparently on the next successful login.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with iterations from PASSWORD_PBKDF2_ITERATIONS."""
+
+    @property
+    def iterations(self) -> int:
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with costs from PASSWORD_ARGON2_* (requires argon2-cffi)."""
+
+    @property
+    def time_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self) -> int:
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class TunableScryptPasswordHasher(ScryptPasswordHasher):
+    """Scrypt with costs from PASSWORD_SCRYPT_*."""
+
+    @property
+    def work_factor(self) -> int:
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self) -> int:
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self) -> int:
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    @property
+    def maxmem(self) -> int:
+        # scrypt needs 128 * n * r bytes; OpenSSL's default cap is 32 MB,
+        # which a raised work factor would exceed.  Allow twice the need.
+        return 256 * self.work_factor * self.block_size
+
+
+
+# PASSWORD_HASHER_POLICY value -> hasher; settings and bench_password_hashers
+# both build on this.
+POLICY_HASHERS = {
+    'pbkdf2': 'config.hashers.TunablePBKDF2PasswordHasher',
+    'argon2': 'config.hashers.TunableArgon2PasswordHasher',
+    'scrypt': 'config.hashers.TunableScryptPasswordHasher',
+}
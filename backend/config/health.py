@@ -0,0 +1,48 @@
+"""
+Health Probes
+=============
+    GET /health/live/   process is up and serving requests (no I/O)
+    GET /health/ready/  database and cache are reachable; 503 otherwise
+
+Point the orchestrator's liveness probe at /health/live/ and its readiness
+probe at /health/ready/ so a worker is only sent traffic once its backing
+services answer.  Schema state is checked once per deploy by
+`manage.py migrate --check`, not on every probe.
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger(__name__)
+
+
+@require_GET
+def live(request):
+    return JsonResponse({'status': 'ok'})
+
+
+@require_GET
+def ready(request):
+    checks = {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        checks['database'] = 'ok'
+    except Exception as exc:
+        logger.warning(f"Readiness: database unavailable: {exc}")
+        checks['database'] = 'unavailable'
+
+    try:
+        # A read is enough to prove connectivity and keeps probes write-free.
+        cache.get('health:ready')
+        checks['cache'] = 'ok'
+    except Exception as exc:
+        logger.warning(f"Readiness: cache unavailable: {exc}")
+        checks['cache'] = 'unavailable'
+
+    is_ready = all(state == 'ok' for state in checks.values())
+    return JsonResponse({'status': 'ok' if is_ready else 'unavailable', 'checks': checks}, status=200 if is_ready else 503)
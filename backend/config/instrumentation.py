@@ -0,0 +1,252 @@
+"""
+Request Instrumentation
+=======================
+Per-request performance metrics: query count, SQL time, cache hits/misses
+and named spans (auth, view, serialize, render, service calls, ...).
+
+Metrics are emitted as a ``Server-Timing`` response header (visible in the
+browser dev tools) and as one structured log line on the
+``config.instrumentation`` logger.
+
+Enable with PERF_INSTRUMENTATION_ENABLED=True.  When disabled the middleware
+removes itself at startup (MiddlewareNotUsed), and ``span()`` and the
+per-query hook are a context variable lookup, so there is no measurable
+overhead.  PERF_SAMPLE_RATE
+(0.0-1.0) limits instrumentation to a fraction of requests.
+
+Usage in views and services:
+
+    from config.instrumentation import span
+
+    with span('serialize'):
+        data = MerchandiseProductSerializer(products, many=True).data
+
+    @span('product.create')
+    def create_product(...): ...
+"""
+
+import json
+import logging
+import random
+import time
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current_metrics: ContextVar[Optional['RequestMetrics']] = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Mutable metrics for one sampled request."""
+
+    __slots__ = ('started', 'query_count', 'sql_seconds', 'cache_hits', 'cache_misses', 'spans')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.spans: dict[str, float] = {}
+
+    def add_span(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.query_count} queries"',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+        ]
+        parts += [
+            f'{name.replace(".", "-")};dur={seconds * 1000:.1f}'
+            for name, seconds in self.spans.items()
+        ]
+        parts.append(f'total;dur={total_seconds * 1000:.1f}')
+        return ', '.join(parts)
+
+    def as_log_record(self, request, response, total_seconds: float) -> dict:
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_seconds * 1000, 2),
+            'queries': self.query_count,
+            'sql_ms': round(self.sql_seconds * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'spans_ms': {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()},
+        }
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being handled, or None if not sampled/enabled."""
+    return _current_metrics.get()
+
+
+class span(ContextDecorator):
+    """
+    Time a named phase of the current request.
+    Usable as a context manager or decorator; repeated spans with the same
+    name are summed.  No-op when the request is not instrumented.
+    """
+
+    __slots__ = ('name', '_metrics', '_started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _recreate_cm(self):
+        # Fresh instance per decorated call: the timing state must not be
+        # shared between concurrent requests.
+        return type(self)(self.name)
+
+    def __enter__(self):
+        self._metrics = _current_metrics.get()
+        if self._metrics is not None:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._metrics is not None:
+            self._metrics.add_span(self.name, time.perf_counter() - self._started)
+        return False
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrapper hook counting queries and SQL time."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_seconds += time.perf_counter() - started
+        metrics.query_count += 1
+
+
+def _instrument_connection(sender=None, connection=None, **kwargs) -> None:
+    """connection_created receiver: add _query_wrapper to a new connection."""
+    if _query_wrapper not in connection.execute_wrappers:
+        # First, so execute_wrapper() blocks open around it still pop their own.
+        connection.execute_wrappers.insert(0, _query_wrapper)
+
+
+# Connections are per thread, and under ASGI the ORM runs in sync_to_async
+# threads the middleware never sees, so the wrapper goes on every connection
+# as it opens; _query_wrapper finds the request through the ContextVar, which
+# sync_to_async does carry over.  Unsampled queries cost one ContextVar lookup.
+connection_created.connect(_instrument_connection, dispatch_uid='config.instrumentation')
+
+
+def _count_cache_gets(cache) -> None:
+    """Wrap get() on this cache instance (not its class) to count hits and misses."""
+    if 'get' in vars(cache):
+        return
+    original_get = cache.get
+
+    def get(key, default=None, version=None):
+        value = original_get(key, _MISSING, version)
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    cache.get = get
+
+
+class PerformanceInstrumentationMiddleware:
+    """
+    Outermost middleware: opens a RequestMetrics for sampled requests and
+    reports on the way out.  Queries are counted by the connection wrapper.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_SAMPLE_RATE
+        self.emit_header = settings.PERF_SERVER_TIMING_HEADER
+        # Opened before this module was imported, so missed connection_created.
+        for connection in connections.all(initialized_only=True):
+            _instrument_connection(connection=connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _is_sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _report(self, request, response, metrics: RequestMetrics):
+        total = time.perf_counter() - metrics.started
+        if self.emit_header:
+            response['Server-Timing'] = metrics.server_timing(total)
+        logger.info(json.dumps(metrics.as_log_record(request, response, total)))
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._is_sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        # caches hands each thread / async context its own backend instance.
+        _count_cache_gets(caches['default'])
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self._report(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self._is_sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        # caches hands each thread / async context its own backend instance.
+        _count_cache_gets(caches['default'])
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self._report(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            request._perf_view_started = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that phase
+        # separately so serialization and rendering are not lumped together.
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            view_started = getattr(request, '_perf_view_started', None)
+            if view_started is not None:
+                metrics.add_span('view', time.perf_counter() - view_started)
+            render_started = time.perf_counter()
+
+            def _record_render(rendered):
+                metrics.add_span('render', time.perf_counter() - render_started)
+
+            response.add_post_render_callback(_record_render)
+        return response
@@ -0,0 +1,90 @@
+"""
+Protected Media
+===============
+Serve a file from MEDIA_ROOT after the view has checked permissions, without
+streaming it through a Python worker when a front web server can do it:
+
+    PROTECTED_MEDIA_SERVER=nginx    X-Accel-Redirect to an ``internal``
+                                    location (PROTECTED_MEDIA_INTERNAL_PREFIX)
+    PROTECTED_MEDIA_SERVER=apache   X-Sendfile with the absolute path
+                                    (mod_xsendfile; lighttpd understands it too)
+    PROTECTED_MEDIA_SERVER unset    FileResponse
+
+The FileResponse fallback hands the open file to the server's
+``wsgi.file_wrapper``; gunicorn's sync/gthread workers then send it with
+os.sendfile.  Under ASGI (uvicorn) it is read and sent in chunks on the
+event loop's thread pool, so configure a front server for production.
+
+Matching nginx configuration (the location must not be reachable directly):
+
+    location /protected-media/ {
+        internal;
+        alias /app/media/;
+    }
+"""
+
+import mimetypes
+import os
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+
+# Types browsers may render inline; everything else is a download.
+_INLINE_CONTENT_TYPES = frozenset({'application/pdf', 'image/jpeg', 'image/png', 'image/webp', 'image/gif'})
+
+
+def _content_disposition(filename: str, content_type: str) -> str:
+    disposition = 'inline' if content_type in _INLINE_CONTENT_TYPES else 'attachment'
+    try:
+        filename.encode('ascii')
+        return f'{disposition}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{disposition}; filename*=utf-8''{quote(filename)}"
+
+
+def media_path(name: str) -> str:
+    """Absolute path of the default-storage file `name`; 404 if missing."""
+    # Storage.path() rejects names that escape MEDIA_ROOT.
+    path = default_storage.path(name)
+    if not os.path.isfile(path):
+        raise Http404('File not found.')
+    return path
+
+
+def offload_response(name: str, path: str, content_type: str) -> Optional[HttpResponse]:
+    """
+    Empty response telling the front server to send the file (it then also
+    handles Range and conditional requests), or None without one.
+    """
+    server = settings.PROTECTED_MEDIA_SERVER
+    if server == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.PROTECTED_MEDIA_INTERNAL_PREFIX + name)
+        return response
+    if server == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+    return None
+
+
+def serve_protected_file(name: str, download_name: str = '') -> HttpResponse:
+    """
+    Respond with the default-storage file `name` (relative to MEDIA_ROOT).
+    Callers are responsible for authorization.
+    """
+    path = media_path(name)
+    download_name = download_name or os.path.basename(name)
+    content_type = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    response = offload_response(name, path, content_type)
+    if response is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    response['Content-Disposition'] = _content_disposition(download_name, content_type)
+    # Identity documents: never store in shared or browser caches.
+    response['Cache-Control'] = 'private, no-store'
+    return response
@@ -0,0 +1,62 @@
+"""
+Query Budget Assertions
+=======================
+Test mixin that guards endpoints against N+1 regressions.
+
+    class ProductQueryBudgetTests(QueryBudgetMixin, TestCase):
+        def test_list(self):
+            with self.assertMaxQueries(4):
+                self.client.get(url)
+
+            self.assertQueryCountConstant(
+                lambda size: self.client.get(url, {'page_size': size}),
+                sizes=(5, 50),
+            )
+
+Failures list every captured SQL statement so the offending query is visible
+straight from the test output.
+"""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def _format_queries(captured) -> str:
+    return '\n'.join(f"  {idx}. {query['sql']}" for idx, query in enumerate(captured, start=1))
+
+
+class QueryBudgetMixin:
+    """Assertions for maximum and size-independent query counts."""
+
+    @contextmanager
+    def assertMaxQueries(self, budget: int, using: str = DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            self.fail(
+                f'{executed} queries executed, budget is {budget}:\n'
+                f'{_format_queries(context.captured_queries)}'
+            )
+
+    def assertQueryCountConstant(self, run, sizes, using: str = DEFAULT_DB_ALIAS):
+        """
+        Call ``run(size)`` for each size and require the same query count,
+        i.e. O(1) queries in page/collection size.
+        """
+        captured = {}
+        for size in sizes:
+            with CaptureQueriesContext(connections[using]) as context:
+                run(size)
+            captured[size] = context.captured_queries
+
+        counts = {size: len(queries) for size, queries in captured.items()}
+        if len(set(counts.values())) > 1:
+            smallest, largest = min(sizes), max(sizes)
+            self.fail(
+                f'Query count grows with size {counts}.\n'
+                f'size={smallest}:\n{_format_queries(captured[smallest])}\n'
+                f'size={largest}:\n{_format_queries(captured[largest])}'
+            )
@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from config.hashers import POLICY_HASHERS
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-dev-key-change-in-production')
@@ -23,21 +25,71 @@ INSTALLED_APPS = [
     'apps.users',
     'apps.merchants',
     'apps.products',
+    'apps.audit',
 ]
 
 MIDDLEWARE = [
+    # Outermost so its timings cover the whole stack; removes itself when disabled.
+    'config.instrumentation.PerformanceInstrumentationMiddleware',
+    # Before anything else touches the body; see config/compression.py.
+    'config.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Read-your-writes: pins a merchant to the primary after it writes.
+    'config.db_router.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
 
+# Response compression (brotli when installed, else gzip).  Small bodies are
+# not worth the CPU; types outside the allowlist (images, video, PDFs) are
+# already compressed.  Compressed bodies are cached per process, keyed by a
+# digest of the uncompressed body.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_CONTENT_TYPES = frozenset({
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/event-stream',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+})
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+# Quality 4-5 is brotli's sweet spot for dynamic responses; 11 is for static assets.
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+COMPRESSION_CACHE_MAX_BYTES = int(os.environ.get('COMPRESSION_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Performance Instrumentation (Server-Timing header + structured log line)
+PERF_INSTRUMENTATION_ENABLED = os.environ.get('PERF_INSTRUMENTATION_ENABLED', 'False') == 'True'
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', '1.0'))
+PERF_SERVER_TIMING_HEADER = os.environ.get('PERF_SERVER_TIMING_HEADER', 'True') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'config.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -56,6 +108,35 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Connections are persistent: each worker thread keeps its connection for
+# DB_CONN_MAX_AGE seconds (0 = reconnect per request, empty = forever), which
+# makes the gunicorn workers x threads a fixed-size pool.  Health checks
+# replace a connection that died between requests instead of failing them.
+#
+# DB_PGBOUNCER=True targets PgBouncer in transaction pooling mode, which
+# multiplexes many app connections over few Postgres backends: server-side
+# cursors (.iterator()) are disabled because they cannot outlive a
+# transaction there.  psycopg2 never uses server-side prepared statements, and
+# the TimeZone Django sets on connect is a parameter PgBouncer tracks per
+# client; any other session state must be transaction-scoped (SET LOCAL).
+#
+# LISTEN/NOTIFY needs a session of its own, which transaction pooling cannot
+# give: with DB_PGBOUNCER=True the live product event stream (one LISTEN
+# connection per worker, apps/products/services/event_service.py) connects to
+# Postgres directly at SSE_LISTEN_DB_HOST/SSE_LISTEN_DB_PORT, and is refused
+# (503, logged) when those are not set.
+#
+# Under ASGI (SERVER_INTERFACE=asgi, see gunicorn.conf.py) each request's ORM
+# work runs on a short-lived thread, so a persistent connection would never be
+# reused and only piles up until Postgres refuses clients.  The default there
+# is to close per request and pool in PgBouncer instead; without PgBouncer
+# that is a connect per request, which is why WSGI stays the default.
+SERVER_INTERFACE = os.environ.get('SERVER_INTERFACE', 'wsgi').lower()
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'False') == 'True'
+SSE_LISTEN_DB_HOST = os.environ.get('SSE_LISTEN_DB_HOST', '')
+SSE_LISTEN_DB_PORT = os.environ.get('SSE_LISTEN_DB_PORT', '')
+_DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '0' if SERVER_INTERFACE == 'asgi' else '60')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -64,9 +145,94 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(_DB_CONN_MAX_AGE) if _DB_CONN_MAX_AGE else None,
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+        },
+    }
+}
+
+# Read replicas: DB_REPLICAS="host[:port][/name],..." (credentials as above).
+# Only selector querysets read from replicas; see config/db_router.py.
+# DB_REPLICA_PIN_SECONDS should exceed the worst expected replication lag.
+DATABASE_REPLICAS = []
+for _index, _spec in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    _address, _, _name = _spec.strip().partition('/')
+    _host, _, _port = _address.partition(':')
+    _alias = f'replica{_index}'
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'NAME': _name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '10'))
+
+# Cache Configuration
+# OTPs and other short-lived state live in the cache, so it must be shared by
+# every worker process.  Redis is used when REDIS_URL is set; otherwise the
+# database cache (run `manage.py createcachetable`) is the cross-process
+# fallback.  'file' (single host only) and 'locmem' (single process only)
+# can be selected explicitly with CACHE_BACKEND.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if REDIS_URL else 'db').lower()
+
+_CACHE_COMMON = {
+    'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'rapex'),
+    'VERSION': int(os.environ.get('CACHE_VERSION', '1')),
+    'TIMEOUT': int(os.environ.get('CACHE_DEFAULT_TIMEOUT', '300')),
 }
 
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            **_CACHE_COMMON,
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL or 'redis://localhost:6379/0',
+            # Passed to redis.ConnectionPool — one pool per worker process.
+            'OPTIONS': {
+                'max_connections': int(os.environ.get('REDIS_MAX_CONNECTIONS', '50')),
+                'socket_connect_timeout': float(os.environ.get('REDIS_CONNECT_TIMEOUT', '2')),
+                'socket_timeout': float(os.environ.get('REDIS_SOCKET_TIMEOUT', '2')),
+                'health_check_interval': int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', '30')),
+                'retry_on_timeout': True,
+            },
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            **_CACHE_COMMON,
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ.get('CACHE_TABLE', 'django_cache'),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '100000'))},
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            **_CACHE_COMMON,
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '100000'))},
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            **_CACHE_COMMON,
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    raise ValueError(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}'. Choose redis, db, file or locmem.")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -82,6 +248,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password Hashing
+# PASSWORD_HASHER_POLICY picks the preferred hasher (pbkdf2 | argon2 | scrypt).
+# The others stay registered so existing hashes still verify; any hash whose
+# algorithm or cost differs from the policy is re-encoded on the next login.
+PASSWORD_HASHER_POLICY = os.environ.get('PASSWORD_HASHER_POLICY', 'pbkdf2').lower()
+PASSWORD_HASHERS = [POLICY_HASHERS[PASSWORD_HASHER_POLICY]] + [
+    path for name, path in POLICY_HASHERS.items() if name != PASSWORD_HASHER_POLICY
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', '600000'))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', '2'))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', '102400'))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', '8'))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', str(2 ** 14)))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get('PASSWORD_SCRYPT_BLOCK_SIZE', '8'))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get('PASSWORD_SCRYPT_PARALLELISM', '1'))
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -93,6 +275,45 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Access-controlled media (merchant documents), see config/protected_media.py.
+# '' serves through Django (FileResponse); 'nginx' uses X-Accel-Redirect to
+# PROTECTED_MEDIA_INTERNAL_PREFIX; 'apache' uses X-Sendfile.
+PROTECTED_MEDIA_SERVER = os.environ.get('PROTECTED_MEDIA_SERVER', '').lower()
+PROTECTED_MEDIA_INTERNAL_PREFIX = os.environ.get('PROTECTED_MEDIA_INTERNAL_PREFIX', '/protected-media/')
+MERCHANT_DOCUMENT_URL_MAX_AGE = int(os.environ.get('MERCHANT_DOCUMENT_URL_MAX_AGE', '300'))
+
+# Largest radius accepted by GET /api/merchants/nearby/.
+MERCHANT_NEARBY_MAX_RADIUS_KM = float(os.environ.get('MERCHANT_NEARBY_MAX_RADIUS_KM', '50'))
+
+# Public catalog (GET /api/products/catalog/).  Server-side page cache is
+# invalidated by catalog changes; the HTTP max-age bounds client staleness.
+CATALOG_CACHE_SECONDS = int(os.environ.get('CATALOG_CACHE_SECONDS', '300'))
+CATALOG_HTTP_MAX_AGE = int(os.environ.get('CATALOG_HTTP_MAX_AGE', '30'))
+
+# Product change feed (GET /api/products/merchant/changes/).  Tombstones of
+# hard-deleted products are kept this long; older cursors must resync.
+PRODUCT_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('PRODUCT_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Live product events (GET /api/products/merchant/events/, Server-Sent Events)
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_QUEUE_MAX_EVENTS = int(os.environ.get('SSE_QUEUE_MAX_EVENTS', '100'))  # per stream; beyond it the client resumes
+SSE_REPLAY_MAX_EVENTS = int(os.environ.get('SSE_REPLAY_MAX_EVENTS', '500'))  # Last-Event-ID replay; beyond it: resync
+SSE_STREAM_MAX_SECONDS = int(os.environ.get('SSE_STREAM_MAX_SECONDS', '600'))
+
+# Merchant metrics worker (manage.py drain_merchant_metrics)
+MERCHANT_METRICS_BATCH_SIZE = int(os.environ.get('MERCHANT_METRICS_BATCH_SIZE', '1000'))
+MERCHANT_METRICS_POLL_SECONDS = float(os.environ.get('MERCHANT_METRICS_POLL_SECONDS', '1'))
+MERCHANT_METRICS_RECONCILE_SECONDS = int(os.environ.get('MERCHANT_METRICS_RECONCILE_SECONDS', '3600'))
+
+# Audit log (apps/audit/services/audit_service.py): events are buffered per
+# process and written in batches by a background thread.
+AUDIT_BACKGROUND_FLUSH = os.environ.get('AUDIT_BACKGROUND_FLUSH', 'True') == 'True'
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', '2'))
+AUDIT_BUFFER_MAX_EVENTS = int(os.environ.get('AUDIT_BUFFER_MAX_EVENTS', '10000'))
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.environ.get('AUDIT_PARTITION_MONTHS_AHEAD', '2'))
+AUDIT_RETENTION_MONTHS = int(os.environ.get('AUDIT_RETENTION_MONTHS', '24'))  # 0 keeps everything
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
@@ -103,6 +324,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON with the same output as DRF's defaults (config/fast_json.py).
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.fast_json.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.fast_json.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
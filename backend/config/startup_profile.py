@@ -0,0 +1,222 @@
+"""
+Startup Profiling
+=================
+Measures how long a fresh interpreter takes to become ready to serve, and
+where the import time goes.  Each target boots in its own subprocess so
+nothing is already in sys.modules:
+
+    wsgi     import config.wsgi and load the URLconf (views, serializers)
+    asgi     import config.asgi and load the URLconf
+    manage   run ``manage.py <args>`` (default: ``check``)
+
+With ``-X importtime`` the child's import log is parsed into a tree, so the
+report can attribute self time per app (``apps.products``) and per
+third-party package.  Modules Django loads itself (app configs, models,
+admin modules, URLconfs) are timed separately in the child, since
+importlib.import_module() bypasses the import-time log: per URL module
+(``apps.products.urls`` including the views it pulls in) and per models
+module.
+
+Used by ``manage.py profile_startup`` and the startup-budget tests.  Modules
+in HEAVY_MODULES are only needed on cold paths (uploads, password hashing,
+SMTP) and must stay out of the booted app; import them inside the function
+that needs them.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Seconds from interpreter start-up to ready, per target.  STARTUP_BUDGET_SCALE
+# loosens them on slow CI machines.
+STARTUP_BUDGETS = {'wsgi': 1.5, 'asgi': 1.5, 'manage': 3.0}
+
+# Loaded lazily where they are used; the booted app must not import them.
+HEAVY_MODULES = ('PIL', 'argon2', 'smtplib')
+
+_MARKER = '__startup_profile__'
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)')
+
+_TARGET_CODE = {
+    'wsgi': 'import config.wsgi\nfrom django.urls import get_resolver\nget_resolver().url_patterns',
+    'asgi': 'import config.asgi\nfrom django.urls import get_resolver\nget_resolver().url_patterns',
+    'manage': 'from django.core.management import execute_from_command_line\n'
+              'execute_from_command_line(["manage.py", *{args!r}])',
+}
+
+_BOOT = '''
+import importlib, json, os, sys, time
+started = time.perf_counter()
+# Django loads apps, models and URLconfs with importlib.import_module, which
+# -X importtime does not log; time those calls here.
+loaded_by_django = {{}}
+_import_module = importlib.import_module
+def _timed_import_module(name, package=None):
+    if name in sys.modules:
+        return _import_module(name, package)
+    begun = time.perf_counter()
+    module = _import_module(name, package)
+    loaded_by_django.setdefault(name, time.perf_counter() - begun)
+    return module
+importlib.import_module = _timed_import_module
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+{code}
+print("{marker}" + json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "modules": sorted(sys.modules),
+    "loaded_by_django": loaded_by_django,
+}}))
+'''
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    children: list = field(default_factory=list)
+
+
+@dataclass
+class StartupProfile:
+    target: str
+    seconds: float          # from the child's first statement to ready
+    wall_seconds: float     # including interpreter start-up
+    modules: list
+    imports: list           # top-level ImportRecords (trees)
+    loaded_by_django: dict  # module -> cumulative seconds, for import_module() loads
+
+    def all_imports(self):
+        stack = list(self.imports)
+        while stack:
+            record = stack.pop()
+            yield record
+            stack.extend(record.children)
+
+
+def parse_importtime(log: str) -> list:
+    """
+    Turn ``-X importtime`` output into ImportRecord trees.  Python logs a
+    module after its nested imports, one indentation level deeper.
+    """
+    pending = {}
+    for line in log.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        record = ImportRecord(name, int(self_us), int(cumulative_us), depth)
+        record.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(record)
+    return [record for depth in sorted(pending) for record in pending[depth]]
+
+
+def run_target(target: str, importtime: bool = False, manage_args: Optional[list] = None) -> StartupProfile:
+    """Boot `target` in a fresh interpreter and measure it."""
+    if target not in _TARGET_CODE:
+        raise ValueError(f"Unknown startup target: {target}")
+    code = _TARGET_CODE[target].format(args=list(manage_args or ['check']))
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', _BOOT.format(code=code, marker=_MARKER)]
+
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - started
+
+    report = next((line for line in completed.stdout.splitlines() if line.startswith(_MARKER)), None)
+    if completed.returncode != 0 or report is None:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"{target} failed to start:\n" + '\n'.join(errors[-20:]))
+    data = json.loads(report[len(_MARKER):])
+    return StartupProfile(
+        target=target,
+        seconds=data['seconds'],
+        wall_seconds=wall_seconds,
+        modules=data['modules'],
+        loaded_by_django=data['loaded_by_django'],
+        imports=parse_importtime(completed.stderr) if importtime else [],
+    )
+
+
+def budget_for(target: str) -> float:
+    return STARTUP_BUDGETS[target] * float(os.environ.get('STARTUP_BUDGET_SCALE', '1'))
+
+
+def heavy_modules_loaded(profile: StartupProfile) -> list:
+    loaded = set(profile.modules)
+    return [name for name in HEAVY_MODULES if name in loaded]
+
+
+# ── Aggregation ──────────────────────────────────────────────────────────────
+
+
+def group_name(module: str) -> str:
+    """apps.<app> for project apps, else the top-level package."""
+    parts = module.split('.')
+    if parts[0] == 'apps' and len(parts) > 1:
+        return '.'.join(parts[:2])
+    return parts[0]
+
+
+def time_by_group(profile: StartupProfile) -> list:
+    """[(group, self ms)] sorted by time, over every imported module."""
+    totals = {}
+    for record in profile.all_imports():
+        key = group_name(record.name)
+        totals[key] = totals.get(key, 0) + record.self_us
+    return sorted(((key, us / 1000) for key, us in totals.items()), key=lambda item: -item[1])
+
+
+def time_by_url_module(profile: StartupProfile) -> list:
+    """
+    [(module, cumulative ms)] for URLconf modules: everything first imported
+    while loading that URL module (its views, serializers, services, and
+    any URLconfs it includes).
+    """
+    return [row for row in time_loaded_by_django(profile) if _is_urlconf(row[0])]
+
+
+def time_by_app_module(profile: StartupProfile) -> list:
+    """[(module, cumulative ms)] for app configs, models and admin modules."""
+    return [row for row in time_loaded_by_django(profile) if not _is_urlconf(row[0])]
+
+
+def time_loaded_by_django(profile: StartupProfile) -> list:
+    rows = ((name, seconds * 1000) for name, seconds in profile.loaded_by_django.items())
+    return sorted(rows, key=lambda item: -item[1])
+
+
+def _is_urlconf(module: str) -> bool:
+    return module == settings.ROOT_URLCONF or module.endswith('.urls')
+
+
+def slowest_imports(profile: StartupProfile, limit: int = 20) -> list:
+    """[(module, self ms)] of the individually slowest modules."""
+    rows = sorted(profile.all_imports(), key=lambda record: -record.self_us)[:limit]
+    return [(record.name, record.self_us / 1000) for record in rows]
+
+
+def format_tree(records: list, min_ms: float = 5.0, indent: int = 0) -> list:
+    """Lines of the import tree, pruning subtrees under `min_ms` cumulative."""
+    lines = []
+    for record in sorted(records, key=lambda record: -record.cumulative_us):
+        if record.cumulative_us / 1000 < min_ms:
+            continue
+        lines.append(f"{'  ' * indent}{record.name}  {record.cumulative_us / 1000:.1f} ms "
+                     f"(self {record.self_us / 1000:.1f})")
+        lines.extend(format_tree(record.children, min_ms, indent + 1))
+    return lines
@@ -0,0 +1,586 @@
+import gzip
+import math
+import random
+import unittest
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache, caches
+from django.db import connections, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.merchants.models import Merchant
+from apps.products.models import Category, MerchandiseProduct
+from apps.products.selectors.category_selectors import CategorySelector
+from apps.products.selectors.product_selectors import ProductSelector
+from config import benchmarks, compression, geohash, startup_profile
+from config.compression import CompressedBodyCache, CompressionMiddleware, choose_encoding
+from config.factories import auth_header
+from config.fast_json import ORJSONParser, ORJSONRenderer
+from config.instrumentation import current_metrics, span
+
+
+@override_settings(PERF_INSTRUMENTATION_ENABLED=True, PERF_SAMPLE_RATE=1.0, PERF_SERVER_TIMING_HEADER=True)
+class PerformanceInstrumentationTests(TestCase):
+    """Test cases for the Server-Timing instrumentation middleware"""
+
+    def test_server_timing_header(self):
+        """Test SQL, span and total timings are reported"""
+        with self.assertLogs('config.instrumentation', level='INFO') as logs:
+            response = self.client.get('/api/products/categories/')
+
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        self.assertIn('"path": "/api/products/categories/"', logs.output[0])
+
+    async def test_server_timing_counts_queries_under_asgi(self):
+        """Test queries the ORM runs in sync_to_async threads are counted"""
+        with self.assertLogs('config.instrumentation', level='INFO'):
+            response = await self.async_client.get('/api/products/categories/')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_server_timing_counts_cache_gets(self):
+        """Test default-cache hits and misses are counted without patching the backend class"""
+        cache.set('health:ready', 'ok')
+        with self.assertLogs('config.instrumentation', level='INFO'):
+            hit = self.client.get('/health/ready/')
+        cache.delete('health:ready')
+        with self.assertLogs('config.instrumentation', level='INFO'):
+            miss = self.client.get('/health/ready/')
+
+        self.assertIn('cache;desc="hit=1 miss=0"', hit['Server-Timing'])
+        self.assertIn('cache;desc="hit=0 miss=1"', miss['Server-Timing'])
+        backend_class = type(caches['default'])
+        self.assertEqual(backend_class.get.__module__, backend_class.__module__)
+
+    async def test_server_timing_counts_cache_gets_under_asgi(self):
+        """Test cache reads made from sync_to_async threads are counted"""
+        with self.assertLogs('config.instrumentation', level='INFO'):
+            response = await self.async_client.get('/health/ready/')
+        self.assertIn('cache;desc="hit=0 miss=1"', response['Server-Timing'])
+
+    @override_settings(PERF_SAMPLE_RATE=0.0)
+    def test_unsampled_request_has_no_header(self):
+        """Test requests outside the sample are not instrumented"""
+        response = self.client.get('/api/products/categories/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=False)
+    def test_disabled(self):
+        """Test the middleware removes itself when disabled"""
+        response = self.client.get('/api/products/categories/')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_span_outside_request_is_noop(self):
+        """Test spans do nothing without an instrumented request"""
+        with span('anything'):
+            pass
+        self.assertIsNone(current_metrics())
+
+
+class HealthProbeTests(TestCase):
+    """Test cases for the liveness and readiness probes"""
+
+    def test_live(self):
+        """Test liveness answers without touching the database"""
+        with self.assertNumQueries(0):
+            response = self.client.get('/health/live/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_ready(self):
+        """Test readiness reports database and cache"""
+        response = self.client.get('/health/ready/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['checks'], {'database': 'ok', 'cache': 'ok'})
+
+    def test_not_ready_when_cache_is_down(self):
+        """Test readiness fails with 503 when a dependency is unreachable"""
+        with mock.patch('config.health.cache.get', side_effect=ConnectionError('refused')), \
+                self.assertLogs('config.health', level='WARNING'):
+            response = self.client.get('/health/ready/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['cache'], 'unavailable')
+
+
+class AsyncViewTests(TestCase):
+    """Test cases for the async endpoints served through the ASGI handler"""
+
+    def setUp(self):
+        self.merchant = Merchant.objects.create_merchant(
+            email='async@merchant.com',
+            username='asyncmerchant',
+            password='Passw0rd123',
+            phone_number='+63 912 555 0101',
+        )
+        token = RefreshToken.for_user(self.merchant).access_token
+        self.auth = {'AUTHORIZATION': f'Bearer {token}'}
+        category = Category.objects.first() or Category.objects.create(name='Async', slug='async')
+        MerchandiseProduct.objects.create(
+            merchant=self.merchant, category=category, name='Async Mug', price='9.50', stock=3,
+        )
+
+    def test_views_are_async(self):
+        """Test the converted views dispatch as coroutines"""
+        from apps.merchants.views import CheckUniquenessView
+        from apps.products.views import CategoryListView, MerchandiseProductListView
+        for view in (CategoryListView, MerchandiseProductListView, CheckUniquenessView):
+            self.assertTrue(view.view_is_async, view.__name__)
+
+    async def test_category_list(self):
+        """Test categories are served over ASGI"""
+        response = await self.async_client.get('/api/products/categories/')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_product_list_and_detail(self):
+        """Test authenticated list, detail and patch over ASGI"""
+        response = await self.async_client.get('/api/products/merchant/', headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['pagination']['total_count'], 1)
+        product = response.json()['data'][0]
+        self.assertEqual(product['name'], 'Async Mug')
+
+        url = f"/api/products/merchant/{product['id']}/"
+        response = await self.async_client.patch(
+            url, {'stock': 7}, content_type='application/json', headers=self.auth,
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((await MerchandiseProduct.objects.aget(pk=product['id'])).stock, 7)
+
+    async def test_product_list_requires_auth(self):
+        """Test authentication failures still go through DRF exception handling"""
+        response = await self.async_client.get('/api/products/merchant/')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('detail', response.json())
+
+    async def test_check_uniqueness(self):
+        """Test the uniqueness probe over ASGI"""
+        response = await self.async_client.post(
+            '/api/merchants/register/check-uniqueness/',
+            {'field': 'email', 'value': 'ASYNC@merchant.com'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['exists'])
+
+    async def test_otp_send_and_verify(self):
+        """Test OTP send and single-use verification over ASGI"""
+        from apps.merchants.services.password_reset_service import PasswordResetService
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            response = await self.async_client.post(
+                '/api/merchants/forgot-password/send-otp/',
+                {'email': 'async@merchant.com'},
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        otp, _ = await PasswordResetService.agenerate_and_store_otp('async@merchant.com')
+        payload = {'email': 'async@merchant.com', 'otp': otp}
+        first = await self.async_client.post('/api/merchants/forgot-password/verify-otp/', payload, content_type='application/json')
+        second = await self.async_client.post('/api/merchants/forgot-password/verify-otp/', payload, content_type='application/json')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+
+
+class FastJSONCompatibilityTests(SimpleTestCase):
+    """Byte-for-byte comparison of the orjson renderer/parser with DRF's stdlib ones"""
+
+    VALUES = {
+        'scalars': {'s': 'plain', 'i': 42, 'neg': -7, 'f': 0.1, 'f2': 123456.789, 'whole': 2.0,
+                    't': True, 'n': None, 'empty': [], 'nested': {'a': [1, {'b': 'c'}]}},
+        'unicode': ['édition “quoted” — ☕ 🚀', 'tab\tnew\nline\r"q"\\ \x00\x1f\x7f', 'sep\u2028and\u2029end'],
+        'decimal': [Decimal('19.99'), Decimal('0'), Decimal('-1.50'), Decimal('12345678901.23')],
+        'datetime_utc': datetime(2024, 5, 1, 8, 30, tzinfo=dt_timezone.utc),
+        'datetime_micro': datetime(2024, 5, 1, 8, 30, 0, 123456, tzinfo=dt_timezone.utc),
+        'datetime_offset': datetime(2024, 5, 1, 8, 30, tzinfo=dt_timezone(timedelta(hours=8))),
+        'datetime_london_winter': datetime(2024, 1, 15, 9, 0, tzinfo=ZoneInfo('Europe/London')),
+        'datetime_naive': datetime(2024, 5, 1, 8, 30, 15),
+        'date': date(2024, 2, 29),
+        'time': time(23, 59, 59, 500),
+        'timedelta': timedelta(days=1, seconds=3.5),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'lazy': gettext_lazy('Product not found.'),
+        'lazy_list': [gettext_lazy('Active'), gettext_lazy('Archived')],
+        'non_str_keys': {1: 'one', None: 'none'},
+        'bool_float_keys': {True: 'yes', 2.5: 'x'},
+        'tuple': (1, 'two'),
+        'set': {'only'},
+        'bytes': b'raw',
+        'big_int': 2 ** 70,
+    }
+
+    def _both(self, data, accepted_media_type=None):
+        return (
+            JSONRenderer().render(data, accepted_media_type, {}),
+            ORJSONRenderer().render(data, accepted_media_type, {}),
+        )
+
+    def test_values_render_identically(self):
+        """Test every supported value type produces the same bytes"""
+        for name, value in self.VALUES.items():
+            with self.subTest(name):
+                expected, actual = self._both({name: value})
+                self.assertEqual(actual, expected)
+
+    def test_whole_payload_renders_identically(self):
+        """Test a product page with raw and pre-serialized values"""
+        payload = benchmarks.product_page_payload(items=10)
+        expected, actual = self._both(payload)
+        self.assertEqual(actual, expected)
+        self.assertEqual(ORJSONRenderer().render(None), JSONRenderer().render(None))
+
+    def test_indent_falls_back_to_stdlib(self):
+        """Test indented output (e.g. the browsable API) is unchanged"""
+        expected, actual = self._both(self.VALUES['scalars'], 'application/json; indent=4')
+        self.assertEqual(actual, expected)
+        self.assertIn(b'\n    ', actual)
+
+    def test_unsupported_value_raises_like_stdlib(self):
+        """Test unserializable values still raise TypeError"""
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            with self.assertRaises(TypeError):
+                renderer.render({'obj': object()})
+
+    def _parse(self, parser, body):
+        return parser.parse(BytesIO(body), 'application/json', {})
+
+    def test_parse_identically(self):
+        """Test bodies parse to the same values, including ones orjson cannot represent"""
+        bodies = [
+            b'{"field": "email", "value": "x@y.com", "n": [1, 2.5, -0, true, null]}',
+            '{"name": "édition ☕", "esc": "\\u00e9\\n"}'.encode(),
+            b'{"id": 123456789012345678901234567890}',
+            b'{"huge": 1e400}',
+            b'"\\ud800"',
+            b'  [1, 2]  ',
+        ]
+        for body in bodies:
+            with self.subTest(body):
+                expected = self._parse(JSONParser(), body)
+                actual = self._parse(ORJSONParser(), body)
+                self.assertEqual(actual, expected)
+                self.assertEqual(type(actual), type(expected))
+
+    def test_parse_errors_match(self):
+        """Test invalid and non-strict JSON raise the same ParseError"""
+        for body in (b'', b'{"a": ', b'{"a": NaN}', b'[Infinity]'):
+            with self.subTest(body):
+                with self.assertRaises(ParseError) as expected:
+                    self._parse(JSONParser(), body)
+                with self.assertRaises(ParseError) as actual:
+                    self._parse(ORJSONParser(), body)
+                self.assertEqual(str(actual.exception.detail), str(expected.exception.detail))
+
+    def test_defaults_use_orjson(self):
+        """Test the REST_FRAMEWORK defaults pick up the orjson codecs"""
+        self.assertIs(api_settings.DEFAULT_RENDERER_CLASSES[0], ORJSONRenderer)
+        self.assertIs(api_settings.DEFAULT_PARSER_CLASSES[0], ORJSONParser)
+
+
+class FastJSONEndpointTests(TestCase):
+    """Endpoint responses rendered by orjson match the stdlib renderer"""
+
+    def test_product_list_matches_stdlib(self):
+        merchant = Merchant.objects.create_merchant(
+            email='json@merchant.com', username='jsonmerchant',
+            password='Passw0rd123', phone_number='+63 912 555 0202',
+        )
+        category = Category.objects.first() or Category.objects.create(name='JSON', slug='json')
+        for idx in range(3):
+            MerchandiseProduct.objects.create(
+                merchant=merchant, category=category, name=f'Tee “{idx}” ☕', price=f'{idx}.50', stock=idx,
+            )
+        response = self.client.get('/api/products/merchant/', **auth_header(merchant))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class CompressionTests(TestCase):
+    """Test cases for the brotli/gzip response compression middleware"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.merchant = Merchant.objects.create_merchant(
+            email='gzip@merchant.com', username='gzipmerchant',
+            password='Passw0rd123', phone_number='+63 912 555 0303',
+        )
+        category = Category.objects.first() or Category.objects.create(name='Gzip', slug='gzip')
+        MerchandiseProduct.objects.bulk_create([
+            MerchandiseProduct(merchant=cls.merchant, category=category, name=f'Product {idx}', price='9.99', stock=idx)
+            for idx in range(40)
+        ])
+        cls.auth = auth_header(cls.merchant)
+
+    def _list(self, **extra):
+        return self.client.get('/api/products/merchant/', {'page_size': 40}, **self.auth, **extra)
+
+    def test_product_list_is_gzipped(self):
+        """Test a product page shrinks severalfold and decompresses to the original"""
+        plain = self._list()
+        compressed = self._list(HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertEqual(int(compressed['Content-Length']), len(compressed.content))
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertGreater(len(plain.content) / len(compressed.content), 4)
+
+    def test_negotiation(self):
+        """Test q-values, wildcards and unsupported codings"""
+        self.assertIsNone(choose_encoding(''))
+        self.assertIsNone(choose_encoding('gzip;q=0, deflate'))
+        self.assertEqual(choose_encoding('*'), 'br' if compression.brotli else 'gzip')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('br, gzip;q=0.8'), 'br' if compression.brotli else 'gzip')
+        response = self._list(HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @unittest.skipUnless(compression.brotli, 'brotli is not installed')
+    def test_product_list_is_brotli_compressed(self):
+        """Test brotli is preferred when accepted"""
+        plain = self._list()
+        compressed = self._list(HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(compressed['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(compressed.content), plain.content)
+
+    def test_small_and_binary_responses_are_not_compressed(self):
+        """Test the size threshold and the content-type allowlist"""
+        response = self.client.get('/health/live/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        middleware = CompressionMiddleware(lambda request: HttpResponse(b'x' * 5000, content_type='image/png'))
+        response = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_token_responses_are_never_compressed(self):
+        """Test login responses carrying JWTs are exempt (BREACH)"""
+        response = self.client.post(
+            '/api/merchants/login/', {'identifier': 'gzipmerchant', 'password': 'Passw0rd123'},
+            content_type='application/json', HTTP_ACCEPT_ENCODING='gzip, br',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_repeated_body_is_served_from_cache(self):
+        """Test an identical body is compressed once"""
+        with mock.patch('config.compression.compress_bytes', wraps=compression.compress_bytes) as compress:
+            first = self._list(HTTP_ACCEPT_ENCODING='gzip')
+            second = self._list(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(compress.call_count, 1)
+
+    def test_cache_is_bounded(self):
+        """Test least recently used bodies are evicted past the byte budget"""
+        cache_ = CompressedBodyCache(max_bytes=10)
+        cache_.set('a', b'12345')
+        cache_.set('b', b'12345')
+        cache_.get('a')
+        cache_.set('c', b'12345')
+        self.assertIsNotNone(cache_.get('a'))
+        self.assertIsNone(cache_.get('b'))
+        cache_.set('huge', b'x' * 11)
+        self.assertIsNone(cache_.get('huge'))
+
+    def test_streaming_response(self):
+        """Test sync streaming bodies are compressed incrementally"""
+        chunks = [b'{"row": %d, "pad": "%s"}\n' % (idx, b'z' * 200) for idx in range(50)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks), content_type='application/json'),
+        )
+        response = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+    async def test_async_streaming_response(self):
+        """Test async streaming bodies are compressed under ASGI"""
+        chunks = [b'data: %d\n\n' % idx for idx in range(20)]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def get_response(request):
+            return StreamingHttpResponse(stream(), content_type='text/event-stream')
+
+        middleware = CompressionMiddleware(get_response)
+        response = await middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(gzip.decompress(body), b''.join(chunks))
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """Cold start of the app and manage.py in a fresh interpreter"""
+
+    IMPORTTIME_LOG = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       100 |        100 |     leaf\n'
+        'import time:       200 |        300 |   middle\n'
+        'import time:        50 |         50 |   sibling\n'
+        'import time:      1000 |       1350 | root\n'
+        'import time:        10 |         10 | other\n'
+    )
+
+    def test_parse_importtime_builds_tree(self):
+        """Test the import-time log is nested by indentation"""
+        roots = startup_profile.parse_importtime(self.IMPORTTIME_LOG)
+        self.assertEqual([record.name for record in roots], ['root', 'other'])
+        self.assertEqual([child.name for child in roots[0].children], ['middle', 'sibling'])
+        self.assertEqual(roots[0].children[0].children[0].name, 'leaf')
+        self.assertEqual((roots[0].self_us, roots[0].cumulative_us), (1000, 1350))
+
+    def _assert_app_boot(self, target):
+        profile = startup_profile.run_target(target)
+        self.assertLess(profile.seconds, startup_profile.budget_for(target))
+        self.assertEqual(startup_profile.heavy_modules_loaded(profile), [])
+        self.assertIn('apps.products.views', profile.modules)
+
+    def test_wsgi_app_boots_within_budget(self):
+        """Test the WSGI app and URLconf load within budget without heavy modules"""
+        self._assert_app_boot('wsgi')
+
+    def test_asgi_app_boots_within_budget(self):
+        """Test the ASGI app and URLconf load within budget without heavy modules"""
+        self._assert_app_boot('asgi')
+
+    def test_manage_command_boots_within_budget(self):
+        """Test manage.py check completes within budget"""
+        profile = startup_profile.run_target('manage', manage_args=['check'])
+        self.assertLess(profile.seconds, startup_profile.budget_for('manage'))
+
+    def test_profile_attributes_url_modules(self):
+        """Test the import-time profile reports URL modules and app groups"""
+        profile = startup_profile.run_target('wsgi', importtime=True)
+        url_modules = dict(startup_profile.time_by_url_module(profile))
+        self.assertIn('config.urls', url_modules)
+        self.assertIn('apps.products.urls', url_modules)
+        self.assertGreaterEqual(url_modules['config.urls'], url_modules['apps.products.urls'])
+        self.assertIn('apps.products.models', dict(startup_profile.time_by_app_module(profile)))
+        self.assertIn('apps.products', dict(startup_profile.time_by_group(profile)))
+
+
+class GeohashTests(SimpleTestCase):
+    """Geohash encoding and circle covering used by the nearby-merchant search"""
+
+    def test_encode_and_bounds(self):
+        """Test the reference vector and that a cell contains its point"""
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        min_lat, min_lng, max_lat, max_lng = geohash.bounds('u4pruydqqvj')
+        self.assertTrue(min_lat <= 57.64911 <= max_lat and min_lng <= 10.40744 <= max_lng)
+
+    def test_haversine(self):
+        """Test one degree of latitude is ~111.19 km"""
+        self.assertAlmostEqual(geohash.haversine_km(0, 0, 1, 0), 111.195, places=2)
+        self.assertEqual(geohash.haversine_km(14.5, 121.0, 14.5, 121.0), 0)
+
+    def test_covering_cells_contain_every_point_in_radius(self):
+        """Test points within the radius always fall in one of the covering cells"""
+        rng = random.Random(7)
+        for _ in range(2000):
+            latitude, longitude = rng.uniform(-80, 80), rng.uniform(-180, 180)
+            radius = rng.choice([0.2, 1, 5, 25, 50])
+            cells = geohash.covering_cells(latitude, longitude, radius)
+            self.assertTrue(0 < len(cells) <= 16)
+
+            # Destination point at a random bearing and distance.
+            bearing, angle = rng.uniform(0, 2 * math.pi), rng.uniform(0, radius) / geohash.EARTH_RADIUS_KM
+            phi, lam = math.radians(latitude), math.radians(longitude)
+            phi2 = math.asin(math.sin(phi) * math.cos(angle) + math.cos(phi) * math.sin(angle) * math.cos(bearing))
+            lam2 = lam + math.atan2(math.sin(bearing) * math.sin(angle) * math.cos(phi),
+                                    math.cos(angle) - math.sin(phi) * math.sin(phi2))
+            point = geohash.encode(math.degrees(phi2), (math.degrees(lam2) + 540) % 360 - 180)
+            self.assertTrue(any(point.startswith(cell) for cell in cells), (latitude, longitude, radius))
+
+    def test_covering_cells_across_antimeridian(self):
+        """Test a circle on the antimeridian is covered on both sides"""
+        cells = geohash.covering_cells(0.0, 179.99, 5)
+        self.assertTrue(any(geohash.bounds(cell)[1] < 0 for cell in cells))
+        self.assertTrue(any(geohash.bounds(cell)[3] > 0 for cell in cells))
+        self.assertEqual(geohash.covering_cells(89.99, 0.0, 5), [])
+
+
+REPLICA_ALIAS = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS], AUDIT_BACKGROUND_FLUSH=False)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Routing against a real second Postgres database.  The replica never
+    receives the primary's writes, which makes every routed read visible
+    as "missing" data (i.e. maximal replication lag).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Created here rather than declared in `databases`, so the test runner
+        # does not need the alias in settings.DATABASES.
+        primary = connections['default'].settings_dict
+        connections.settings[REPLICA_ALIAS] = {
+            **primary,
+            'TEST': {**primary['TEST'], 'NAME': f"{primary['NAME']}_replica", 'MIRROR': None},
+        }
+        cls._replica_name = primary['NAME']
+        connections[REPLICA_ALIAS].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        cls.databases = {'default', REPLICA_ALIAS}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA_ALIAS].creation.destroy_test_db(cls._replica_name, verbosity=0)
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Routing', slug='routing')
+        self.merchant = Merchant.objects.create(
+            username='routing', email='routing@shop.com', phone_number='+63 912 555 0000', is_active=True,
+        )
+        self.product = MerchandiseProduct.objects.create(
+            merchant=self.merchant, category=self.category, name='Routed', price='10.00',
+        )
+
+    def test_selector_reads_use_replica(self):
+        """Test selector querysets read from the replica, plain ORM from the primary"""
+        self.assertEqual(list(ProductSelector.for_merchant(self.merchant)), [])
+        self.assertEqual(list(CategorySelector.active_tree()), [])
+        self.assertEqual(MerchandiseProduct.objects.filter(merchant=self.merchant).count(), 1)
+
+    def test_atomic_block_reads_primary(self):
+        """Test reads inside transaction.atomic stay on the primary"""
+        with transaction.atomic():
+            self.assertEqual(list(ProductSelector.for_merchant(self.merchant)), [self.product])
+
+    def test_write_pins_merchant_to_primary(self):
+        """Test a successful write request makes the merchant read its own writes"""
+        response = self.client.post(
+            '/api/products/merchant/bulk-action/',
+            {'action': 'deactivate', 'ids': [self.product.id]},
+            content_type='application/json',
+            **auth_header(self.merchant),
+        )
+        self.assertEqual(response.status_code, 200)
+
+        products = list(ProductSelector.for_merchant(self.merchant))
+        self.assertEqual(products, [self.product])
+        self.assertFalse(products[0].is_active)
+
+        other = Merchant.objects.create(username='other', email='other@shop.com', phone_number='+63 912 555 0001')
+        self.assertEqual(ProductSelector.for_merchant(other).db, REPLICA_ALIAS)
@@ -3,11 +3,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from config import health
+
 urlpatterns = [
+    path('health/live/', health.live, name='health-live'),
+    path('health/ready/', health.ready, name='health-ready'),
     path('admin/', admin.site.urls),
     path('api/users/', include('apps.users.urls')),
     path('api/merchants/', include('apps.merchants.urls')),
     path('api/products/', include('apps.products.urls')),
+    path('api/audit/', include('apps.audit.urls')),
 ]
 
 # Serve media files in development
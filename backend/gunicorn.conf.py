@@ -0,0 +1,91 @@
+"""
+Gunicorn configuration for production serving.
+
+    gunicorn -c gunicorn.conf.py
+
+The app is served over WSGI with threaded workers and persistent database
+connections by default.  SERVER_INTERFACE=asgi serves config.asgi with uvicorn
+workers instead, so async views (see config/async_views.py) run on each
+worker's event loop and the product event stream is available; ASGI closes
+database connections per request, so run it behind PgBouncer
+(DB_PGBOUNCER=True, see config/settings.py).  Without a pooler it connects
+per request and is slower than the WSGI default.
+
+Every setting can be tuned from the environment:
+
+    SERVER_INTERFACE           wsgi | asgi
+    GUNICORN_BIND              0.0.0.0:8000
+    GUNICORN_WORKERS           2 * CPU cores + 1
+    GUNICORN_THREADS           4 (per gthread worker; requests are mostly DB-bound)
+    GUNICORN_WORKER_CLASS      gthread (wsgi) / uvicorn.workers.UvicornWorker (asgi)
+    GUNICORN_TIMEOUT           30 seconds before a stuck worker is killed
+    GUNICORN_GRACEFUL_TIMEOUT  30 seconds for in-flight requests on reload/stop
+    GUNICORN_KEEPALIVE         5 seconds
+    GUNICORN_MAX_REQUESTS      1000 (recycle workers; 0 disables)
+    GUNICORN_PRELOAD           True
+
+The app is preloaded in the master so workers fork with Django already
+imported (faster boot, shared memory pages).  The URLconf, and with it every
+view, serializer and service module, is loaded in the master too; otherwise
+each worker would import them on its first request.  Reloads are graceful:
+`kill -HUP <master>` starts new workers and lets old ones finish their
+in-flight requests.  With preloading, HUP does not pick up new code; deploy
+new code with `kill -USR2 <master>` followed by `kill -QUIT <old master>`,
+or by restarting the container.
+"""
+
+import multiprocessing
+import os
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+server_interface = os.environ.get('SERVER_INTERFACE', 'wsgi').lower()
+if server_interface not in ('asgi', 'wsgi'):
+    raise ValueError(f"SERVER_INTERFACE must be 'asgi' or 'wsgi', got {server_interface!r}")
+wsgi_app = f'config.{server_interface}:application'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = os.environ.get(
+    'GUNICORN_WORKER_CLASS',
+    'uvicorn.workers.UvicornWorker' if server_interface == 'asgi' else 'gthread',
+)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+# Uploads are buffered to /tmp by default; in containers that may be disk.
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+
+def when_ready(server):
+    # Runs in the master after preloading and before workers are forked.
+    if server.cfg.preload_app:
+        from django.urls import get_resolver
+        get_resolver().url_patterns
+
+
+def post_fork(server, worker):
+    # Database connections opened while preloading belong to the master and
+    # must not be shared across forked workers.
+    from django.db import connections
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    # Write out audit events still buffered in this worker.
+    from apps.audit.services.audit_service import AuditService
+    from apps.products.services.event_service import ProductEventService
+    AuditService.shutdown()
+    # Stop this worker's event listener; its streams reconnect elsewhere.
+    ProductEventService.shutdown()
@@ -76,8 +76,8 @@ export const merchantAPI = {
   },
 
   // Get registration progress
-  getProgress: async (merchantId: number) => {
-    const response = await apiClient.get(`/merchants/register/progress/${merchantId}/`);
+  getProgress: async (draftId: string) => {
+    const response = await apiClient.get(`/merchants/register/progress/${draftId}/`);
     return response.data;
   },
 